@@ -1,5 +1,5 @@
 import collections
-import statsmodels.formula.api as smf
+import engine
 
 
 def aggregate_digit_span(data, sub_num):
@@ -81,68 +81,39 @@ def aggregate_ant(data, sub_num, response_type="full"):
     elif response_type == "full":
         df = data
 
-    # Aggregated descriptives
+    # Aggregated descriptives, computed in one pass per factor
 
     ## congruency conditions
-    grouped_congruency = df.groupby("congruency")
-    neutral_rt = grouped_congruency.mean().get_value("neutral", "RT")
-    congruent_rt = grouped_congruency.mean().get_value("congruent", "RT")
-    incongruent_rt = grouped_congruency.mean().get_value("incongruent", "RT")
-
-    neutral_rtsd = grouped_congruency.std().get_value("neutral", "RT")
-    congruent_rtsd = grouped_congruency.std().get_value("congruent", "RT")
-    incongruent_rtsd = grouped_congruency.std().get_value("incongruent", "RT")
-
-    neutral_rtcov = neutral_rtsd / neutral_rt
-    congruent_rtcov = congruent_rtsd / congruent_rt
-    incongruent_rtcov = incongruent_rtsd / incongruent_rt
-
-    neutral_correct = grouped_congruency.sum().get_value("neutral", "correct")
-    congruent_correct = grouped_congruency.sum().get_value("congruent", "correct")
-    incongruent_correct = grouped_congruency.sum().get_value("incongruent", "correct")
+    congruency = engine.describe(df, [], "congruency").reindex(
+        engine.ANT_CONGRUENCY_LEVELS
+    )
+    neutral_rt, congruent_rt, incongruent_rt = congruency["mean"]
+    neutral_rtsd, congruent_rtsd, incongruent_rtsd = congruency["sd"]
+    neutral_rtcov, congruent_rtcov, incongruent_rtcov = congruency["cov"]
+    neutral_correct, congruent_correct, incongruent_correct = congruency["correct"]
 
     ## cue conditions
-    grouped_cue = df.groupby("cue")
-    nocue_rt = grouped_cue.mean().get_value("nocue", "RT")
-    center_rt = grouped_cue.mean().get_value("center", "RT")
-    spatial_rt = grouped_cue.mean().get_value("spatial", "RT")
-    double_rt = grouped_cue.mean().get_value("double", "RT")
-
-    nocue_rtsd = grouped_cue.std().get_value("nocue", "RT")
-    center_rtsd = grouped_cue.std().get_value("center", "RT")
-    spatial_rtsd = grouped_cue.std().get_value("spatial", "RT")
-    double_rtsd = grouped_cue.std().get_value("double", "RT")
-
-    nocue_rtcov = nocue_rtsd / nocue_rt
-    center_rtcov = center_rtsd / center_rt
-    spatial_rtcov = spatial_rtsd / spatial_rt
-    double_rtcov = double_rtsd / double_rt
-
-    nocue_correct = grouped_cue.sum().get_value("nocue", "correct")
-    center_correct = grouped_cue.sum().get_value("center", "correct")
-    spatial_correct = grouped_cue.sum().get_value("spatial", "correct")
-    double_correct = grouped_cue.sum().get_value("double", "correct")
-
-    # OLS regression
-    conflict_df = df[
-        (df["congruency"] == "congruent") | (df["congruency"] == "incongruent")
-    ]
-    formula_conflict = "RT ~ C(congruency, Treatment(reference='congruent'))"
-    ols_results = smf.ols(formula_conflict, conflict_df).fit()
-    conflict_intercept, conflict_slope = ols_results.params
-    conflict_slope_norm = conflict_slope / congruent_rt
-
-    alerting_df = df[(df["cue"] == "double") | (df["cue"] == "nocue")]
-    formula_alerting = "RT ~ C(cue, Treatment(reference='double'))"
-    ols_results = smf.ols(formula_alerting, alerting_df).fit()
-    alerting_intercept, alerting_slope = ols_results.params
-    alerting_slope_norm = alerting_slope / double_rt
-
-    orienting_df = df[(df["cue"] == "spatial") | (df["cue"] == "center")]
-    formula_orienting = "RT ~ C(cue, Treatment(reference='spatial'))"
-    ols_results = smf.ols(formula_orienting, orienting_df).fit()
-    orienting_intercept, orienting_slope = ols_results.params
-    orienting_slope_norm = orienting_slope / spatial_rt
+    cue = engine.describe(df, [], "cue").reindex(engine.ANT_CUE_LEVELS)
+    nocue_rt, center_rt, spatial_rt, double_rt = cue["mean"]
+    nocue_rtsd, center_rtsd, spatial_rtsd, double_rtsd = cue["sd"]
+    nocue_rtcov, center_rtcov, spatial_rtcov, double_rtcov = cue["cov"]
+    nocue_correct, center_correct, spatial_correct, double_correct = cue["correct"]
+
+    # Treatment contrasts (same as OLS regression on the factor)
+    conflict = engine.contrast(congruency, "congruent", "incongruent")
+    conflict_intercept = conflict["intercept"]
+    conflict_slope = conflict["slope"]
+    conflict_slope_norm = conflict["slope_norm"]
+
+    alerting = engine.contrast(cue, "double", "nocue")
+    alerting_intercept = alerting["intercept"]
+    alerting_slope = alerting["slope"]
+    alerting_slope_norm = alerting["slope_norm"]
+
+    orienting = engine.contrast(cue, "spatial", "center")
+    orienting_intercept = orienting["intercept"]
+    orienting_slope = orienting["slope"]
+    orienting_slope_norm = orienting["slope_norm"]
 
     return [
         sub_num,
@@ -202,23 +173,18 @@ def aggregate_sternberg(data, sub_num, response_type="full"):
     elif response_type == "full":
         df = data
 
-    # Aggregated descriptives
-    grouped_set_size = df.groupby("setSize")
-    set_2_rt = grouped_set_size.mean().get_value(2, "RT")
-    set_2_rtsd = grouped_set_size.std().get_value(2, "RT")
-    set_2_rtcov = set_2_rtsd / set_2_rt
-    set_2_correct = grouped_set_size.sum().get_value(2, "correct")
-
-    set_6_rt = grouped_set_size.mean().get_value(6, "RT")
-    set_6_rtsd = grouped_set_size.std().get_value(6, "RT")
-    set_6_rtcov = set_6_rtsd / set_6_rt
-    set_6_correct = grouped_set_size.sum().get_value(6, "correct")
+    # Aggregated descriptives, computed in one pass
+    set_size = engine.describe(df, [], "setSize").reindex(engine.STERNBERG_SET_SIZES)
+    set_2_rt, set_6_rt = set_size["mean"]
+    set_2_rtsd, set_6_rtsd = set_size["sd"]
+    set_2_rtcov, set_6_rtcov = set_size["cov"]
+    set_2_correct, set_6_correct = set_size["correct"]
 
-    # OLS regression
-    formula = "RT ~ C(setSize, Treatment(reference=2))"
-    ols_results = smf.ols(formula, df).fit()
-    intercept, slope = ols_results.params
-    slope_norm = slope / set_2_rt
+    # Treatment contrast (same as OLS regression on the set size)
+    fit = engine.contrast(set_size, 2, 6)
+    intercept = fit["intercept"]
+    slope = fit["slope"]
+    slope_norm = fit["slope_norm"]
 
     return [
         sub_num,
@@ -257,30 +223,20 @@ def aggregate_flanker(data, sub_num, response_type="full"):
         elif response_type == "full":
             df = df_cur
 
-        grouped_congruency = df.groupby(["congruency"])
-
-        congruent_rt = grouped_congruency.mean().get_value("congruent", "RT")
-        incongruent_rt = grouped_congruency.mean().get_value("incongruent", "RT")
-
-        congruent_rtsd = grouped_congruency.std().get_value("congruent", "RT")
-        incongruent_rtsd = grouped_congruency.std().get_value("incongruent", "RT")
-
-        congruent_rtcov = congruent_rtsd / congruent_rt
-        incongruent_rtcov = incongruent_rtsd / incongruent_rt
-
-        congruent_correct = grouped_congruency.sum().get_value("congruent", "correct")
-        incongruent_correct = grouped_congruency.sum().get_value(
-            "incongruent", "correct"
+        # Aggregated descriptives, computed in one pass
+        congruency = engine.describe(df, [], "congruency").reindex(
+            engine.FLANKER_CONGRUENCY_LEVELS
         )
-
-        # OLS regression
-        conflict_df = df[
-            (df["congruency"] == "congruent") | (df["congruency"] == "incongruent")
-        ]
-        formula_conflict = "RT ~ C(congruency, Treatment(reference='congruent'))"
-        ols_results = smf.ols(formula_conflict, conflict_df).fit()
-        conflict_intercept, conflict_slope = ols_results.params
-        conflict_slope_norm = conflict_slope / congruent_rt
+        congruent_rt, incongruent_rt = congruency["mean"]
+        congruent_rtsd, incongruent_rtsd = congruency["sd"]
+        congruent_rtcov, incongruent_rtcov = congruency["cov"]
+        congruent_correct, incongruent_correct = congruency["correct"]
+
+        # Treatment contrast (same as OLS regression on the congruency)
+        conflict = engine.contrast(congruency, "congruent", "incongruent")
+        conflict_intercept = conflict["intercept"]
+        conflict_slope = conflict["slope"]
+        conflict_slope_norm = conflict["slope_norm"]
 
         columns += [
             follow_error_rt,
@@ -0,0 +1,569 @@
+import pandas as pd
+
+# Factor levels of each task, in output column order
+ANT_CONGRUENCY_LEVELS = ["neutral", "congruent", "incongruent"]
+ANT_CUE_LEVELS = ["nocue", "center", "spatial", "double"]
+STERNBERG_SET_SIZES = [2, 6]
+FLANKER_CONGRUENCY_LEVELS = ["congruent", "incongruent"]
+FLANKER_COMPATIBILITY = {"compatible": "compat", "incompatible": "incompat"}
+
+# Trials aggregated by the RT tasks: every trial, or only correct or incorrect
+RESPONSE_TYPES = ["full", "correct", "incorrect"]
+
+
+def combine(subjects):
+    """Combine the data of one task from many subjects into one long table.
+
+    Parameters:
+    subjects -- dict of task dataframes (one sheet of each subject's data
+        file), by subject number
+
+    Returns:
+    data -- dataframe of every subject's trials, in trial order, with a
+        categorical "sub_num" column. Text columns are categorical too
+    """
+    sub_nums = [str(x) for x in subjects]
+    data = pd.concat(
+        [df.reset_index(drop=True) for df in subjects.values()], ignore_index=True
+    )
+
+    # Subject of each row, in the order subjects were given
+    lengths = [df.shape[0] for df in subjects.values()]
+    data.insert(
+        0,
+        "sub_num",
+        pd.Categorical(
+            [sub for sub, n in zip(sub_nums, lengths) for i in range(n)],
+            categories=sub_nums,
+        ),
+    )
+
+    for name, column in data.items():
+        if name != "sub_num" and not pd.api.types.is_numeric_dtype(column):
+            data[name] = column.astype("category")
+
+    return data
+
+
+def response_types(response_type):
+    # List of the response types asked for, as one type or a list of types
+    if isinstance(response_type, str):
+        return [response_type]
+
+    return list(response_type)
+
+
+def follow_rts(data, keys, rt="RT", accuracy="correct"):
+    """Get each group's mean RT following errors and correct responses.
+
+    The previous trial is the previous row of the same group.
+
+    Parameters:
+    data -- dataframe of trials
+    keys -- list of grouping columns (e.g. ["sub_num"])
+    rt -- name of the RT column
+    accuracy -- name of the 0/1 accuracy column
+
+    Returns:
+    follow -- dataframe indexed by keys, with "follow_error_rt" and
+        "follow_correct_rt" columns
+    """
+    previous = data.groupby(keys, observed=True, sort=False)[accuracy].shift()
+
+    return pd.DataFrame(
+        {
+            "follow_error_rt": data[rt]
+            .where(previous == 0)
+            .groupby([data[x] for x in keys], observed=True)
+            .mean(),
+            "follow_correct_rt": data[rt]
+            .where(previous == 1)
+            .groupby([data[x] for x in keys], observed=True)
+            .mean(),
+        }
+    )
+
+
+def level_sums(data, groups, rt="RT", accuracy="correct"):
+    # Count, sum and sum of squares of the RTs, and number correct, by group
+    rts = data[rt].astype(float)
+    sums = {"count": rts.notna().astype(int), "sum": rts, "sumsq": rts**2}
+    if accuracy is not None:
+        sums["correct"] = data[accuracy]
+
+    return pd.DataFrame(sums).groupby(groups, observed=True).sum()
+
+
+def moments(table):
+    # Add the RT mean, SD and CoV to a table of level_sums()
+    table["mean"] = table["sum"] / table["count"]
+    deviations = (table["sumsq"] - table["sum"] * table["mean"]).clip(lower=0)
+    table["sd"] = (deviations / (table["count"] - 1)).where(table["count"] > 1) ** 0.5
+    table["cov"] = table["sd"] / table["mean"]
+
+    return table
+
+
+def describe(data, keys, factor, rt="RT", accuracy="correct"):
+    """Get descriptive statistics of each level of a factor, in one pass.
+
+    The trials are grouped once, summing the count, sum and sum of squares
+    of the RTs and the number correct together. The mean, SD and CoV are
+    computed from the sums.
+
+    Parameters:
+    data -- dataframe of trials
+    keys -- list of grouping columns (e.g. ["sub_num"]). Can be empty
+    factor -- name of the factor column
+    rt -- name of the RT column
+    accuracy -- name of the 0/1 accuracy column, or None
+
+    Returns:
+    table -- dataframe indexed by keys and factor, with "count", "sum",
+        "sumsq", "mean", "sd" and "cov" columns for the RTs, and a
+        "correct" column with the number correct. count is the number of
+        trials with an RT
+    """
+    groups = [data[x] for x in keys + [factor]]
+
+    return moments(level_sums(data, groups, rt, accuracy))
+
+
+def describe_responses(
+    data, keys, factor, response_type=RESPONSE_TYPES, rt="RT", accuracy="correct"
+):
+    """Get descriptive statistics of each response type, in one pass.
+
+    The trials are grouped once, with the accuracy as an extra key. The
+    sums of the correct and incorrect responses are parts of that table,
+    and the sums of every trial are their totals.
+
+    Parameters:
+    data -- dataframe of trials
+    keys -- list of grouping columns (e.g. ["sub_num"]). Can be empty
+    factor -- name of the factor column
+    response_type -- response type ("full", "correct" or "incorrect"), or
+        list of response types
+    rt -- name of the RT column
+    accuracy -- name of the 0/1 accuracy column
+
+    Returns:
+    tables -- dict of tables like those returned by describe(), by
+        response type
+    """
+    # Trials without an accuracy only count towards every trial's sums
+    response = data[accuracy].fillna(-1).rename("response")
+    groups = [data[x] for x in keys] + [response, data[factor]]
+    sums = level_sums(data, groups, rt, accuracy)
+
+    tables = {}
+    for x in response_types(response_type):
+        if x == "full":
+            table = sums.groupby(level=keys + [factor], observed=True).sum()
+        else:
+            value = 1 if x == "correct" else 0
+            table = sums[sums.index.get_level_values("response") == value]
+            table = table.droplevel("response")
+
+        tables[x] = moments(table)
+
+    return tables
+
+
+def level_stats(table, levels):
+    """Get the RT mean, SD and CoV, and the number correct, of factor levels.
+
+    Parameters:
+    table -- dataframe returned by describe(), with grouping keys
+    levels -- list of factor levels
+
+    Returns:
+    stats -- dataframe indexed by keys, with (statistic, level) columns for
+        the statistics "rt", "rtsd", "rtcov" and "correct"
+    """
+    stats = table[["mean", "sd", "cov", "correct"]].rename(
+        columns={"mean": "rt", "sd": "rtsd", "cov": "rtcov"}
+    )
+    stats = stats.unstack(-1)
+    columns = pd.MultiIndex.from_product([["rt", "rtsd", "rtcov", "correct"], levels])
+
+    return stats.reindex(columns=columns)
+
+
+def fit_contrast(reference, level):
+    """Fit RT on a two level treatment coded factor by least squares.
+
+    The fit has the mean RT of the reference level as its intercept, and the
+    difference of the mean RTs as its slope, so it only needs the count, sum
+    and sum of squares of each level's RTs. The standard errors are those of
+    ordinary least squares, from the residual variance pooled over both
+    levels.
+
+    Parameters:
+    reference -- (count, sum, sum of squares) of the reference level's RTs.
+        Numbers, or series with one value per fit
+    level -- (count, sum, sum of squares) of the other level's RTs
+
+    Returns:
+    fit -- dict of "intercept", "slope", "slope_norm", "intercept_se" and
+        "slope_se". slope_norm is the slope divided by the intercept
+    """
+    n_reference, sum_reference, sumsq_reference = reference
+    n_level, sum_level, sumsq_level = level
+
+    intercept = sum_reference / n_reference
+    slope = sum_level / n_level - intercept
+
+    residual_ss = (sumsq_reference - sum_reference**2 / n_reference) + (
+        sumsq_level - sum_level**2 / n_level
+    )
+    variance = residual_ss / (n_reference + n_level - 2)
+
+    return {
+        "intercept": intercept,
+        "slope": slope,
+        "slope_norm": slope / intercept,
+        "intercept_se": (variance / n_reference) ** 0.5,
+        "slope_se": (variance * (1 / n_reference + 1 / n_level)) ** 0.5,
+    }
+
+
+def contrast(table, reference, level):
+    """Fit RT on a two level treatment coded factor, for each group at once.
+
+    Gives the parameters and standard errors of an OLS fit of
+    "RT ~ C(factor, Treatment(reference))" to each group's trials of the two
+    levels (see fit_contrast()). Groups without trials of a level have
+    missing values.
+
+    Parameters:
+    table -- dataframe returned by describe()
+    reference -- reference level
+    level -- level compared to the reference
+
+    Returns:
+    fit -- dataframe indexed by the table's keys, with "intercept",
+        "slope", "slope_norm", "intercept_se" and "slope_se" columns. A
+        series of these if the table has no keys
+    """
+    sums = table[["count", "sum", "sumsq"]]
+
+    if sums.index.nlevels == 1:
+        sums = sums.reindex([reference, level])
+        return pd.Series(fit_contrast(sums.loc[reference], sums.loc[level]))
+
+    sums = sums.unstack(-1).reindex(
+        columns=pd.MultiIndex.from_product(
+            [["count", "sum", "sumsq"], [reference, level]]
+        )
+    )
+    fit = fit_contrast(
+        [sums[(x, reference)] for x in ["count", "sum", "sumsq"]],
+        [sums[(x, level)] for x in ["count", "sum", "sumsq"]],
+    )
+
+    return pd.DataFrame(fit, index=sums.index)
+
+
+def treatment_contrast(data, keys, factor, reference, level, rt="RT"):
+    """Fit RT on a two level treatment coded factor, for each group at once.
+
+    Parameters:
+    data -- dataframe of trials
+    keys -- list of grouping columns (e.g. ["sub_num"])
+    factor -- name of the factor column
+    reference -- reference level
+    level -- level compared to the reference
+    rt -- name of the RT column
+
+    Returns:
+    fit -- dataframe indexed by keys, as returned by contrast()
+    """
+    df = data[data[factor].isin([reference, level])]
+
+    return contrast(describe(df, keys, factor, rt, None), reference, level)
+
+
+def flatten(stats, prefix):
+    # Name (statistic, level) columns "<prefix>_<level>_<statistic>"
+    return pd.DataFrame(
+        {
+            "%s_%s_%s" % (prefix, level, stat): stats[(stat, level)]
+            for stat, level in stats.columns
+        }
+    )
+
+
+def finish(results, data, columns):
+    # One row per subject, in subject order, with a sub_num column
+    results = results.reindex(data["sub_num"].cat.categories)
+    results.index.name = "sub_num"
+
+    return results.reset_index()[columns]
+
+
+def finish_responses(results, data, columns, response_type):
+    # One row per subject, or per subject and response type for a list of
+    # response types
+    if isinstance(response_type, str):
+        return finish(results[response_type], data, columns)
+
+    parts = []
+    for x in response_types(response_type):
+        part = finish(results[x], data, columns)
+        part.insert(1, "response_type", x)
+        parts.append(part)
+
+    # Each subject's rows together, in the order of the response types
+    return pd.concat(parts).sort_index(kind="stable").reset_index(drop=True)
+
+
+def aggregate_ant(data, response_type="full"):
+    """Aggregate the ANT data of many subjects.
+
+    Gives the same values as analysis.aggregate_ant() for each subject.
+
+    Parameters:
+    data -- dataframe returned by combine()
+    response_type -- trials to aggregate: "full", "correct" or "incorrect".
+        A list of these aggregates each of them, from one grouping.
+        RTs following errors and correct responses always use every trial
+
+    Returns:
+    results -- dataframe with one row per subject. For a list of response
+        types, one row per subject and response type, with a
+        "response_type" column
+    """
+    keys = ["sub_num"]
+    follow = follow_rts(data, keys).add_prefix("ant_")
+
+    congruency = describe_responses(data, keys, "congruency", response_type)
+    cue = describe_responses(data, keys, "cue", response_type)
+
+    results = {}
+    for x in response_types(response_type):
+        results[x] = follow.join(
+            [
+                flatten(level_stats(congruency[x], ANT_CONGRUENCY_LEVELS), "ant"),
+                flatten(level_stats(cue[x], ANT_CUE_LEVELS), "ant"),
+            ]
+        )
+
+        for name, table, reference, level in [
+            ("conflict", congruency[x], "congruent", "incongruent"),
+            ("alerting", cue[x], "double", "nocue"),
+            ("orienting", cue[x], "spatial", "center"),
+        ]:
+            fit = contrast(table, reference, level)
+            for stat in ["intercept", "slope", "slope_norm"]:
+                results[x]["ant_%s_%s" % (name, stat)] = fit[stat]
+
+    columns = ["sub_num", "ant_follow_error_rt", "ant_follow_correct_rt"]
+    for levels in [ANT_CONGRUENCY_LEVELS, ANT_CUE_LEVELS]:
+        for stat in ["rt", "rtsd", "rtcov", "correct"]:
+            columns += ["ant_%s_%s" % (level, stat) for level in levels]
+    for name in ["conflict", "alerting", "orienting"]:
+        columns += [
+            "ant_%s_%s" % (name, x) for x in ["intercept", "slope", "slope_norm"]
+        ]
+
+    return finish_responses(results, data, columns, response_type)
+
+
+def aggregate_sternberg(data, response_type="full"):
+    """Aggregate the Sternberg data of many subjects.
+
+    Gives the same values as analysis.aggregate_sternberg() for each subject.
+
+    Parameters:
+    data -- dataframe returned by combine()
+    response_type -- trials to aggregate: "full", "correct" or "incorrect".
+        A list of these aggregates each of them, from one grouping
+
+    Returns:
+    results -- dataframe with one row per subject. For a list of response
+        types, one row per subject and response type, with a
+        "response_type" column
+    """
+    keys = ["sub_num"]
+    follow = follow_rts(data, keys).add_prefix("stern_")
+
+    set_size = describe_responses(data, keys, "setSize", response_type)
+
+    results = {}
+    for x in response_types(response_type):
+        results[x] = follow.join(
+            flatten(level_stats(set_size[x], STERNBERG_SET_SIZES), "stern_set")
+        )
+
+        fit = contrast(set_size[x], 2, 6)
+        for stat in ["intercept", "slope", "slope_norm"]:
+            results[x]["stern_%s" % stat] = fit[stat]
+
+    columns = ["sub_num", "stern_follow_error_rt", "stern_follow_correct_rt"]
+    for stat in ["rt", "rtsd", "rtcov", "correct"]:
+        columns += ["stern_set_%s_%s" % (x, stat) for x in STERNBERG_SET_SIZES]
+    columns += ["stern_intercept", "stern_slope", "stern_slope_norm"]
+
+    return finish_responses(results, data, columns, response_type)
+
+
+def aggregate_flanker(data, response_type="full"):
+    """Aggregate the Flanker data of many subjects.
+
+    Gives the same values as analysis.aggregate_flanker() for each subject.
+    Compatible and incompatible blocks are aggregated separately, into
+    "flanker_compat_*" and "flanker_incompat_*" columns. Subjects without
+    blocks of a compatibility have missing values in its columns.
+
+    Parameters:
+    data -- dataframe returned by combine()
+    response_type -- trials to aggregate: "full", "correct" or "incorrect".
+        A list of these aggregates each of them, from one grouping
+
+    Returns:
+    results -- dataframe with one row per subject. For a list of response
+        types, one row per subject and response type, with a
+        "response_type" column
+    """
+    keys = ["sub_num", "compatibility"]
+    follow = follow_rts(data, keys)
+
+    congruency = describe_responses(data, keys, "congruency", response_type)
+
+    names = ["follow_error_rt", "follow_correct_rt"]
+    for stat in ["rt", "rtsd", "rtcov", "correct"]:
+        names += ["%s_%s" % (x, stat) for x in FLANKER_CONGRUENCY_LEVELS]
+    names += ["conflict_intercept", "conflict_slope", "conflict_slope_norm"]
+
+    columns = ["sub_num"]
+    for prefix in FLANKER_COMPATIBILITY.values():
+        columns += ["flanker_%s_%s" % (prefix, x) for x in names]
+
+    results = {}
+    for x in response_types(response_type):
+        fit = contrast(congruency[x], "congruent", "incongruent")
+
+        stats = follow.join(
+            flatten(level_stats(congruency[x], FLANKER_CONGRUENCY_LEVELS), "flanker")
+        )
+        for stat in ["intercept", "slope", "slope_norm"]:
+            stats["conflict_%s" % stat] = fit[stat]
+        stats.columns = [name.replace("flanker_", "") for name in stats.columns]
+
+        # One set of columns per compatibility
+        parts = []
+        for compatibility, prefix in FLANKER_COMPATIBILITY.items():
+            if compatibility in stats.index.get_level_values("compatibility"):
+                part = stats.xs(compatibility, level="compatibility")[names]
+            else:
+                part = pd.DataFrame(columns=names, dtype=float)
+            parts.append(part.add_prefix("flanker_%s_" % prefix))
+
+        results[x] = pd.concat(parts, axis=1)
+
+    return finish_responses(results, data, columns, response_type)
+
+
+def aggregate_sart(data):
+    """Aggregate the SART data of many subjects.
+
+    Gives the same values as analysis.aggregate_sart() for each subject.
+
+    Parameters:
+    data -- dataframe returned by combine()
+
+    Returns:
+    results -- dataframe with one row per subject
+    """
+    results = follow_rts(data, ["sub_num"], accuracy="accuracy").add_prefix("sart_")
+
+    infrequent = data["stimulus"] == 3
+    grouped = [
+        ("total", data),
+        ("frequent", data[~infrequent]),
+        ("infrequent", data[infrequent]),
+    ]
+    for name, df in grouped:
+        rt = df.groupby("sub_num", observed=True)["RT"]
+        results["sart_%s_rt" % name] = rt.mean()
+        results["sart_%s_rtsd" % name] = rt.std()
+        results["sart_%s_rtcov" % name] = (
+            results["sart_%s_rtsd" % name] / results["sart_%s_rt" % name]
+        )
+
+    errors = data[infrequent].groupby("sub_num", observed=True)["key press"]
+    results["sart_error_count"] = errors.sum()
+    results["sart_errors_num_items"] = errors.size()
+    results["sart_errors_prop"] = (
+        results["sart_error_count"] / results["sart_errors_num_items"]
+    )
+
+    columns = ["sub_num", "sart_follow_error_rt", "sart_follow_correct_rt"]
+    for name, df in grouped:
+        columns += ["sart_%s_%s" % (name, x) for x in ["rt", "rtsd", "rtcov"]]
+    columns += ["sart_error_count", "sart_errors_prop", "sart_errors_num_items"]
+
+    return finish(results, data, columns)
+
+
+def aggregate_correct(data, prefix, rt=False):
+    # Number and proportion correct, for tasks that are scored by item
+    grouped = data.groupby("sub_num", observed=True)
+
+    results = pd.DataFrame({"%s_count" % prefix: grouped["correct"].sum()})
+    results["%s_num_items" % prefix] = grouped.size()
+    results["%s_prop" % prefix] = (
+        results["%s_count" % prefix] / results["%s_num_items" % prefix]
+    )
+
+    columns = ["sub_num"]
+    if rt:
+        results["%s_rt" % prefix] = grouped["RT"].mean()
+        columns.append("%s_rt" % prefix)
+    columns += ["%s_count" % prefix, "%s_prop" % prefix, "%s_num_items" % prefix]
+
+    return finish(results, data, columns)
+
+
+def aggregate_digit_span(data):
+    """Aggregate the digit span (backwards) data of many subjects.
+
+    Gives the same values as analysis.aggregate_digit_span() for each
+    subject, in "digit_correct_*" columns.
+    """
+    return aggregate_correct(data, "digit_correct").rename(
+        columns={"digit_correct_num_items": "digit_num_items"}
+    )
+
+
+def aggregate_mrt(data):
+    """Aggregate the MRT data of many subjects.
+
+    Gives the same values as analysis.aggregate_mrt() for each subject.
+    """
+    return aggregate_correct(data, "mrt")
+
+
+def aggregate_ravens(data):
+    """Aggregate the Raven's Matrices data of many subjects.
+
+    Gives the same values as analysis.aggregate_ravens() for each subject.
+    """
+    return aggregate_correct(data, "ravens", rt=True)
+
+
+# Aggregate function of each task, by the task's sheet name
+AGGREGATORS = {
+    "ANT": aggregate_ant,
+    "Digit span (backwards)": aggregate_digit_span,
+    "Eriksen Flanker": aggregate_flanker,
+    "MRT": aggregate_mrt,
+    "Ravens Matrices": aggregate_ravens,
+    "SART": aggregate_sart,
+    "Sternberg": aggregate_sternberg,
+}
+TASKS = list(AGGREGATORS)
+
+# Tasks whose aggregate function takes a response_type
+RESPONSE_TYPE_TASKS = ["ANT", "Eriksen Flanker", "Sternberg"]
@@ -0,0 +1,132 @@
+import itertools
+import os
+import sys
+import time
+import traceback
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from concurrent.futures.process import BrokenProcessPool
+
+# Battery utilities, for reading session data in any output format
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+from utils import output
+
+
+def session_paths(data_dir):
+    """Get the paths of the sessions in a data directory.
+
+    Sessions are saved as Excel workbooks, or as directories of
+    parquet/feather files. Workbooks that are only an Excel export of a
+    session directory are skipped.
+
+    Parameters:
+    data_dir -- project data directory
+
+    Returns:
+    paths -- list of session paths, sorted by file name
+    """
+    paths = []
+    for f in sorted(os.listdir(data_dir)):
+        path = os.path.join(data_dir, f)
+        name, ext = os.path.splitext(path)
+        if os.path.isdir(path) or (
+            ext in output.EXCEL_EXTENSIONS and not os.path.isdir(name)
+        ):
+            paths.append(path)
+
+    return paths
+
+
+def read_file(path, tables, excel=False):
+    # Read a session in a worker process. Errors are returned instead of
+    # raised, so a bad file doesn't stop the others
+    start = time.perf_counter()
+    try:
+        data = output.read_session(path, tables)
+    except Exception:
+        return None, time.perf_counter() - start, traceback.format_exc()
+
+    # The data is still used if the Excel view can't be written
+    error = None
+    if excel and os.path.isdir(path):
+        try:
+            output.export_excel(path)
+        except Exception:
+            error = traceback.format_exc()
+
+    return data, time.perf_counter() - start, error
+
+
+def read_sessions(paths, tables=None, workers=None, max_pending=None, excel=False):
+    """Read sessions in worker processes, yielding each as soon as it's read.
+
+    Only max_pending files are submitted at a time, so memory use doesn't
+    grow with the number of files when they are read faster than they are
+    used.
+
+    If a worker process dies (e.g. killed for running out of memory), the
+    files being read in its pool fail, and the remaining files are read in a
+    new pool.
+
+    Parameters:
+    paths -- list of session paths (see session_paths())
+    tables -- names of the tables to read, or None to read every table
+    workers -- number of worker processes, or None for one per CPU
+    max_pending -- maximum number of files being read or waiting to be
+        yielded, or None for two per worker process
+    excel -- also write an Excel view of each session saved in a columnar
+        format, next to its directory (see output.export_excel())
+
+    Yields:
+    path, data, seconds, error -- session path, dict of dataframes by table
+        name, time taken to read the file in seconds and None, in the order
+        the files are read. If the file couldn't be read, data is None and
+        error is the traceback. If only its Excel view couldn't be written,
+        data is given and error is the traceback
+    """
+    workers = workers or os.cpu_count() or 1
+    max_pending = max_pending or 2 * workers
+    paths = iter(paths)
+
+    executor = ProcessPoolExecutor(max_workers=workers)
+    try:
+        pending = {}
+        while True:
+            broken = False
+            while len(pending) < max_pending:
+                path = next(paths, None)
+                if path is None:
+                    break
+                try:
+                    pending[executor.submit(read_file, path, tables, excel)] = path
+                except BrokenProcessPool:
+                    # Read the file in the new pool instead
+                    paths = itertools.chain([path], paths)
+                    broken = True
+                    break
+
+            if not pending and not broken:
+                return
+
+            done = wait(pending, return_when=FIRST_COMPLETED)[0]
+            if any(isinstance(x.exception(), BrokenProcessPool) for x in done):
+                broken = True
+            if broken:
+                # A worker process died, so every file still pending in its
+                # pool fails with it
+                done = wait(pending)[0]
+
+            for future in done:
+                path = pending.pop(future)
+                try:
+                    data, seconds, error = future.result()
+                except Exception:
+                    data, seconds, error = None, 0.0, traceback.format_exc()
+
+                yield path, data, seconds, error
+
+            if broken:
+                # Read the remaining files in a new pool
+                executor.shutdown()
+                executor = ProcessPoolExecutor(max_workers=workers)
+    finally:
+        executor.shutdown()
@@ -0,0 +1,272 @@
+import argparse
+import configparser
+import io
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+os.environ["PYGAME_HIDE_SUPPORT_PROMPT"] = "1"
+
+from tasks import session
+from utils import schedule
+
+# Task options and their defaults, by settings file section and key.
+# Defaults match the ones the battery window writes to new projects
+TASK_OPTIONS = {
+    "ant_blocks": ("AttentionNetworkTest", "numBlocks", 3),
+    "flanker_sets_practice": ("Flanker", "setsPractice", 3),
+    "flanker_sets_main": ("Flanker", "setsMain", 25),
+    "flanker_blocks_compat": ("Flanker", "blocksCompat", 1),
+    "flanker_blocks_incompat": ("Flanker", "blocksIncompat", 0),
+    "sternberg_blocks": ("Sternberg", "numBlocks", 2),
+}
+
+
+def parse_subjects(text):
+    """Parse a list of subject numbers.
+
+    Parameters:
+    text -- comma separated subject numbers and ranges (e.g. "1-200,250")
+
+    Returns:
+    subjects -- list of subject numbers, as strings
+    """
+    subjects = []
+    for item in text.split(","):
+        item = item.strip()
+        if "-" in item:
+            first, last = item.split("-", 1)
+            subjects += [str(x) for x in range(int(first), int(last) + 1)]
+        elif item:
+            subjects.append(item)
+
+    return subjects
+
+
+def read_settings(project_dir):
+    """Read the seed and task options of a project.
+
+    Parameters:
+    project_dir -- project directory
+
+    Returns:
+    seed -- project seed, or None if the project has none yet
+    options -- dict of task options, keyed like TASK_OPTIONS
+    """
+    settings = configparser.ConfigParser(interpolation=None)
+    settings.optionxform = str
+    settings.read(os.path.join(project_dir, "battery_settings.ini"))
+
+    seed = settings.get("GeneralSettings", "seed", fallback=None)
+    options = {
+        name: settings.getint(section, key, fallback=default)
+        for name, (section, key, default) in TASK_OPTIONS.items()
+    }
+
+    return seed, options
+
+
+def parse_tasks(text):
+    """Parse a list of tasks.
+
+    Parameters:
+    text -- comma separated task names, as shown in the battery's task list
+        (e.g. "Sternberg Task,Mental Rotation Task"). Case insensitive
+
+    Returns:
+    tasks -- list of task names, as in session.TASKS
+
+    Raises:
+    ValueError -- if a task name is not known or is repeated
+    """
+    names = {task.lower(): task for task in session.TASKS}
+
+    tasks = []
+    for item in text.split(","):
+        item = item.strip()
+        if not item:
+            continue
+        if item.lower() not in names:
+            raise ValueError("Unknown task: %s" % item)
+        tasks.append(names[item.lower()])
+
+    if len(set(tasks)) != len(tasks):
+        raise ValueError("Tasks are repeated")
+
+    return tasks
+
+
+def compile_options(options):
+    """Get the compile_session() options from a project's task options.
+
+    Parameters:
+    options -- dict of task options, keyed like TASK_OPTIONS
+
+    Returns:
+    options -- dict of keyword arguments of session.compile_session()
+    """
+    options = dict(options)
+    options["flanker_blocks"] = options.pop("flanker_blocks_compat") + options.pop(
+        "flanker_blocks_incompat"
+    )
+
+    return options
+
+
+def compile_subject(args):
+    """Compile and check the schedules of one subject.
+
+    Runs in a worker process, so the schedules are returned as the bytes of
+    a schedule file.
+
+    Parameters:
+    args -- (seed, subject number, compile options) tuple, where the options
+        are returned by compile_options()
+
+    Returns:
+    sub_num -- subject number
+    payload -- schedule file bytes, as written by schedule.save()
+    problems -- list of balance problems found in the schedules
+    """
+    seed, sub_num, options = args
+
+    schedules = session.compile_session(seed, sub_num, **options)
+    problems = session.check_session(schedules, **options)
+
+    f = io.BytesIO()
+    schedule.save(f, schedules, options)
+
+    return sub_num, f.getvalue(), problems
+
+
+def position_counts(tasks, orders):
+    """Count how often each task is in each position of the task orders.
+
+    Parameters:
+    tasks -- list of task names
+    orders -- list of task orders
+
+    Returns:
+    counts -- dict of per-position counts, by task
+    """
+    counts = {task: [0] * len(tasks) for task in tasks}
+    for order in orders:
+        for position, task in enumerate(order):
+            counts[task][position] += 1
+
+    return counts
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Compile the trial schedules of a cohort of subjects ahead "
+        "of time, into a single schedule archive in the project directory"
+    )
+    parser.add_argument("project", help="project directory")
+    parser.add_argument(
+        "-s",
+        "--subjects",
+        required=True,
+        help="subject numbers, as a comma separated list of numbers and "
+        'ranges (e.g. "1-200,250")',
+    )
+    parser.add_argument(
+        "-t",
+        "--tasks",
+        help="tasks that will be run, as a comma separated list of the task "
+        "names in the battery's task list. Task orders are counterbalanced "
+        "over these tasks, and sessions must select exactly these tasks to "
+        "use them (default: all tasks)",
+    )
+    parser.add_argument(
+        "--seed", type=int, help="project seed (default: the project's seed)"
+    )
+    parser.add_argument(
+        "-w",
+        "--workers",
+        type=int,
+        help="number of worker processes (default: number of CPUs)",
+    )
+    args = parser.parse_args()
+
+    seed, options = read_settings(args.project)
+    options = compile_options(options)
+    if args.seed is not None:
+        seed = args.seed
+    if seed is None:
+        sys.exit(
+            "Error: project has no seed. Open the project in the battery once, "
+            "or pass --seed"
+        )
+    seed = int(seed)
+
+    subjects = parse_subjects(args.subjects)
+    if len(set(subjects)) != len(subjects):
+        sys.exit("Error: subject numbers are repeated")
+
+    tasks = session.TASKS
+    if args.tasks is not None:
+        try:
+            tasks = parse_tasks(args.tasks)
+        except ValueError as e:
+            sys.exit("Error: %s. Tasks are: %s" % (e, ", ".join(session.TASKS)))
+        if not tasks:
+            sys.exit("Error: no tasks given")
+
+    # Assign counterbalanced task orders to subjects in turn. Orders are only
+    # balanced over the tasks they are built from, so sessions can't run a
+    # different selection of tasks with them
+    orders = schedule.counterbalanced_orders(tasks)
+    subject_orders = [orders[i % len(orders)] for i in range(len(subjects))]
+
+    start = time.time()
+    sessions = []
+    problems = {}
+
+    with ProcessPoolExecutor(max_workers=args.workers) as executor:
+        jobs = [(seed, sub_num, options) for sub_num in subjects]
+        for i, (sub_num, payload, sub_problems) in enumerate(
+            executor.map(compile_subject, jobs, chunksize=16)
+        ):
+            sessions.append((sub_num, subject_orders[i], payload))
+            if sub_problems:
+                problems[sub_num] = sub_problems
+
+    compile_time = time.time() - start
+
+    for sub_num, sub_problems in problems.items():
+        print("Subject %s:" % sub_num)
+        for problem in sub_problems:
+            print("    %s" % problem)
+
+    if problems:
+        sys.exit("Error: %d subjects have unbalanced schedules" % len(problems))
+
+    schedule_path = os.path.join(args.project, "schedules")
+    if not os.path.isdir(schedule_path):
+        os.makedirs(schedule_path)
+
+    archive_file = os.path.join(schedule_path, "schedule_archive.bin")
+    schedule.write_archive(archive_file, seed, sessions, tasks, options)
+
+    print(
+        "Compiled %d subjects in %.2f s (%.1f ms per subject)"
+        % (len(subjects), compile_time, 1000 * compile_time / len(subjects))
+    )
+
+    # Orders only balance fully over a whole number of rotations
+    print("Task positions:")
+    for task, counts in position_counts(tasks, subject_orders).items():
+        print("    %-45s %s" % (task, " ".join("%3d" % x for x in counts)))
+    if len(subjects) % len(orders):
+        print(
+            "Note: %d subjects is not a multiple of %d, so task orders are only "
+            "partly counterbalanced" % (len(subjects), len(orders))
+        )
+
+    print("Wrote %s" % archive_file)
+
+
+if __name__ == "__main__":
+    main()
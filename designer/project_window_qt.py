@@ -20,7 +20,11 @@ class Ui_ProjectWindow(object):
         self.mainProjectLayout.setObjectName("mainProjectLayout")
         self.projectListLayout = QtWidgets.QVBoxLayout()
         self.projectListLayout.setObjectName("projectListLayout")
-        self.projectTree = QtWidgets.QTreeWidget(self.centralwidget)
+        self.projectFilter = QtWidgets.QLineEdit(self.centralwidget)
+        self.projectFilter.setClearButtonEnabled(True)
+        self.projectFilter.setObjectName("projectFilter")
+        self.projectListLayout.addWidget(self.projectFilter)
+        self.projectTree = QtWidgets.QTreeView(self.centralwidget)
         self.projectTree.setAutoFillBackground(False)
         self.projectTree.setFrameShape(QtWidgets.QFrame.StyledPanel)
         self.projectTree.setEditTriggers(QtWidgets.QAbstractItemView.DoubleClicked|QtWidgets.QAbstractItemView.EditKeyPressed|QtWidgets.QAbstractItemView.SelectedClicked)
@@ -28,20 +32,12 @@ class Ui_ProjectWindow(object):
         self.projectTree.setAlternatingRowColors(False)
         self.projectTree.setRootIsDecorated(True)
         self.projectTree.setUniformRowHeights(True)
+        self.projectTree.setSortingEnabled(False)
         self.projectTree.setAnimated(True)
         self.projectTree.setWordWrap(True)
         self.projectTree.setHeaderHidden(True)
         self.projectTree.setObjectName("projectTree")
-        font = QtGui.QFont()
-        font.setPointSize(11)
-        font.setBold(True)
-        font.setUnderline(True)
-        font.setWeight(75)
-        self.projectTree.headerItem().setFont(0, font)
         self.projectTree.header().setVisible(False)
-        self.projectTree.header().setCascadingSectionResizes(False)
-        self.projectTree.header().setHighlightSections(True)
-        self.projectTree.header().setSortIndicatorShown(False)
         self.projectListLayout.addWidget(self.projectTree)
         self.horizontalLayout = QtWidgets.QHBoxLayout()
         self.horizontalLayout.setObjectName("horizontalLayout")
@@ -187,8 +183,8 @@ class Ui_ProjectWindow(object):
     def retranslateUi(self, ProjectWindow):
         _translate = QtCore.QCoreApplication.translate
         ProjectWindow.setWindowTitle(_translate("ProjectWindow", "Project Manager"))
-        self.projectTree.setSortingEnabled(False)
-        self.projectTree.headerItem().setText(0, _translate("ProjectWindow", "Bookmarks"))
+        self.projectFilter.setStatusTip(_translate("ProjectWindow", "Show only projects or researchers containing this text"))
+        self.projectFilter.setPlaceholderText(_translate("ProjectWindow", "Filter projects"))
         self.projectExpandButton.setStatusTip(_translate("ProjectWindow", "Expand all projects in list"))
         self.projectExpandButton.setText(_translate("ProjectWindow", "Expand All"))
         self.projectCollapseButton.setStatusTip(_translate("ProjectWindow", "Collapse all projects in list"))
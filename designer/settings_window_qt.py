@@ -85,6 +85,18 @@ class Ui_SettingsDialog(object):
         self.settings_task_beep_checkbox = QtWidgets.QCheckBox(self.general_page)
         self.settings_task_beep_checkbox.setObjectName("settings_task_beep_checkbox")
         self.settings_general_layout.addWidget(self.settings_task_beep_checkbox)
+        self.settings_output_format = QtWidgets.QHBoxLayout()
+        self.settings_output_format.setObjectName("settings_output_format")
+        self.settings_output_format_label = QtWidgets.QLabel(self.general_page)
+        self.settings_output_format_label.setObjectName("settings_output_format_label")
+        self.settings_output_format.addWidget(self.settings_output_format_label)
+        self.settings_output_format_value = QtWidgets.QComboBox(self.general_page)
+        self.settings_output_format_value.setObjectName("settings_output_format_value")
+        self.settings_output_format_value.addItem("")
+        self.settings_output_format_value.addItem("")
+        self.settings_output_format_value.addItem("")
+        self.settings_output_format.addWidget(self.settings_output_format_value)
+        self.settings_general_layout.addLayout(self.settings_output_format)
         self.verticalLayout_7.addLayout(self.settings_general_layout)
         spacerItem = QtWidgets.QSpacerItem(20, 40, QtWidgets.QSizePolicy.Minimum, QtWidgets.QSizePolicy.Expanding)
         self.verticalLayout_7.addItem(spacerItem)
@@ -234,6 +246,11 @@ class Ui_SettingsDialog(object):
         self.settings_task_height_value.setStatusTip(_translate("SettingsDialog", "Height of the task windows"))
         self.settings_task_beep_checkbox.setToolTip(_translate("SettingsDialog", "Play audible beep at the completion of each task"))
         self.settings_task_beep_checkbox.setText(_translate("SettingsDialog", "Play beep after each task"))
+        self.settings_output_format_label.setText(_translate("SettingsDialog", "Output format:"))
+        self.settings_output_format_value.setToolTip(_translate("SettingsDialog", "File format of the saved task data. Parquet and Feather need pyarrow"))
+        self.settings_output_format_value.setItemText(0, _translate("SettingsDialog", "Excel (.xlsx)"))
+        self.settings_output_format_value.setItemText(1, _translate("SettingsDialog", "Parquet"))
+        self.settings_output_format_value.setItemText(2, _translate("SettingsDialog", "Feather"))
         self.settings_toolbox.setItemText(self.settings_toolbox.indexOf(self.general_page), _translate("SettingsDialog", "General"))
         self.settings_ant_blocks_label.setText(_translate("SettingsDialog", "Number of blocks:"))
         self.settings_ant_blocks_value.setToolTip(_translate("SettingsDialog", "Total number of blocks used in the task"))
@@ -1,15 +1,15 @@
 import os
 import sys
-import random
 import datetime
 import pygame
 import pandas as pd
 
 from PyQt5 import QtCore, QtGui, QtWidgets
-from utils import display, values
+from utils import assets, display, journal, output, registry, schedule, values
 from designer import battery_window_qt
 from interface import about_dialog, update_dialog, settings_window
 from tasks import ant, flanker, mrt, sart, ravens, digitspan_backwards, sternberg
+from tasks import session
 
 
 class BatteryWindow(QtWidgets.QMainWindow, battery_window_qt.Ui_CognitiveBattery):
@@ -72,6 +72,12 @@ class BatteryWindow(QtWidgets.QMainWindow, battery_window_qt.Ui_CognitiveBattery
         if not os.path.isdir(self.dataPath):
             os.makedirs(self.dataPath)
 
+        # Recover the data of sessions that crashed before they were saved
+        self.recover_sessions()
+
+        # Index of the subjects that have run a session
+        self.registry = registry.SubjectRegistry(self.project_dir, self.dataPath)
+
         # Handle menu bar item click events
         self.actionExit.triggered.connect(self.close)
         self.actionSettings.triggered.connect(self.show_settings)
@@ -116,6 +122,13 @@ class BatteryWindow(QtWidgets.QMainWindow, battery_window_qt.Ui_CognitiveBattery
         self.settings.setValue("width", self.settings.value("width", 1280))
         self.settings.setValue("height", self.settings.value("height", 1024))
         self.settings.setValue("taskBeep", self.settings.value("taskBeep", "true"))
+        self.settings.setValue(
+            "seed", self.settings.value("seed", str(schedule.new_seed()))
+        )
+        self.settings.setValue(
+            "outputFormat",
+            self.settings.value("outputFormat", output.default_format()),
+        )
         self.settings.endGroup()
 
         # Settings - Attention Network Test
@@ -265,8 +278,12 @@ class BatteryWindow(QtWidgets.QMainWindow, battery_window_qt.Ui_CognitiveBattery
         else:
             self.task_beep = False
 
+        self.seed = int(self.settings.value("seed"))
+
         self.settings.endGroup()
 
+        self.output_format = self.get_output_format()
+
         # ANT settings
         self.settings.beginGroup("AttentionNetworkTest")
         self.ant_blocks = int(self.settings.value("numBlocks"))
@@ -297,6 +314,116 @@ class BatteryWindow(QtWidgets.QMainWindow, battery_window_qt.Ui_CognitiveBattery
         self.sternberg_blocks = int(self.settings.value("numBlocks"))
         self.settings.endGroup()
 
+    def get_output_format(self):
+        self.settings.beginGroup("GeneralSettings")
+        output_format = str(self.settings.value("outputFormat"))
+        self.settings.endGroup()
+
+        # Fall back to a format that can be written if the format's packages
+        # are not installed (or the format is no longer supported)
+        if output_format not in output.available_formats():
+            fallback = output.default_format()
+            print(
+                "- Output format %s is not available, using %s"
+                % (output_format, fallback)
+            )
+            output_format = fallback
+
+        return output_format
+
+    def recover_sessions(self):
+        output_format = self.get_output_format()
+
+        # A journal is left behind if its session did not finish. Journals
+        # that are locked belong to sessions still running on other stations
+        for file_name in sorted(os.listdir(self.dataPath)):
+            base_name, ext = os.path.splitext(file_name)
+            if ext != ".journal":
+                continue
+
+            journal_file = os.path.join(self.dataPath, file_name)
+            output_path = output.session_path(self.dataPath, base_name, output_format)
+
+            lock = journal.Lock(journal_file)
+            if not lock.acquire():
+                continue
+
+            try:
+                # The session may have been saved since the directory was read
+                if os.path.isfile(journal_file):
+                    journal.compact(journal_file, output_path, output_format)
+                    os.remove(journal_file)
+                    print("- Recovered incomplete session: %s" % output_path)
+            except Exception as e:
+                print("- Could not recover session %s: %s" % (journal_file, e))
+            finally:
+                lock.release()
+
+    def get_schedule_options(self):
+        # Task options the trial schedules are compiled with, as passed to
+        # session.compile_session()
+        return {
+            "ant_blocks": self.ant_blocks,
+            "flanker_sets_practice": self.flanker_sets_practice,
+            "flanker_sets_main": self.flanker_sets_main,
+            "flanker_blocks": self.flanker_blocks_compat + self.flanker_blocks_incompat,
+            "sternberg_blocks": self.sternberg_blocks,
+        }
+
+    def get_archive(self):
+        # Schedule archive of the cohort, compiled by compile_schedules.py
+        archive_file = os.path.join(
+            self.project_dir, "schedules", "schedule_archive.bin"
+        )
+
+        if not os.path.isfile(archive_file):
+            return None
+
+        archive = schedule.ScheduleArchive(archive_file)
+
+        # Ignore archives compiled with a different seed
+        if archive.seed != self.seed:
+            archive.close()
+            return None
+
+        # Ignore archives compiled before the task settings were changed
+        if archive.options != self.get_schedule_options():
+            print(
+                "- Schedule archive was compiled with other task settings, "
+                "not using it"
+            )
+            archive.close()
+            return None
+
+        return archive
+
+    def get_schedules(self, sub_num):
+        schedule_path = os.path.join(self.project_dir, "schedules")
+        schedule_file = os.path.join(schedule_path, "%s.npz" % sub_num)
+        options = self.get_schedule_options()
+
+        # Use schedules compiled ahead of time, if there are any and they
+        # were compiled with the current task settings
+        if (
+            os.path.isfile(schedule_file)
+            and schedule.load_options(schedule_file) == options
+        ):
+            return schedule.load(schedule_file)
+
+        archive = self.get_archive()
+        if archive is not None:
+            with archive:
+                if sub_num in archive:
+                    return archive.load(sub_num)
+
+        schedules = session.compile_session(self.seed, sub_num, **options)
+
+        if not os.path.isdir(schedule_path):
+            os.makedirs(schedule_path)
+        schedule.save(schedule_file, schedules, options)
+
+        return schedules
+
     # Override the closeEvent method
     def closeEvent(self, event):
         # Save window size and position
@@ -329,10 +456,36 @@ class BatteryWindow(QtWidgets.QMainWindow, battery_window_qt.Ui_CognitiveBattery
                 # Add selected task to task list
                 selected_tasks.append(str(self.taskList.item(index).text()))
 
+        # Get most recent task settings from file
+        self.get_settings()
+
         # Check to see if a random order is desired
-        # If so, shuffle tasks
+        # If so, use the subject's counterbalanced order if the cohort was
+        # compiled ahead of time. Otherwise, shuffle tasks using the subject's
+        # own random stream
         if self.random_order_selected():
-            random.shuffle(selected_tasks)
+            archive_tasks = archive_order = None
+            archive = self.get_archive()
+            if archive is not None:
+                with archive:
+                    if sub_num in archive:
+                        archive_tasks = archive.tasks
+                        archive_order = archive.task_order(sub_num)
+
+            if archive_order is not None:
+                # Orders are only counterbalanced over the compiled tasks
+                if sorted(archive_tasks) != sorted(selected_tasks):
+                    self.error_dialog(
+                        "The schedule archive's task orders are for these "
+                        "tasks:\n\n%s\n\nSelect exactly these tasks, or "
+                        "compile the schedules again with the selected tasks"
+                        % "\n".join(archive_tasks)
+                    )
+                    return
+
+                selected_tasks = archive_order
+            else:
+                selected_tasks = schedule.task_order(self.seed, sub_num, selected_tasks)
 
         # Check for required inputs
         if not selected_tasks:
@@ -359,6 +512,7 @@ class BatteryWindow(QtWidgets.QMainWindow, battery_window_qt.Ui_CognitiveBattery
                         str(sex),
                         str(ra),
                         ", ".join(selected_tasks),
+                        str(self.seed),
                     )
                 ],
                 columns=[
@@ -369,27 +523,34 @@ class BatteryWindow(QtWidgets.QMainWindow, battery_window_qt.Ui_CognitiveBattery
                     "sex",
                     "RA",
                     "tasks",
+                    "seed",
                 ],
             )
 
-            # Check if subject number already exists
-            existing_subs = [x.split("_")[0] for x in os.listdir(self.dataPath)]
-            if sub_num in existing_subs:
+            data_file_name = "%s_%s" % (sub_num, condition)
+            output_path = output.session_path(
+                self.dataPath, data_file_name, self.output_format
+            )
+
+            # Register the subject, if the subject number does not exist yet
+            if not self.registry.register(
+                sub_num, condition, output_path, selected_tasks
+            ):
                 self.error_dialog("Subject number already exists")
             else:
-                # Create the excel writer object and save the file
-                data_file_name = "%s_%s.xls" % (sub_num, condition)
-                output_file = os.path.join(self.dataPath, data_file_name)
-                writer = pd.ExcelWriter(output_file)
-                subject_info.to_excel(writer, "info", index=False)
-                writer.save()
+                # Journal the session's data as it is recorded. The journal is
+                # compacted into the session's data at the end of the session
+                journal_file = os.path.join(self.dataPath, data_file_name + ".journal")
+                session_journal = journal.start(journal_file)
+                session_journal.table("info", subject_info)
+
+                # Load the subject's trial schedules. If they were not
+                # compiled ahead of time, compile and save them now
+                schedules = self.get_schedules(sub_num)
 
                 # Minimize battery UI
                 self.showMinimized()
 
-                # Get most recent task settings from file
-                self.get_settings()
-
                 # Center all pygame windows if not fullscreen
                 if not self.task_fullscreen:
                     pos_x = self.res_width // 2 - self.task_width // 2
@@ -434,25 +595,31 @@ class BatteryWindow(QtWidgets.QMainWindow, battery_window_qt.Ui_CognitiveBattery
 
                 # Run each task
                 # Return and save their output to dataframe/excel
+                completed_tasks = []
                 for task in selected_tasks:
                     if task == "Attention Network Test (ANT)":
                         # Set number of blocks for ANT
                         ant_task = ant.ANT(
-                            self.pygame_screen, background, blocks=self.ant_blocks
+                            self.pygame_screen,
+                            background,
+                            blocks=self.ant_blocks,
+                            schedule=schedules["ANT"],
                         )
                         # Run ANT
                         ant_data = ant_task.run()
-                        # Save ANT data to excel
-                        ant_data.to_excel(writer, "ANT", index=False)
+                        # Save ANT data to the journal
+                        session_journal.table("ANT", ant_data)
                     elif task == "Digit Span (backwards)":
                         digitspan_backwards_task = digitspan_backwards.DigitspanBackwards(
-                            self.pygame_screen, background
+                            self.pygame_screen,
+                            background,
+                            schedule=schedules["Digit span (backwards)"],
                         )
                         # Run Digit span (Backwards)
                         digitspan_backwards_data = digitspan_backwards_task.run()
-                        # Save digit span (backwards) data to excel
-                        digitspan_backwards_data.to_excel(
-                            writer, "Digit span (backwards)", index=False
+                        # Save digit span (backwards) data to the journal
+                        session_journal.table(
+                            "Digit span (backwards)", digitspan_backwards_data
                         )
                     elif task == "Eriksen Flanker Task":
                         flanker_task = flanker.Flanker(
@@ -464,17 +631,18 @@ class BatteryWindow(QtWidgets.QMainWindow, battery_window_qt.Ui_CognitiveBattery
                             self.flanker_blocks_compat,
                             self.flanker_blocks_incompat,
                             self.flanker_block_order,
+                            schedule=schedules["Eriksen Flanker"],
                         )
                         # Run Eriksen Flanker
                         flanker_data = flanker_task.run()
-                        # Save flanker data to excel
-                        flanker_data.to_excel(writer, "Eriksen Flanker", index=False)
+                        # Save flanker data to the journal
+                        session_journal.table("Eriksen Flanker", flanker_data)
                     elif task == "Mental Rotation Task":
                         mrt_task = mrt.MRT(self.pygame_screen, background)
                         # Run MRT
                         mrt_data = mrt_task.run()
-                        # Save MRT data to excel
-                        mrt_data.to_excel(writer, "MRT", index=False)
+                        # Save MRT data to the journal
+                        session_journal.table("MRT", mrt_data)
                     elif task == "Raven's Progressive Matrices":
                         ravens_task = ravens.Ravens(
                             self.pygame_screen,
@@ -484,29 +652,38 @@ class BatteryWindow(QtWidgets.QMainWindow, battery_window_qt.Ui_CognitiveBattery
                         )
                         # Run Raven's Matrices
                         ravens_data = ravens_task.run()
-                        # Save ravens data to excel
-                        ravens_data.to_excel(writer, "Ravens Matrices", index=False)
+                        # Save ravens data to the journal
+                        session_journal.table("Ravens Matrices", ravens_data)
                     elif task == "Sternberg Task":
                         sternberg_task = sternberg.Sternberg(
-                            self.pygame_screen, background, blocks=self.sternberg_blocks
+                            self.pygame_screen,
+                            background,
+                            blocks=self.sternberg_blocks,
+                            schedule=schedules["Sternberg"],
                         )
                         # Run Sternberg Task
                         sternberg_data = sternberg_task.run()
-                        # Save sternberg data to excel
-                        sternberg_data.to_excel(writer, "Sternberg", index=False)
+                        # Save sternberg data to the journal
+                        session_journal.table("Sternberg", sternberg_data)
                     elif task == "Sustained Attention to Response Task (SART)":
-                        sart_task = sart.SART(self.pygame_screen, background)
+                        sart_task = sart.SART(
+                            self.pygame_screen, background, schedule=schedules["SART"]
+                        )
                         # Run SART
                         sart_data = sart_task.run()
-                        # Save SART data to excel
-                        sart_data.to_excel(writer, "SART", index=False)
+                        # Save SART data to the journal
+                        session_journal.table("SART", sart_data)
+
+                    completed_tasks.append(task)
 
                     # Play beep after each task
                     if self.task_beep:
                         beep_sound.play()
 
-                    # Save excel file
-                    writer.save()
+                    # Data is saved in the background while the next task
+                    # runs. Stop the session if it could not be saved
+                    if session_journal.error is not None:
+                        break
 
                 # End of experiment screen
                 pygame.display.set_caption("Cognitive Battery")
@@ -524,8 +701,36 @@ class BatteryWindow(QtWidgets.QMainWindow, battery_window_qt.Ui_CognitiveBattery
 
                 display.wait_for_space()
 
+                # Save the session's data in the output format, once all of
+                # it has been written to the journal
+                save_error = journal.stop()
+                if save_error is None:
+                    try:
+                        journal.compact(journal_file, output_path, self.output_format)
+                        os.remove(journal_file)
+                    except Exception as e:
+                        save_error = e
+                session_journal.release()
+
+                self.registry.set_completed(sub_num, completed_tasks)
+
+                # Release cached images and text before the display is closed
+                print("- Images: " + assets.manager.summary())
+                print(
+                    "- Text cache: %d hits, %d misses"
+                    % (display.text_cache.hits, display.text_cache.misses)
+                )
+                assets.manager.clear()
+                display.text_cache.clear()
+
                 # Quit pygame
                 pygame.quit()
 
+                if save_error is not None:
+                    self.error_dialog(
+                        "Data could not be saved: %s\n\n"
+                        "Data recorded so far is in %s" % (save_error, journal_file)
+                    )
+
                 print("--- Experiment complete")
                 self.close()
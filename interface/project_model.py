@@ -0,0 +1,210 @@
+import bisect
+
+from PyQt5 import QtCore, QtGui
+from utils import projects
+
+
+class ProjectNode(object):
+    # A researcher (child of the root) or project (child of a researcher)
+    def __init__(self, name, parent=None):
+        self.name = name
+        self.parent = parent
+
+        # Children are loaded the first time they are needed
+        self.children = None
+
+    def row(self):
+        return self.parent.children.index(self)
+
+    def child_keys(self):
+        return [projects.sort_key(x.name) for x in self.children]
+
+
+class ProjectModel(QtCore.QAbstractItemModel):
+    """Tree of researchers and their projects, read from a project store.
+
+    Only the researchers are read up front. A researcher's projects are read
+    when the researcher is first expanded, so the work done depends on what
+    is shown rather than on the number of projects. Projects are added and
+    removed with add_project() and remove_project(), which only update the
+    affected rows.
+    """
+
+    def __init__(self, project_store, parent=None):
+        super(ProjectModel, self).__init__(parent)
+
+        self.project_store = project_store
+        self.text = None
+        self.root = ProjectNode(None)
+        self.load()
+
+    def load(self):
+        # Read the researchers that match the filter. Projects are not read
+        self.root.children = [
+            ProjectNode(x, self.root) for x in self.project_store.researchers(self.text)
+        ]
+
+    def set_filter(self, text):
+        """Only show projects whose name, or researcher's name, has a text.
+
+        Parameters:
+        text -- text to filter by (case insensitive). Empty to show all
+        """
+        self.beginResetModel()
+        self.text = text or None
+        self.load()
+        self.endResetModel()
+
+    def node(self, index):
+        if index.isValid():
+            return index.internalPointer()
+        return self.root
+
+    def index(self, row, column, parent=QtCore.QModelIndex()):
+        if not self.hasIndex(row, column, parent):
+            return QtCore.QModelIndex()
+
+        return self.createIndex(row, column, self.node(parent).children[row])
+
+    def parent(self, index):
+        if not index.isValid():
+            return QtCore.QModelIndex()
+
+        parent = index.internalPointer().parent
+        if parent is self.root:
+            return QtCore.QModelIndex()
+
+        return self.createIndex(parent.row(), 0, parent)
+
+    def rowCount(self, parent=QtCore.QModelIndex()):
+        node = self.node(parent)
+        if node.children is None:
+            return 0
+        return len(node.children)
+
+    def columnCount(self, parent=QtCore.QModelIndex()):
+        return 1
+
+    def hasChildren(self, parent=QtCore.QModelIndex()):
+        # Researchers always have projects, even before they are read
+        node = self.node(parent)
+        return node is self.root or node.parent is self.root
+
+    def canFetchMore(self, parent):
+        node = self.node(parent)
+        return node.parent is self.root and node.children is None
+
+    def fetchMore(self, parent):
+        if not self.canFetchMore(parent):
+            return
+
+        node = self.node(parent)
+        projects = self.project_store.projects(node.name, self.text)
+
+        # Projects can be deleted by another station after the researcher
+        # was read
+        if not projects:
+            node.children = []
+            return
+
+        self.beginInsertRows(parent, 0, len(projects) - 1)
+        node.children = [ProjectNode(name, node) for researcher, name in projects]
+        self.endInsertRows()
+
+    def data(self, index, role=QtCore.Qt.DisplayRole):
+        if not index.isValid():
+            return None
+
+        node = index.internalPointer()
+        if role == QtCore.Qt.DisplayRole:
+            return node.name
+        elif role == QtCore.Qt.FontRole and node.parent is self.root:
+            # Researcher names are bold
+            font = QtGui.QFont()
+            font.setBold(True)
+            return font
+
+        return None
+
+    def matches(self, researcher, project):
+        if self.text is None:
+            return True
+
+        text = self.text.lower()
+        return text in researcher.lower() or text in project.lower()
+
+    def researcher_node(self, researcher):
+        # Get a researcher's node and row, or None and the row to insert it at
+        keys = self.root.child_keys()
+        row = bisect.bisect_left(keys, projects.sort_key(researcher))
+
+        if row < len(keys) and self.root.children[row].name == researcher:
+            return self.root.children[row], row
+        return None, row
+
+    def add_project(self, researcher, project):
+        """Show a project that was added to the project store.
+
+        Parameters:
+        researcher -- name of the project's researcher
+        project -- project name
+        """
+        if not self.matches(researcher, project):
+            return
+
+        node, row = self.researcher_node(researcher)
+
+        # New researcher. Their projects are read when they are expanded
+        if node is None:
+            self.beginInsertRows(QtCore.QModelIndex(), row, row)
+            self.root.children.insert(row, ProjectNode(researcher, self.root))
+            self.endInsertRows()
+            return
+
+        if node.children is None:
+            return
+
+        child_row = bisect.bisect_left(node.child_keys(), projects.sort_key(project))
+        self.beginInsertRows(self.createIndex(row, 0, node), child_row, child_row)
+        node.children.insert(child_row, ProjectNode(project, node))
+        self.endInsertRows()
+
+    def remove_project(self, researcher, project):
+        """Stop showing a project that was deleted from the project store.
+
+        Parameters:
+        researcher -- name of the project's researcher
+        project -- project name
+        """
+        node, row = self.researcher_node(researcher)
+        if node is None:
+            return
+
+        # Researchers without projects (left) are not shown
+        if not self.project_store.projects(researcher, self.text):
+            self.beginRemoveRows(QtCore.QModelIndex(), row, row)
+            del self.root.children[row]
+            self.endRemoveRows()
+            return
+
+        if node.children is None:
+            return
+
+        names = [x.name for x in node.children]
+        if project in names:
+            child_row = names.index(project)
+            self.beginRemoveRows(self.createIndex(row, 0, node), child_row, child_row)
+            del node.children[child_row]
+            self.endRemoveRows()
+
+    def project(self, index):
+        """Get the researcher and project name of an index.
+
+        Returns:
+        researcher, project -- names, or None for a researcher's index
+        """
+        node = self.node(index)
+        if node is self.root or node.parent is self.root:
+            return None
+
+        return node.parent.name, node.name
@@ -1,13 +1,14 @@
 import os
-import json
-import time
 
 from PyQt5 import QtCore, QtGui, QtWidgets
 from designer import project_new_window_qt
 
 
 class NewProjectWindow(QtWidgets.QDialog, project_new_window_qt.Ui_NewProjectWindow):
-    def __init__(self, base_dir, project_list):
+    # Emitted with the researcher and project name when a project is created
+    project_created = QtCore.pyqtSignal(str, str)
+
+    def __init__(self, base_dir, project_store):
         super(NewProjectWindow, self).__init__()
 
         # Setup the main window UI
@@ -22,7 +23,7 @@ class NewProjectWindow(QtWidgets.QDialog, project_new_window_qt.Ui_NewProjectWin
         # Remove the help / whats this button from title bar
         self.setWindowFlags(self.windowFlags() ^ QtCore.Qt.WindowContextHelpButtonHint)
 
-        self.project_list = project_list
+        self.project_store = project_store
         self.base_dir = base_dir
 
         # Set input validators
@@ -49,26 +50,9 @@ class NewProjectWindow(QtWidgets.QDialog, project_new_window_qt.Ui_NewProjectWin
         # Check all fields have been filled
         if project_name != "" and researcher != "" and dir_path != "":
 
-            # Get list of all project names
-            saved_projects = []
-            for person in self.project_list.keys():
-                for project in self.project_list[person].keys():
-                    saved_projects.append(project)
-
             # Save if project name is not already in use
-            if project_name not in set(saved_projects):
-
-                project_info = {"created": time.time(), "path": dir_path}
-
-                try:
-                    self.project_list[researcher][project_name] = project_info
-                except KeyError:
-                    self.project_list[researcher] = {}
-                    self.project_list[researcher][project_name] = project_info
-
-                with open(os.path.join(self.base_dir, "projects.txt"), "w+") as f:
-                    json.dump(self.project_list, f, indent=4)
-
+            if self.project_store.add(researcher, project_name, dir_path):
+                self.project_created.emit(researcher, project_name)
                 self.close()
             else:
                 QtWidgets.QMessageBox.warning(
@@ -1,11 +1,11 @@
 import os
-import json
 from datetime import datetime
 
 from PyQt5 import QtCore, QtGui, QtWidgets
 from designer import project_window_qt
 from interface import about_dialog, battery_window, project_new_window, update_dialog
-from utils import values
+from interface import project_model
+from utils import projects, values
 
 
 class ProjectWindow(QtWidgets.QMainWindow, project_window_qt.Ui_ProjectWindow):
@@ -39,12 +39,11 @@ class ProjectWindow(QtWidgets.QMainWindow, project_window_qt.Ui_ProjectWindow):
         # Define URLs
         self.links = values.get_links()
 
-        # Check if project file exists
-        if not os.path.isfile(os.path.join(self.base_dir, "projects.txt")):
-            self.project_list = {}
-            self.save_projects(self.project_list)
-        else:
-            self.project_list = self.refresh_projects()
+        # Open the project list, and show its projects
+        self.project_store = projects.ProjectStore(self.base_dir)
+        self.project_model = project_model.ProjectModel(self.project_store, self)
+        self.projectTree.setModel(self.project_model)
+        self.clear_project_info()
 
         # Make info labels invisible at start
         self.researcherLabel.hide()
@@ -70,14 +69,17 @@ class ProjectWindow(QtWidgets.QMainWindow, project_window_qt.Ui_ProjectWindow):
         self.deleteButton.clicked.connect(self.delete_project)
 
         # Project tree click event
-        self.projectTree.itemClicked.connect(self.project_click)
+        self.projectTree.clicked.connect(self.project_click)
+
+        # Project filter box
+        self.projectFilter.textChanged.connect(self.filter_projects)
 
     def new_project(self):
         self.new_project_window = project_new_window.NewProjectWindow(
-            self.base_dir, self.project_list
+            self.base_dir, self.project_store
         )
+        self.new_project_window.project_created.connect(self.project_model.add_project)
         self.new_project_window.exec_()
-        self.refresh_projects()
 
     # Open web browser to the documentation page
     def show_documentation(self):
@@ -127,16 +129,30 @@ class ProjectWindow(QtWidgets.QMainWindow, project_window_qt.Ui_ProjectWindow):
             self.update.activateWindow()
             self.update.raise_()
 
-    def project_click(self, item):
-        if item.parent():
-            researcher = item.parent().text(0)
-            project_name = item.text(0)
+    def filter_projects(self, text):
+        self.project_model.set_filter(text)
+        self.clear_project_info()
+
+        # Show the matching projects of every matching researcher
+        if text:
+            self.projectTree.expandAll()
+
+    def project_click(self, index):
+        if self.project_model.project(index) is not None:
+            researcher, project_name = self.project_model.project(index)
+
+            project = self.project_store.get(project_name)
 
-            created_unix = self.project_list[researcher][project_name]["created"]
-            created_time = datetime.fromtimestamp(created_unix).strftime(
+            # Project was deleted by another station
+            if project is None:
+                self.project_model.remove_project(researcher, project_name)
+                self.clear_project_info()
+                return
+
+            created_time = datetime.fromtimestamp(project["created"]).strftime(
                 "%d/%m/%Y @ %H:%M"
             )
-            project_path = self.project_list[researcher][project_name]["path"]
+            project_path = project["path"]
 
             self.projectName.setText(project_name)
             self.researcherValue.setText(researcher)
@@ -168,57 +184,17 @@ class ProjectWindow(QtWidgets.QMainWindow, project_window_qt.Ui_ProjectWindow):
             self.close()
 
     def delete_project(self):
-        # Check which project has been selected
+        # Delete selected project. Researchers without projects are not listed
         researcher = self.researcherValue.text()
         project = self.projectName.text()
 
-        # Check number of projects for this researcher before delete
-        num_projects = len(self.project_list[researcher].keys())
-
-        # Delete selected project
-        self.project_list[researcher].pop(project, None)
-
-        # If this was the only project, remove the researcher too
-        if num_projects == 1:
-            self.project_list.pop(researcher, None)
-
-        # Save file and refresh project list
-        self.save_projects(self.project_list)
-        self.refresh_projects()
+        self.project_store.delete(project)
 
-    def save_projects(self, projects):
-        # Save current project list to file
-        with open(os.path.join(self.base_dir, "projects.txt"), "w+") as f:
-            json.dump(projects, f, indent=4)
-
-    def refresh_projects(self):
-        # Load most recent saved project list from file
-        with open(os.path.join(self.base_dir, "projects.txt"), "r") as f:
-            projects = json.load(f)
-
-        # Clear existing tree widget
-        self.projectTree.clear()
-
-        # Get all researcher names
-        all_researchers = sorted(projects.keys(), key=lambda x: x.lower())
-
-        for person in all_researchers:
-            # Add researcher root node
-            personItem = QtWidgets.QTreeWidgetItem([person])
-            font = personItem.font(0)
-            font.setBold(True)
-            personItem.setFont(0, font)
-            self.projectTree.addTopLevelItem(personItem)
-
-            # Add project name for each researcher
-            all_projects = sorted(projects[person].keys(), key=lambda x: x.lower())
-
-            for project in all_projects:
-                projectItem = QtWidgets.QTreeWidgetItem([project])
-                personItem.addChild(projectItem)
-
-        self.projectTree.expandAll()
+        # Remove the project from the project list
+        self.project_model.remove_project(researcher, project)
+        self.clear_project_info()
 
+    def clear_project_info(self):
         self.projectName.setText("")
         self.researcherValue.setText("")
         self.createdValue.setText("")
@@ -231,5 +207,3 @@ class ProjectWindow(QtWidgets.QMainWindow, project_window_qt.Ui_ProjectWindow):
         self.dirLabel.hide()
         self.openButton.setEnabled(False)
         self.deleteButton.setEnabled(False)
-
-        return projects
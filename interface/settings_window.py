@@ -1,5 +1,6 @@
 from PyQt5 import QtCore, QtGui, QtWidgets
 from designer import settings_window_qt
+from utils import output
 
 
 class SettingsWindow(QtWidgets.QDialog, settings_window_qt.Ui_SettingsDialog):
@@ -44,6 +45,8 @@ class SettingsWindow(QtWidgets.QDialog, settings_window_qt.Ui_SettingsDialog):
         else:
             self.task_beep = False
 
+        self.output_format = str(self.settings.value("outputFormat"))
+
         self.settings.endGroup()
 
         # Set task window values
@@ -59,6 +62,13 @@ class SettingsWindow(QtWidgets.QDialog, settings_window_qt.Ui_SettingsDialog):
         # Set task beep check state
         self.settings_task_beep_checkbox.setChecked(self.task_beep)
 
+        # Set output format. Combo box items are in the order of output.FORMATS
+        if self.output_format not in output.FORMATS:
+            self.output_format = output.default_format()
+        self.settings_output_format_value.setCurrentIndex(
+            output.FORMATS.index(self.output_format)
+        )
+
         # Set state of the windowed mode options (e.g. borderless, size)
         self.set_windowed_options_state(not self.task_fullscreen)
 
@@ -164,6 +174,20 @@ class SettingsWindow(QtWidgets.QDialog, settings_window_qt.Ui_SettingsDialog):
                 "Too many images for Ravens task. "
                 "Start with an earlier image, or use fewer trials",
             )
+        elif (
+            output.FORMATS[self.settings_output_format_value.currentIndex()]
+            not in output.available_formats()
+        ):
+            output_format = output.FORMATS[
+                self.settings_output_format_value.currentIndex()
+            ]
+            QtWidgets.QMessageBox.warning(
+                self,
+                "Output Format Error",
+                "Saving %s files needs the %s package. Install it, or choose "
+                "another format"
+                % (output_format, output.FORMAT_PACKAGES[output_format]),
+            )
         else:
             # General settings
             self.settings.beginGroup("GeneralSettings")
@@ -186,6 +210,12 @@ class SettingsWindow(QtWidgets.QDialog, settings_window_qt.Ui_SettingsDialog):
             self.settings.setValue(
                 "taskBeep", str(self.settings_task_beep_checkbox.isChecked()).lower()
             )
+
+            # Output format setting
+            self.settings.setValue(
+                "outputFormat",
+                output.FORMATS[self.settings_output_format_value.currentIndex()],
+            )
             self.settings.endGroup()
 
             # ANT settings
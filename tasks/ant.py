@@ -1,17 +1,69 @@
 import os
 import sys
-import time
 import pandas as pd
 import numpy as np
 import pygame
 
 from pygame.locals import *
 from itertools import product
-from utils import display
+from utils import assets, clock, display, recorder, scheduler
+
+# Specify factor levels, and task timings as used by Fan et al. (2002).
+CONGRUENCY_LEVELS = ("congruent", "incongruent", "neutral")
+CUE_LEVELS = ("nocue", "center", "spatial", "double")
+LOCATION_LEVELS = ("top", "bottom")
+DIRECTION_LEVELS = ("left", "right")
+FIXATION_DURATION_RANGE = (400, 1600)  # Range of fixation times
+
+# Create level combinations
+# Level combinations give us 48 trials.
+COMBINATIONS = list(
+    product(CONGRUENCY_LEVELS, CUE_LEVELS, LOCATION_LEVELS, DIRECTION_LEVELS)
+)
+
+
+def create_block(rng, block_num, trial_type):
+    if trial_type == "main":
+        order = rng.permutation(np.tile(np.arange(len(COMBINATIONS)), 2))
+    else:
+        order = rng.permutation(len(COMBINATIONS))[: len(COMBINATIONS) // 2]
+
+    # Add combinations to dataframe
+    cur_block = pd.DataFrame(
+        data=[COMBINATIONS[i] for i in order],
+        columns=("congruency", "cue", "location", "direction"),
+    )
+
+    # Add timing info to dataframe
+    cur_block["block"] = block_num + 1
+    cur_block["fixationTime"] = rng.integers(
+        FIXATION_DURATION_RANGE[0], FIXATION_DURATION_RANGE[1], len(order)
+    )
+
+    return cur_block
+
+
+def create_schedule(rng, blocks=3):
+    """Generate the trials of an ANT session.
+
+    Parameters:
+    rng -- numpy random Generator used for all random draws
+    blocks -- number of main blocks
+
+    Returns:
+    schedule -- dict with "practice" and "main" dataframes of trials, with
+        the block number of each trial
+    """
+    practice = create_block(rng, 0, "practice")
+    main = pd.concat(
+        [create_block(rng, i, "main") for i in range(blocks)], ignore_index=True
+    )
+
+    return {"practice": practice, "main": main}
 
 
 class ANT(object):
-    def __init__(self, screen, background, blocks=3):
+    def __init__(self, screen, background, blocks=3, schedule=None, seed=None):
         # Get the pygame display window
         self.screen = screen
         self.background = background
@@ -28,9 +80,13 @@ class ANT(object):
         pygame.display.set_caption("Attention Network Test")
         pygame.mouse.set_visible(0)
 
+        # Trials are generated here, unless a precompiled schedule is given
+        if schedule is None:
+            schedule = create_schedule(np.random.default_rng(seed), blocks)
+        self.schedule = schedule
+
         # Experiment options
-        self.NUM_BLOCKS = blocks
-        self.FIXATION_DURATION_RANGE = (400, 1600)  # Range of fixation times
+        self.NUM_BLOCKS = self.schedule["main"]["block"].nunique()
         self.CUE_DURATION = 100
         self.PRE_STIM_FIXATION_DURATION = 400
         self.TARGET_OFFSET = 31  # Stimulus vertical offset
@@ -38,232 +94,189 @@ class ANT(object):
         self.FEEDBACK_DURATION = 1000
         self.ITI_MAX = 3500
 
-        # Specify factor levels, and task timings as used by Fan et al. (2002).
-        self.CONGRUENCY_LEVELS = ("congruent", "incongruent", "neutral")
-        self.CUE_LEVELS = ("nocue", "center", "spatial", "double")
-        self.LOCATION_LEVELS = ("top", "bottom")
-        self.DIRECTION_LEVELS = ("left", "right")
-
-        # Create level combinations
-        # Level combinations give us 48 trials.
-        self.combinations = list(
-            product(
-                self.CONGRUENCY_LEVELS,
-                self.CUE_LEVELS,
-                self.LOCATION_LEVELS,
-                self.DIRECTION_LEVELS,
-            )
+        # Each trial lasts a fixed time, from fixation onset to the next trial
+        self.TRIAL_DURATION = (
+            self.CUE_DURATION + self.PRE_STIM_FIXATION_DURATION + self.ITI_MAX
         )
 
         # Get images
         self.base_dir = os.path.dirname(os.path.realpath(__file__))
         self.image_path = os.path.join(self.base_dir, "images", "ANT")
 
-        self.img_left_congruent = pygame.image.load(
-            os.path.join(self.image_path, "left_congruent.png")
-        )
-        self.img_left_incongruent = pygame.image.load(
-            os.path.join(self.image_path, "left_incongruent.png")
+        self.img_left_congruent = assets.image(self.image_path, "left_congruent.png")
+        self.img_left_incongruent = assets.image(
+            self.image_path, "left_incongruent.png"
         )
-        self.img_right_congruent = pygame.image.load(
-            os.path.join(self.image_path, "right_congruent.png")
-        )
-        self.img_right_incongruent = pygame.image.load(
-            os.path.join(self.image_path, "right_incongruent.png")
-        )
-        self.img_left_neutral = pygame.image.load(
-            os.path.join(self.image_path, "left_neutral.png")
-        )
-        self.img_right_neutral = pygame.image.load(
-            os.path.join(self.image_path, "right_neutral.png")
+        self.img_right_congruent = assets.image(self.image_path, "right_congruent.png")
+        self.img_right_incongruent = assets.image(
+            self.image_path, "right_incongruent.png"
         )
+        self.img_left_neutral = assets.image(self.image_path, "left_neutral.png")
+        self.img_right_neutral = assets.image(self.image_path, "right_neutral.png")
 
-        self.img_fixation = pygame.image.load(
-            os.path.join(self.image_path, "fixation.png")
-        )
-        self.img_cue = pygame.image.load(os.path.join(self.image_path, "cue.png"))
+        self.img_fixation = assets.image(self.image_path, "fixation.png")
+        self.img_cue = assets.image(self.image_path, "cue.png")
 
         # Get image dimensions
         self.flanker_h = self.img_left_incongruent.get_rect().height
         self.fixation_h = self.img_fixation.get_rect().height
 
+        # Compose the full screen frame of every trial phase, so showing a
+        # phase is a single blit
+        self.compose_frames()
+
+        # Trial phases, in the order they are shown. Feedback is only shown
+        # in practice trials, so its onsets are not saved
+        self.PHASES = ["fixation", "cue", "preStim", "target", "feedback", "ITI"]
+        self.SAVED_PHASES = [x for x in self.PHASES if x != "feedback"]
+
+        # Results recorded during each trial, as (column, dtype, default).
+        # Onsets are in ms from the start of the block
+        self.RESULT_FIELDS = [
+            ("response", "O", "NA"),
+            ("correct", "int64", 0),
+            ("RT", "int64", 0),
+            ("pollInterval", "float64", np.nan),
+            ("ITI", "float64", np.nan),
+        ] + scheduler.onset_fields(self.PHASES)
+
+        # Trial phases are shown at fixed onsets from the start of each block
+        self.scheduler = scheduler.Scheduler()
+
         # Create output dataframe
         self.all_data = pd.DataFrame()
 
-    def create_block(self, block_num, combinations, trial_type):
-        if trial_type == "main":
-            cur_combinations = combinations * 2
-            np.random.shuffle(cur_combinations)
-        else:
-            np.random.shuffle(combinations)
-            cur_combinations = combinations[: len(combinations) // 2]
-
-        # Add combinations to dataframe
-        cur_block = pd.DataFrame(
-            data=cur_combinations,
-            columns=("congruency", "cue", "location", "direction"),
+    def compose(self, *images):
+        # Draw images, given as (image, y) pairs, centered on a background copy
+        frame = self.background.copy()
+        for img, y in images:
+            display.image(frame, img, "center", y)
+
+        return frame
+
+    def compose_frames(self):
+        # Vertical positions of cues and flankers above/below fixation
+        cue_y = {
+            "top": self.screen_y / 2 - self.fixation_h - self.TARGET_OFFSET,
+            "bottom": self.screen_y / 2 + self.TARGET_OFFSET,
+        }
+        flanker_y = {
+            "top": self.screen_y / 2 - self.flanker_h - self.TARGET_OFFSET,
+            "bottom": self.screen_y / 2 + self.TARGET_OFFSET,
+        }
+
+        fixation = (self.img_fixation, "center")
+        self.fixation_frame = self.compose(fixation)
+
+        # Cue frames, by cue type and target location. Only the spatial cue
+        # depends on location, so the other frames are shared
+        center_frame = self.compose((self.img_cue, "center"))
+        double_frame = self.compose(
+            fixation, (self.img_cue, cue_y["top"]), (self.img_cue, cue_y["bottom"])
         )
 
-        # Add timing info to dataframe
-        cur_block["block"] = block_num + 1
-        cur_block["fixationTime"] = [
-            x
-            for x in np.random.randint(
-                self.FIXATION_DURATION_RANGE[0],
-                self.FIXATION_DURATION_RANGE[1],
-                len(cur_combinations),
+        self.cue_frames = {}
+        for location in LOCATION_LEVELS:
+            self.cue_frames["nocue", location] = self.fixation_frame
+            self.cue_frames["center", location] = center_frame
+            self.cue_frames["double", location] = double_frame
+            self.cue_frames["spatial", location] = self.compose(
+                fixation, (self.img_cue, cue_y[location])
             )
-        ]
 
-        return cur_block
-
-    def display_flanker(self, flanker_type, location, direction):
-        # Left flanker
-        if direction == "left":
-            if flanker_type == "congruent":
-                stimulus = self.img_left_congruent
-            elif flanker_type == "incongruent":
-                stimulus = self.img_left_incongruent
-            else:
-                stimulus = self.img_left_neutral
-        # Right flanker
-        else:
-            if flanker_type == "congruent":
-                stimulus = self.img_right_congruent
-            elif flanker_type == "incongruent":
-                stimulus = self.img_right_incongruent
-            else:
-                stimulus = self.img_right_neutral
-
-        # Offset the flanker stimulus to above/below fixation
-        if location == "top":
-            display.image(
-                self.screen,
-                stimulus,
-                "center",
-                self.screen_y / 2 - self.flanker_h - self.TARGET_OFFSET,
-            )
-        elif location == "bottom":
-            display.image(
-                self.screen, stimulus, "center", self.screen_y / 2 + self.TARGET_OFFSET
+        # Target frames, by congruency, direction and location
+        flankers = {
+            ("congruent", "left"): self.img_left_congruent,
+            ("incongruent", "left"): self.img_left_incongruent,
+            ("neutral", "left"): self.img_left_neutral,
+            ("congruent", "right"): self.img_right_congruent,
+            ("incongruent", "right"): self.img_right_incongruent,
+            ("neutral", "right"): self.img_right_neutral,
+        }
+
+        self.target_frames = {}
+        for congruency, direction, location in product(
+            CONGRUENCY_LEVELS, DIRECTION_LEVELS, LOCATION_LEVELS
+        ):
+            self.target_frames[congruency, direction, location] = self.compose(
+                fixation, (flankers[congruency, direction], flanker_y[location])
             )
 
-    def display_trial(self, trial_num, data, trial_type):
+    def display_trial(self, trial_num, data, results, trial_type, onset):
         # Check for a quit press after stimulus was shown
         for event in pygame.event.get():
             if event.type == KEYDOWN and event.key == K_F12:
                 sys.exit(0)
 
-        # Display fixation
-        self.screen.blit(self.background, (0, 0))
-        display.image(self.screen, self.img_fixation, "center", "center")
-        pygame.display.flip()
+        # Onsets (ms) of each phase from the start of the block
+        block = data["block"][trial_num]
+        cue_onset = onset + data["fixationTime"][trial_num]
+        pre_stim_onset = cue_onset + self.CUE_DURATION
+        target_onset = pre_stim_onset + self.PRE_STIM_FIXATION_DURATION
 
-        display.wait(data["fixationTime"][trial_num])
+        # Display fixation
+        self.screen.blit(self.fixation_frame, (0, 0))
+        self.scheduler.flip(onset, "fixation", results, trial_num, block=block)
 
         # Display cue
-        self.screen.blit(self.background, (0, 0))
-
-        cue_type = data["cue"][trial_num]
-
-        if cue_type == "nocue":
-            # Display fixation in the center
-            display.image(self.screen, self.img_fixation, "center", "center")
-        elif cue_type == "center":
-            # Display cue in the center
-            display.image(self.screen, self.img_cue, "center", "center")
-        elif cue_type == "double":
-            # Display fixation in the center
-            display.image(self.screen, self.img_fixation, "center", "center")
-
-            # Display cue above and below fixation
-            display.image(
-                self.screen,
-                self.img_cue,
-                "center",
-                self.screen_y / 2 - self.fixation_h - self.TARGET_OFFSET,
-            )
-            display.image(
-                self.screen,
-                self.img_cue,
-                "center",
-                self.screen_y / 2 + self.TARGET_OFFSET,
-            )
-        elif cue_type == "spatial":
-            cue_location = data["location"][trial_num]
-
-            # Display fixation in the center
-            display.image(self.screen, self.img_fixation, "center", "center")
-
-            # Display cue at target location
-            if cue_location == "top":
-                display.image(
-                    self.screen,
-                    self.img_cue,
-                    "center",
-                    self.screen_y / 2 - self.fixation_h - self.TARGET_OFFSET,
-                )
-            elif cue_location == "bottom":
-                display.image(
-                    self.screen,
-                    self.img_cue,
-                    "center",
-                    self.screen_y / 2 + self.TARGET_OFFSET,
-                )
-
-        pygame.display.flip()
-
-        # Display cue for certain duration
-        display.wait(self.CUE_DURATION)
+        cue_frame = self.cue_frames[data["cue"][trial_num], data["location"][trial_num]]
+        self.screen.blit(cue_frame, (0, 0))
+        self.scheduler.flip(cue_onset, "cue", results, trial_num, block=block)
 
         # Prestim interval with fixation
-        self.screen.blit(self.background, (0, 0))
-        display.image(self.screen, self.img_fixation, "center", "center")
-        pygame.display.flip()
-
-        display.wait(self.PRE_STIM_FIXATION_DURATION)
+        self.screen.blit(self.fixation_frame, (0, 0))
+        self.scheduler.flip(pre_stim_onset, "preStim", results, trial_num, block=block)
 
         # Display flanker target
-        self.screen.blit(self.background, (0, 0))
-        display.image(self.screen, self.img_fixation, "center", "center")
-
-        self.display_flanker(
+        target_frame = self.target_frames[
             data["congruency"][trial_num],
-            data["location"][trial_num],
             data["direction"][trial_num],
+            data["location"][trial_num],
+        ]
+        self.screen.blit(target_frame, (0, 0))
+        start_time = self.scheduler.flip(
+            target_onset, "target", results, trial_num, block=block
         )
-        pygame.display.flip()
-
-        start_time = int(round(time.time() * 1000))
 
         # Clear the event queue before checking for responses
         pygame.event.clear()
         response = "NA"
+        poll_interval = np.nan
+        last_poll_time = start_time
         wait_response = True
         while wait_response:
+            poll_time = clock.now()
             for event in pygame.event.get():
-                if event.type == KEYDOWN and event.key == K_LEFT:
-                    response = "left"
-                    wait_response = False
-                elif event.type == KEYDOWN and event.key == K_RIGHT:
-                    response = "right"
+                if event.type == KEYDOWN and event.key in (K_LEFT, K_RIGHT):
+                    response = "left" if event.key == K_LEFT else "right"
+                    response_time = poll_time
+                    poll_interval = clock.poll_interval(poll_time, last_poll_time)
+                    rt = response_time - start_time
                     wait_response = False
+                    break
                 elif event.type == KEYDOWN and event.key == K_F12:
                     sys.exit(0)
-
-            end_time = int(round(time.time() * 1000))
+            last_poll_time = poll_time
 
             # If time limit has been reached, consider it a missed trial
-            if end_time - start_time >= self.FLANKER_DURATION:
-                wait_response = False
-
-        # Store reaction time and response
-        rt = int(round(time.time() * 1000)) - start_time
-        data.set_value(trial_num, "RT", rt)
-        data.set_value(trial_num, "response", response)
+            if wait_response:
+                rt = clock.elapsed(start_time)
+                if clock.to_ms(rt) >= self.FLANKER_DURATION:
+                    wait_response = False
 
+        # Store reaction time (ns), poll interval (ns) and response
         correct = 1 if response == data["direction"][trial_num] else 0
-        data.set_value(trial_num, "correct", correct)
+        results.record(
+            trial_num,
+            RT=rt,
+            pollInterval=poll_interval,
+            response=response,
+            correct=correct,
+        )
+
+        # Feedback and ITI follow the response, or the end of the response window
+        response_onset = self.scheduler.onset(start_time + rt)
+        iti_onset = response_onset
 
         # Display feedback if practice trials
         if trial_type == "practice":
@@ -276,29 +289,45 @@ class ANT(object):
                 display.text(
                     self.screen, self.font, "incorrect", "center", "center", (255, 0, 0)
                 )
-            pygame.display.flip()
+            self.scheduler.flip(
+                response_onset, "feedback", results, trial_num, block=block
+            )
 
-            display.wait(self.FEEDBACK_DURATION)
+            iti_onset += self.FEEDBACK_DURATION
 
-        # Display fixation during ITI
-        self.screen.blit(self.background, (0, 0))
-        display.image(self.screen, self.img_fixation, "center", "center")
-        pygame.display.flip()
+        # Display fixation during ITI, which lasts until the next trial onset
+        self.screen.blit(self.fixation_frame, (0, 0))
+        self.scheduler.flip(iti_onset, "ITI", results, trial_num, block=block)
 
-        iti = self.ITI_MAX - rt - data["fixationTime"][trial_num]
-        data.set_value(trial_num, "ITI", iti)
-
-        display.wait(iti)
+        iti = self.ITI_MAX - clock.to_ms(rt) - data["fixationTime"][trial_num]
+        results.record(trial_num, ITI=iti)
 
     def run_block(self, block_num, total_blocks, block_type):
-        cur_block = self.create_block(block_num, self.combinations, block_type)
+        trials = self.schedule[block_type]
+        cur_block = trials[trials["block"] == block_num + 1].reset_index(drop=True)
+        results = recorder.TrialRecorder(
+            cur_block.shape[0],
+            self.RESULT_FIELDS,
+            table="ANT",
+            part="%s block %d" % (block_type, block_num + 1),
+        )
 
+        trial_duration = self.TRIAL_DURATION
+        if block_type == "practice":
+            trial_duration += self.FEEDBACK_DURATION
+
+        # Trial onsets are fixed from the start of the block, so timing
+        # overruns in one trial do not delay the trials after it
+        self.scheduler.reset()
         for i in range(cur_block.shape[0]):
-            self.display_trial(i, cur_block, block_type)
+            self.display_trial(i, cur_block, results, block_type, i * trial_duration)
+
+        # Hold the ITI of the final trial
+        self.scheduler.wait_until(cur_block.shape[0] * trial_duration)
 
         if block_type == "main":
             # Add block data to all_data
-            self.all_data = pd.concat([self.all_data, cur_block])
+            self.all_data = pd.concat([self.all_data, results.to_frame(cur_block)])
 
         # End of block screen
         if block_num != total_blocks - 1:  # If not the final block
@@ -410,6 +439,10 @@ class ANT(object):
         # Create trial number column
         self.all_data["trial"] = list(range(1, len(self.all_data) + 1))
 
+        # Convert reaction times to ms for export
+        self.all_data["RT"] = clock.to_ms(self.all_data["RT"])
+        self.all_data["pollInterval"] = clock.to_ms(self.all_data["pollInterval"])
+
         # Rearrange the dataframe
         columns = [
             "trial",
@@ -423,6 +456,10 @@ class ANT(object):
             "response",
             "correct",
             "RT",
+            "pollInterval",
+        ]
+        columns += [
+            name for name, dtype, default in scheduler.onset_fields(self.SAVED_PHASES)
         ]
         self.all_data = self.all_data[columns]
 
@@ -435,5 +472,6 @@ class ANT(object):
         display.wait_for_space()
 
         print("- ANT complete")
+        print("- ANT onset error: " + self.scheduler.summary())
 
         return self.all_data
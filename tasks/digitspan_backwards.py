@@ -1,15 +1,46 @@
 import sys
-import random
 import pandas as pd
 import numpy as np
 import pygame
 
 from pygame.locals import *
-from utils import display
+from utils import clock, display, recorder
+
+NUMBERS_USED = list(range(1, 10))  # List of digits that can be used
+START_LENGTH = 3  # Length of smallest sequence
+END_LENGTH = 9  # Length of largest sequence
+NUM_REPEATS = 2  # Num of times each sequence length is repeated
+
+
+def create_schedule(rng):
+    """Generate the trials of a backwards digit span session.
+
+    Parameters:
+    rng -- numpy random Generator used for all random draws
+
+    Returns:
+    schedule -- dict with a "main" dataframe of trials, with the length and
+        digit sequence of each trial. Digits do not repeat within a sequence
+    """
+    # Generate all possible number sequence lengths for experiment
+    digit_lengths = np.repeat(np.arange(START_LENGTH, END_LENGTH + 1), NUM_REPEATS)
+
+    # Each trial's sequence is the start of a random ordering of the digits
+    digits = rng.permuted(np.tile(NUMBERS_USED, (len(digit_lengths), 1)), axis=1)
+
+    main = pd.DataFrame()
+    main["trial"] = np.arange(1, len(digit_lengths) + 1)
+    main["length"] = digit_lengths
+    main["sequence"] = [
+        "".join(str(n) for n in row[:length])
+        for row, length in zip(digits, digit_lengths)
+    ]
+
+    return {"main": main}
 
 
 class DigitspanBackwards(object):
-    def __init__(self, screen, background):
+    def __init__(self, screen, background, schedule=None, seed=None):
         # Get the pygame display window
         self.screen = screen
         self.background = background
@@ -31,35 +62,20 @@ class DigitspanBackwards(object):
         self.STIM_DURATION = 1000  # Duration of each digit
         self.INTER_NUMBER_DURATION = 100  # Time between numbers
         self.FEEDBACK_DURATION = 2000  # Duration of feedback screen
-        self.NUMBERS_USED = list(range(1, 10))  # List of digits that can be used
-        self.START_LENGTH = 3  # Length of smallest sequence
-        self.END_LENGTH = 9  # Length of largest sequence
-        self.NUM_REPEATS = 2  # Num of times each sequence length is repeated
-
-        self.num_lengths = self.END_LENGTH - self.START_LENGTH + 1
-
-        # Generate all possible number sequence lengths for experiment
-        self.digit_lengths = np.asarray(
-            [
-                j
-                for i in range(self.START_LENGTH, self.END_LENGTH + 1)
-                for j in [i] * self.NUM_REPEATS
-            ]
-        )
+
+        # Trials are generated here, unless a precompiled schedule is given
+        if schedule is None:
+            schedule = create_schedule(np.random.default_rng(seed))
+        self.schedule = schedule
 
         # Create main dataframe
-        self.all_data = pd.DataFrame()
-        self.all_data["trial"] = list(range(1, self.num_lengths * self.NUM_REPEATS + 1))
-        self.all_data["length"] = self.digit_lengths
+        self.all_data = self.schedule["main"].copy()
 
-        # Create digit sequences
-        for i in range(len(self.all_data)):
-            generated_sequence = random.sample(
-                self.NUMBERS_USED, self.all_data["length"][i]
-            )
-            self.all_data.set_value(
-                i, "sequence", "".join(str(n) for n in generated_sequence)
-            )
+        # Results recorded during each trial, as (column, dtype, default)
+        self.RESULT_FIELDS = [
+            ("user_sequence", "O", ""),
+            ("correct", "int64", 0),
+        ]
 
     def display_numbers(self, i, data):
         for number in data["sequence"][i]:
@@ -79,43 +95,59 @@ class DigitspanBackwards(object):
     def number_entry(self):
         user_sequence = ""
 
+        # Redraw at most once per display refresh
+        frame_interval = clock.from_ms(1000 / display.refresh_rate())
+        last_flip = 0
+
         # Clear the event queue before checking for responses
         pygame.event.clear()
 
+        redraw = True
         entry = True
         while entry:
-            for event in pygame.event.get():
-                if event.type == KEYDOWN and event.key == K_RETURN:
-                    entry = False
-                elif event.type == KEYDOWN and event.key == K_F12:
-                    sys.exit(0)
-                elif event.type == KEYDOWN and event.key == K_BACKSPACE:
-                    if user_sequence:
-                        # Remove last number in entered string
-                        user_sequence = user_sequence[:-1]
-                elif event.type == KEYDOWN:
-                    try:
-                        # Only allow key press of used numbers
-                        key_pressed = int(pygame.key.name(event.key))
-                        if key_pressed in self.NUMBERS_USED:
-                            user_sequence += pygame.key.name(event.key)
-                    except ValueError:
-                        pass
-
-            self.screen.blit(self.background, (0, 0))
-            display.text(
-                self.screen,
-                self.font,
-                "Type the sequence in backwards order:",
-                50,
-                self.screen_y / 4,
-            )
-
-            display.text(
-                self.screen, self.stimulus_font, user_sequence, "center", "center"
-            )
-
-            pygame.display.flip()
+            if redraw and clock.now() >= last_flip + frame_interval:
+                self.screen.blit(self.background, (0, 0))
+                display.text(
+                    self.screen,
+                    self.font,
+                    "Type the sequence in backwards order:",
+                    50,
+                    self.screen_y / 4,
+                )
+
+                display.text(
+                    self.screen, self.stimulus_font, user_sequence, "center", "center"
+                )
+
+                pygame.display.flip()
+                last_flip = clock.now()
+                redraw = False
+
+            # Block until the next key press, or until the next frame is due
+            if redraw:
+                timeout = clock.to_ms(last_flip + frame_interval - clock.now())
+                event = pygame.event.wait(max(1, int(timeout)))
+            else:
+                event = pygame.event.wait()
+
+            if event.type == KEYDOWN and event.key == K_RETURN:
+                entry = False
+            elif event.type == KEYDOWN and event.key == K_F12:
+                sys.exit(0)
+            elif event.type == KEYDOWN and event.key == K_BACKSPACE:
+                if user_sequence:
+                    # Remove last number in entered string
+                    user_sequence = user_sequence[:-1]
+                    redraw = True
+            elif event.type == KEYDOWN:
+                try:
+                    # Only allow key press of used numbers
+                    key_pressed = int(pygame.key.name(event.key))
+                    if key_pressed in NUMBERS_USED:
+                        user_sequence += pygame.key.name(event.key)
+                        redraw = True
+                except ValueError:
+                    pass
 
         return user_sequence
 
@@ -247,16 +279,20 @@ class DigitspanBackwards(object):
         display.wait_for_space()
 
         # Main trials
+        results = recorder.TrialRecorder(
+            len(self.all_data), self.RESULT_FIELDS, table="Digit span (backwards)"
+        )
+
         for i in range(len(self.all_data)):
             correct_sequence = self.display_numbers(i, self.all_data)
             user_sequence = self.number_entry()
 
-            self.all_data.set_value(i, "user_sequence", user_sequence)
-
             if self.check_answer(user_sequence, correct_sequence):
-                self.all_data.set_value(i, "correct", 1)
+                results.record(i, user_sequence=user_sequence, correct=1)
             else:
-                self.all_data.set_value(i, "correct", 0)
+                results.record(i, user_sequence=user_sequence, correct=0)
+
+        self.all_data = results.to_frame(self.all_data)
 
         # End screen
         self.screen.blit(self.background, (0, 0))
@@ -1,12 +1,56 @@
 import sys
-import time
 import pandas as pd
 import numpy as np
 import pygame
 
 from pygame.locals import *
 from itertools import product
-from utils import display
+from utils import clock, display, recorder
+
+# Specify factor levels
+CONGRUENCY_LEVELS = ("congruent", "incongruent")
+DIRECTION_LEVELS = ("left", "right")
+
+# Create level combinations
+# Level combinations give us 4 trials.
+COMBINATIONS = list(product(CONGRUENCY_LEVELS, DIRECTION_LEVELS))
+
+
+def create_trials(rng, sets, num_blocks):
+    # Each block repeats every combination, in a shuffled order
+    order = rng.permuted(
+        np.tile(np.arange(len(COMBINATIONS)), (num_blocks, sets)), axis=1
+    )
+
+    trials = pd.DataFrame(
+        data=[COMBINATIONS[i] for i in order.ravel()],
+        columns=("congruency", "direction"),
+    )
+    trials["block"] = np.repeat(np.arange(1, num_blocks + 1), order.shape[1])
+
+    return trials
+
+
+def create_schedule(rng, sets_practice=3, sets_main=25, blocks=1):
+    """Generate the trials of a Flanker session.
+
+    Block compatibility can be chosen by the participant, so it is not part
+    of the schedule. There is a practice block before each half of the task.
+
+    Parameters:
+    rng -- numpy random Generator used for all random draws
+    sets_practice -- number of sets of the 4 combinations per practice block
+    sets_main -- number of sets of the 4 combinations per main block
+    blocks -- total number of main blocks (compatible and incompatible)
+
+    Returns:
+    schedule -- dict with "practice" and "main" dataframes of trials, with
+        the order (from 1) of the block each trial belongs to
+    """
+    return {
+        "practice": create_trials(rng, sets_practice, 2),
+        "main": create_trials(rng, sets_main, blocks),
+    }
 
 
 class Flanker(object):
@@ -20,6 +64,8 @@ class Flanker(object):
         blocks_compat=1,
         blocks_incompat=0,
         block_order="compatible",
+        schedule=None,
+        seed=None,
     ):
         # Get the pygame display window
         self.screen = screen
@@ -64,42 +110,37 @@ class Flanker(object):
             "right": {"congruent": "> > > > >", "incongruent": "< < > < <"},
         }
 
-        # Specify factor levels
-        self.CONGRUENCY_LEVELS = ("congruent", "incongruent")
-        self.DIRECTION_LEVELS = ("left", "right")
+        # Trials are generated here, unless a precompiled schedule is given
+        if schedule is None:
+            schedule = create_schedule(
+                np.random.default_rng(seed),
+                sets_practice,
+                sets_main,
+                blocks_compat + blocks_incompat,
+            )
+        self.schedule = schedule
+
+        # Number of blocks of each type taken from the schedule so far
+        self.blocks_run = {"practice": 0, "main": 0}
 
-        # Create level combinations
-        # Level combinations give us 4 trials.
-        self.combinations = list(product(self.CONGRUENCY_LEVELS, self.DIRECTION_LEVELS))
+        # Results recorded during each trial, as (column, dtype, default)
+        self.RESULT_FIELDS = [
+            ("response", "O", "NA"),
+            ("correct", "int64", 0),
+            ("RT", "int64", 0),
+            ("pollInterval", "float64", np.nan),
+        ]
 
         # Create output dataframe
         self.all_data = pd.DataFrame()
 
-    def create_block(self, block_num, combinations, trial_type, compatibility):
-        if trial_type == "main":
-            cur_combinations = combinations * self.SETS_MAIN
-        else:
-            cur_combinations = combinations * self.SETS_PRACTICE
-
-        # Add shuffled combinations to dataframe
-        np.random.shuffle(cur_combinations)
-        cur_block = pd.DataFrame(
-            data=cur_combinations, columns=("congruency", "direction")
-        )
-
-        # Add timing info to dataframe
-        cur_block["block"] = block_num + 1
-        cur_block["compatibility"] = compatibility
-
-        return cur_block
-
     def display_flanker(self, flanker_type, direction):
         stimulus = self.flanker_stim[direction][flanker_type]
         display.text(
             self.screen, self.font_stim, stimulus, "center", "center", self.colour_font
         )
 
-    def display_trial(self, trial_num, data):
+    def display_trial(self, trial_num, data, results):
         # Check for a quit press after stimulus was shown
         for event in pygame.event.get():
             if event.type == KEYDOWN and event.key == K_F12:
@@ -122,45 +163,55 @@ class Flanker(object):
         # Clear the event queue before checking for responses
         pygame.event.clear()
         response = "NA"
+        poll_interval = np.nan
         too_slow = False
         wait_response = True
         post_flanker_blank_shown = False
 
-        start_time = int(round(time.time() * 1000))
+        start_time = clock.now()
+        last_poll_time = start_time
         while wait_response:
+            poll_time = clock.now()
             for event in pygame.event.get():
-                if event.type == KEYDOWN and event.key == K_LEFT:
-                    response = "left"
-                    wait_response = False
-                elif event.type == KEYDOWN and event.key == K_RIGHT:
-                    response = "right"
+                if event.type == KEYDOWN and event.key in (K_LEFT, K_RIGHT):
+                    response = "left" if event.key == K_LEFT else "right"
+                    response_time = poll_time
+                    poll_interval = clock.poll_interval(poll_time, last_poll_time)
                     wait_response = False
+                    break
                 elif event.type == KEYDOWN and event.key == K_F12:
                     sys.exit(0)
+            last_poll_time = poll_time
 
-            end_time = int(round(time.time() * 1000))
+            if wait_response:
+                rt = clock.elapsed(start_time)
+            else:
+                rt = response_time - start_time
 
-            if end_time - start_time >= self.FLANKER_DURATION:
+            if clock.to_ms(rt) >= self.FLANKER_DURATION:
                 if not post_flanker_blank_shown:
                     self.screen.blit(self.background, (0, 0))
                     pygame.display.flip()
                     post_flanker_blank_shown = True
 
-            if end_time - start_time >= self.MAX_RESPONSE_TIME:
+            if clock.to_ms(rt) >= self.MAX_RESPONSE_TIME:
                 # If time limit has been reached, consider it a missed trial
                 wait_response = False
                 too_slow = True
 
-        # Store reaction time and response
-        rt = int(round(time.time() * 1000)) - start_time
-        data.set_value(trial_num, "RT", rt)
-        data.set_value(trial_num, "response", response)
-
         if data["compatibility"][trial_num] == "compatible":
             correct = 1 if response == data["direction"][trial_num] else 0
         else:
             correct = 1 if response != data["direction"][trial_num] else 0
-        data.set_value(trial_num, "correct", correct)
+
+        # Store reaction time (ns), poll interval (ns) and response
+        results.record(
+            trial_num,
+            RT=rt,
+            pollInterval=poll_interval,
+            response=response,
+            correct=correct,
+        )
 
         # Display feedback
         self.screen.blit(self.background, (0, 0))
@@ -193,16 +244,29 @@ class Flanker(object):
     def run_block(
         self, block_num, total_blocks, block_type, compatibility, second_half=False
     ):
-        cur_block = self.create_block(
-            block_num, self.combinations, block_type, compatibility
+        # Blocks are taken from the schedule in the order they are run
+        self.blocks_run[block_type] += 1
+        trials = self.schedule[block_type]
+        cur_block = trials[trials["block"] == self.blocks_run[block_type]]
+        cur_block = cur_block.reset_index(drop=True)
+
+        # Add block info to dataframe
+        cur_block["block"] = block_num + 1
+        cur_block["compatibility"] = compatibility
+
+        results = recorder.TrialRecorder(
+            cur_block.shape[0],
+            self.RESULT_FIELDS,
+            table="Eriksen Flanker",
+            part="%s block %d" % (block_type, block_num + 1),
         )
 
         for i in range(cur_block.shape[0]):
-            self.display_trial(i, cur_block)
+            self.display_trial(i, cur_block, results)
 
         if block_type == "main":
             # Add block data to all_data
-            self.all_data = pd.concat([self.all_data, cur_block])
+            self.all_data = pd.concat([self.all_data, results.to_frame(cur_block)])
 
         if second_half:
             total_blocks = self.BLOCKS_INCOMPAT + self.BLOCKS_COMPAT
@@ -590,6 +654,10 @@ class Flanker(object):
         # Create trial number column
         self.all_data["trial"] = list(range(1, len(self.all_data) + 1))
 
+        # Convert reaction times to ms for export
+        self.all_data["RT"] = clock.to_ms(self.all_data["RT"])
+        self.all_data["pollInterval"] = clock.to_ms(self.all_data["pollInterval"])
+
         # Rearrange the dataframe
         columns = [
             "trial",
@@ -600,6 +668,7 @@ class Flanker(object):
             "response",
             "correct",
             "RT",
+            "pollInterval",
         ]
         self.all_data = self.all_data[columns]
 
@@ -5,7 +5,7 @@ import numpy as np
 import pygame
 
 from pygame.locals import *
-from sys import exit
+from utils import assets, clock, display, recorder
 
 
 class MRT(object):
@@ -58,9 +58,12 @@ class MRT(object):
             columns=["correct_answer1", "correct_answer2"],
         )
 
-        # add blank user answers
-        self.allData["user_answer1"] = 0
-        self.allData["user_answer2"] = 0
+        # user answers, recorded during the task. 0 means no answer
+        self.results = recorder.TrialRecorder(
+            self.allData.shape[0],
+            [("user_answer1", "int64", 0), ("user_answer2", "int64", 0)],
+            table="MRT",
+        )
 
         # add trial numbers
         self.trialNums = np.arange(1, self.allData.shape[0] + 1)
@@ -74,475 +77,382 @@ class MRT(object):
         self.directory = os.path.dirname(os.path.realpath(__file__))
         self.imagePath = os.path.join(self.directory, "images", "MRT")
 
+        # Decode all images and render static labels once, up front
+        self.images = {}
+        self.labels = {}
+        self.load_assets()
+
+    def load_assets(self):
+        names = [
+            "indicator",
+            "circleBlank",
+            "circleBlue",
+            "previous",
+            "next",
+            "finish",
+            "correct",
+            "0a",
+            "0b",
+        ]
+
+        # Practice and main question/answer images
+        for i in range(3):
+            names += ["p{}{}".format(i + 1, part) for part in "qabcd"]
+        for i in range(self.allData.shape[0]):
+            names += ["{}{}".format(i + 1, part) for part in "qabcd"]
+
+        for name in names:
+            self.images[name] = assets.image(self.imagePath, name + ".png")
+
+        # Answer letters and question numbers
+        for letter in "abcd":
+            self.labels[letter] = self.xFont.render(letter, 1, (0, 0, 0))
+        for i in range(self.allData.shape[0]):
+            label = "Q" + str(i + 1)
+            self.labels[label] = self.xFont.render(label, 1, (0, 0, 0))
+
     def pressSpace(self, x, y):
-        self.space = self.xFont.render("(Press spacebar when ready)", 1, (0, 0, 0))
-        self.screen.blit(self.space, (x, y))
+        display.text(self.screen, self.xFont, "(Press spacebar when ready)", x, y)
+
+    def layoutNavigation(self):
+        # Position the progress indicator, progress circles and buttons
+        circleX, circleY = self.images["circleBlank"].get_rect().size
+        prevX, prevY = self.images["previous"].get_rect().size
+        nextX, nextY = self.images["next"].get_rect().size
+        finishX, finishY = self.images["finish"].get_rect().size
+
+        self.circleX = circleX
+        self.navigationY = self.screen_y / 2 - 350
+
+        self.prevButton = pygame.Rect(
+            self.screen_x / 2 - circleX * 6 - prevX - 50, self.navigationY, prevX, 50
+        )
+        self.nextButton = pygame.Rect(
+            self.screen_x / 2 + circleX * 6 + 50, self.navigationY, nextX, 50
+        )
+        self.finishButton = pygame.Rect(
+            self.screen_x / 2 + circleX * 6 + nextX + 60, self.navigationY, finishX, 50
+        )
+
+        # Area covering everything drawn by drawNavigation
+        self.navigationArea = pygame.Rect(
+            self.prevButton.left,
+            self.screen_y / 2 - 400,
+            self.finishButton.right - self.prevButton.left,
+            100,
+        )
+
+    def layoutQuestion(self):
+        # Position the target and answer boxes of the current trial
+        self.questionX = self.screen_x / 2 - 500  # question box start X position
+        self.answerX = self.screen_x / 2 - 200  # answer boxes start X position
+        self.spacer = 40  # between answer boxes
+        self.letterOffset = 35  # text offset above boxes
+
+        imgQ = self.images["{}q".format(self.curTrial)]
+        qX, qY = imgQ.get_rect().size
+        aX, aY = self.images["{}a".format(self.curTrial)].get_rect().size
+        bX, bY = self.images["{}b".format(self.curTrial)].get_rect().size
+        cX, cY = self.images["{}c".format(self.curTrial)].get_rect().size
+        dX, dY = self.images["{}d".format(self.curTrial)].get_rect().size
+
+        self.questionBox = pygame.Rect(
+            self.questionX, self.screen_y / 2 - qY / 2, qX, qY
+        )
+        self.answerBoxes = [
+            pygame.Rect(self.answerX, self.screen_y / 2 - aY / 2, aX, aY),
+            pygame.Rect(
+                self.answerX + aX + self.spacer, self.screen_y / 2 - bY / 2, bX, bY
+            ),
+            pygame.Rect(
+                self.answerX + bX * 2 + self.spacer * 2,
+                self.screen_y / 2 - bY / 2,
+                cX,
+                bY,
+            ),
+            pygame.Rect(
+                self.answerX + cX * 3 + self.spacer * 3,
+                self.screen_y / 2 - bY / 2,
+                dX,
+                bY,
+            ),
+        ]
+
+    def drawTimer(self, timeLeft):
+        # convert seconds to time format
+        self.timer = time.strftime("%M:%S", time.gmtime(timeLeft))
+
+        # change timer to red if below 10 seconds remaining (flashing), and every minute
+        if timeLeft % 60 == 0:
+            self.timerColour = (255, 0, 0)
+        elif timeLeft <= 10:
+            if timeLeft % 2 == 0:
+                self.timerColour = (255, 0, 0)
+            else:
+                self.timerColour = (0, 0, 0)
+        else:
+            self.timerColour = (0, 0, 0)
+
+        self.timerText = self.xFont.render(
+            "Time left: " + str(self.timer), 1, self.timerColour
+        )
+        timerRect = self.timerText.get_rect(
+            midtop=(self.screen_x / 2, self.screen_y / 2 + 300)
+        )
+
+        # Erase the previous timer, which may have been wider
+        dirty = timerRect.union(self.timerArea) if self.timerArea else timerRect
+        self.screen.blit(self.background, dirty, dirty)
+        self.screen.blit(self.timerText, timerRect)
+        self.timerArea = timerRect
+
+        return dirty
+
+    def drawNavigation(self, data):
+        self.screen.blit(self.background, self.navigationArea, self.navigationArea)
+
+        for i in range(12):
+            x = self.screen_x / 2 - self.circleX * 6 + self.circleX * i
+
+            # draws indicating arrow above timeline
+            if i + 1 + self.trialOffset == self.curTrial:
+                self.screen.blit(self.images["indicator"], (x, self.screen_y / 2 - 400))
+
+            # if 2 answers have been selected, draw blue circle for that question
+            if (
+                data["user_answer1"][i + self.trialOffset] != 0
+                and data["user_answer2"][i + self.trialOffset] != 0
+            ):
+                self.screen.blit(self.images["circleBlue"], (x, self.navigationY))
+            else:
+                self.screen.blit(self.images["circleBlank"], (x, self.navigationY))
+
+        self.screen.blit(self.images["previous"], self.prevButton)
+        self.screen.blit(self.images["next"], self.nextButton)
+        if self.curTrial == 12 or self.curTrial == 24:
+            self.screen.blit(self.images["finish"], self.finishButton)
+
+        return self.navigationArea
+
+    def drawQuestion(self, data):
+        # Erase the previous question, which may have used different box sizes
+        dirty = self.questionArea
+        if dirty:
+            self.screen.blit(self.background, dirty, dirty)
+
+        self.layoutQuestion()
+
+        self.screen.blit(self.images["{}q".format(self.curTrial)], self.questionBox)
+        self.screen.blit(
+            self.labels["Q" + str(self.curTrial)],
+            (self.questionBox.x, self.questionBox.y - self.letterOffset),
+        )
+
+        answers = (
+            data["user_answer1"][self.curTrial - 1],
+            data["user_answer2"][self.curTrial - 1],
+        )
+
+        for i, (letter, box) in enumerate(zip("abcd", self.answerBoxes)):
+            self.screen.blit(self.images["{}{}".format(self.curTrial, letter)], box)
+            self.screen.blit(self.labels[letter], (box.x, box.y - self.letterOffset))
+
+            # draw user choice boxes for choices that have been made/stored
+            if i + 1 in answers:
+                pygame.draw.rect(self.screen, (0, 0, 255), box, 5)
+
+        # Area covering the boxes and the labels above them
+        area = self.questionBox.unionall(self.answerBoxes)
+        area.top -= self.letterOffset
+        area.height += self.letterOffset
+        self.questionArea = area
+
+        return area.union(dirty) if dirty else area
+
+    def toggleAnswer(self, data, choice):
+        # Store a clicked choice. Clicking a stored choice again clears it
+        answer1 = data["user_answer1"][self.curTrial - 1]
+        answer2 = data["user_answer2"][self.curTrial - 1]
+
+        if answer1 == choice:
+            data.record(self.curTrial - 1, user_answer1=0)
+        elif answer2 == choice:
+            data.record(self.curTrial - 1, user_answer2=0)
+        elif answer1 == 0:
+            data.record(self.curTrial - 1, user_answer1=choice)
+        elif answer2 == 0:
+            data.record(self.curTrial - 1, user_answer2=choice)
 
     def mainExperiment(self, section, data):
         main = True
         # check for first half or second half to determine current trial number
         if section == 1:
             self.curTrial = 1
+            self.trialOffset = 0
         elif section == 2:
             self.curTrial = 13
+            self.trialOffset = 12
+
+        # Draw the whole screen once. Afterwards, only changed areas are redrawn
+        self.timerArea = None
+        self.questionArea = None
+        self.layoutNavigation()
+
+        self.screen.blit(self.background, (0, 0))
+        self.drawNavigation(data)
+        self.drawQuestion(data)
 
         # time at task start
-        self.start_time = int(time.time())
+        self.start_time = clock.now()
+        self.timeLeft = None
+
+        pygame.display.flip()
 
         while main:
-            self.screen.blit(self.background, (0, 0))
+            dirty = []
+
             # calculate amount of time left in the task
-            self.curTime = int(time.time()) - self.start_time
-            self.timeLeft = 180 - self.curTime
-            # convert seconds to time format
-            self.timer = time.strftime("%M:%S", time.gmtime(self.timeLeft))
+            self.curTime = int(clock.to_ms(clock.elapsed(self.start_time)) // 1000)
 
-            # change timer to red if below 10 seconds remaining (flashing), and every minute
-            if self.timeLeft % 60 == 0:
-                self.timerColour = (255, 0, 0)
-            elif self.timeLeft <= 10:
-                if self.timeLeft % 2 == 0:
-                    self.timerColour = (255, 0, 0)
-                else:
-                    self.timerColour = (0, 0, 0)
-            else:
-                self.timerColour = (0, 0, 0)
+            # only redraw the timer on second boundaries
+            if self.timeLeft != 180 - self.curTime:
+                self.timeLeft = 180 - self.curTime
+                dirty.append(self.drawTimer(self.timeLeft))
 
-            # display the timer
-            self.timerText = self.xFont.render(
-                "Time left: " + str(self.timer), 1, self.timerColour
-            )
-            self.timerW = self.timerText.get_rect().width
-            self.screen.blit(
-                self.timerText,
-                (self.screen_x / 2 - self.timerW / 2, self.screen_y / 2 + 300),
-            )
             # stop if timer hits 0
             if self.timeLeft <= 0:
                 main = False
 
-            # draw circles
-            if section == 1:
-                self.trialOffset = 0
-            elif section == 2:
-                self.trialOffset = 12
-
-            for i in range(12):
-                # draws indicating arrow above timeline
-                if i + 1 + self.trialOffset == self.curTrial:
-                    self.imgIndicator = pygame.image.load(os.path.join(self.imagePath,
-                                                                       "indicator.png"))
-                    self.indicatorX, self.indicatorY = self.imgIndicator.get_rect().size
-                    self.screen.blit(
-                        self.imgIndicator,
-                        (
-                            (self.screen_x / 2)
-                            - (self.indicatorX * 6)
-                            + (self.indicatorX * i),
-                            self.screen_y / 2 - 400,
-                        ),
-                    )
+            # Sleep until the next event, or the next timer update
+            nextSecond = self.start_time + clock.from_ms((self.curTime + 1) * 1000)
+            timeout = clock.to_ms(nextSecond - clock.now())
+            event = pygame.event.wait(max(1, int(timeout) + 1))
 
-                # if 2 answers have been selected, draw blue circle for that question
-                if (
-                    data.at[i + self.trialOffset, "user_answer1"] != 0
-                    and data.at[i + self.trialOffset, "user_answer2"] != 0
-                ):
-                    self.imgCircle = pygame.image.load(os.path.join(
-                        self.imagePath, "circleBlue.png")
-                    )
-                else:
-                    self.imgCircle = pygame.image.load(os.path.join(
-                        self.imagePath, "circleBlank.png")
-                    )
-                self.circleX, self.circleY = self.imgCircle.get_rect().size
-                self.screen.blit(
-                    self.imgCircle,
-                    (
-                        (self.screen_x / 2) - (self.circleX * 6) + (self.circleX * i),
-                        self.screen_y / 2 - 350,
-                    ),
-                )
-
-            # draw previous button
-            self.imgPrev = pygame.image.load(os.path.join(self.imagePath, "previous.png"))
-            self.prevX, self.prevY = self.imgPrev.get_rect().size
-            self.prevButton = (
-                [
-                    (self.screen_x / 2) - (self.circleX * 6) - self.prevX - 50,
-                    self.screen_y / 2 - 350,
-                ],
-                [
-                    (self.screen_x / 2) - (self.circleX * 6) - 50,
-                    self.screen_y / 2 - 300,
-                ],
-            )
-            self.screen.blit(
-                self.imgPrev, (self.prevButton[0][0], self.prevButton[0][1])
-            )
-
-            # draw next button
-            self.imgNext = pygame.image.load(os.path.join(self.imagePath, "next.png"))
-            self.nextX, self.nextY = self.imgNext.get_rect().size
-            self.nextButton = (
-                [
-                    (self.screen_x / 2) + (self.circleX * 6) + 50,
-                    self.screen_y / 2 - 350,
-                ],
-                [
-                    (self.screen_x / 2) + (self.circleX * 6) + self.nextX + 50,
-                    self.screen_y / 2 - 300,
-                ],
-            )
-            self.screen.blit(
-                self.imgNext, (self.nextButton[0][0], self.nextButton[0][1])
-            )
-
-            # draw finish button
-            self.imgFinish = pygame.image.load(os.path.join(self.imagePath, "finish.png"))
-            self.finishX, self.finishY = self.imgFinish.get_rect().size
-            self.finishButton = (
-                [
-                    (self.screen_x / 2) + (self.circleX * 6) + self.nextX + 60,
-                    self.screen_y / 2 - 350,
-                ],
-                [
-                    (self.screen_x / 2)
-                    + (self.circleX * 6)
-                    + self.nextX
-                    + 60
-                    + self.finishX,
-                    self.screen_y / 2 - 300,
-                ],
-            )
-            if self.curTrial == 12 or self.curTrial == 24:
-                self.screen.blit(
-                    self.imgFinish, (self.finishButton[0][0], self.finishButton[0][1])
-                )
-
-            # task boxes
-            self.questionX = self.screen_x / 2 - 500  # question box start X position
-            self.answerX = self.screen_x / 2 - 200  # answer boxes start X position
-            self.spacer = 40  # between answer boxes
-            self.letterOffset = 35  # text offset above boxes
-
-            # target image
-            imgQ = pygame.image.load(os.path.join(self.imagePath, "{}q.png".format(self.curTrial)))
-            qX, qY = imgQ.get_rect().size
-            qButton = (
-                [self.questionX, (self.screen_y / 2) - (qY / 2)],
-                [self.questionX + qX, (self.screen_y / 2) + (qY / 2)],
-            )
-            self.screen.blit(imgQ, (qButton[0][0], qButton[0][1]))
-            lineQ = self.xFont.render("Q" + str(self.curTrial), 1, (0, 0, 0))
-            self.screen.blit(lineQ, (qButton[0][0], qButton[0][1] - self.letterOffset))
-
-            # answer a
-            imgA = pygame.image.load(os.path.join(self.imagePath, "{}a.png".format(self.curTrial)))
-            aX, aY = imgA.get_rect().size
-            aButton = (
-                [self.answerX, (self.screen_y / 2) - (aY / 2)],
-                [self.answerX + aX, (self.screen_y / 2) + (aY / 2)],
-            )
-            self.screen.blit(imgA, (aButton[0][0], aButton[0][1]))
-            lineA = self.xFont.render("a", 1, (0, 0, 0))
-            self.screen.blit(lineA, (aButton[0][0], aButton[0][1] - self.letterOffset))
-
-            # answer b
-            imgB = pygame.image.load(os.path.join(self.imagePath, "{}b.png".format(self.curTrial)))
-            bX, bY = imgB.get_rect().size
-            bButton = (
-                [self.answerX + aX + self.spacer, (self.screen_y / 2) - (bY / 2)],
-                [self.answerX + aX + self.spacer + bX, (self.screen_y / 2) + (bY / 2)],
-            )
-            self.screen.blit(imgB, (bButton[0][0], bButton[0][1]))
-            lineB = self.xFont.render("b", 1, (0, 0, 0))
-            self.screen.blit(lineB, (bButton[0][0], bButton[0][1] - self.letterOffset))
-
-            # answer c
-            imgC = pygame.image.load(os.path.join(self.imagePath, "{}c.png".format(self.curTrial)))
-            cX, cY = imgC.get_rect().size
-            cButton = (
-                [
-                    self.answerX + bX * 2 + self.spacer * 2,
-                    (self.screen_y / 2) - (bY / 2),
-                ],
-                [
-                    self.answerX + bX * 2 + self.spacer * 2 + cX,
-                    (self.screen_y / 2) + (bY / 2),
-                ],
-            )
-            self.screen.blit(imgC, (cButton[0][0], cButton[0][1]))
-            lineC = self.xFont.render("c", 1, (0, 0, 0))
-            self.screen.blit(lineC, (cButton[0][0], cButton[0][1] - self.letterOffset))
-
-            # answer d
-            imgD = pygame.image.load(os.path.join(self.imagePath, "{}d.png".format(self.curTrial)))
-            dX, dY = imgD.get_rect().size
-            dButton = (
-                [
-                    self.answerX + cX * 3 + self.spacer * 3,
-                    (self.screen_y / 2) - (bY / 2),
-                ],
-                [
-                    self.answerX + cX * 3 + self.spacer * 3 + dX,
-                    (self.screen_y / 2) + (bY / 2),
-                ],
-            )
-            self.screen.blit(imgD, (dButton[0][0], dButton[0][1]))
-            lineD = self.xFont.render("d", 1, (0, 0, 0))
-            self.screen.blit(lineD, (dButton[0][0], dButton[0][1] - self.letterOffset))
-
-            # cache current answers
-            self.answer1 = data.at[self.curTrial - 1, "user_answer1"]
-            self.answer2 = data.at[self.curTrial - 1, "user_answer2"]
-
-            # check what choices have been made/stored, then draw user choice boxes
-            if self.answer1 == 1 or self.answer2 == 1:
-                pygame.draw.rect(
-                    self.screen,
-                    (0, 0, 255),
-                    (
-                        aButton[0][0],
-                        aButton[0][1],
-                        aButton[1][0] - aButton[0][0],
-                        aButton[1][1] - aButton[0][1],
-                    ),
-                    5,
-                )
-            if self.answer1 == 2 or self.answer2 == 2:
-                pygame.draw.rect(
-                    self.screen,
-                    (0, 0, 255),
-                    (
-                        bButton[0][0],
-                        bButton[0][1],
-                        bButton[1][0] - bButton[0][0],
-                        bButton[1][1] - bButton[0][1],
-                    ),
-                    5,
-                )
-            if self.answer1 == 3 or self.answer2 == 3:
-                pygame.draw.rect(
-                    self.screen,
-                    (0, 0, 255),
-                    (
-                        cButton[0][0],
-                        cButton[0][1],
-                        cButton[1][0] - cButton[0][0],
-                        cButton[1][1] - cButton[0][1],
-                    ),
-                    5,
-                )
-            if self.answer1 == 4 or self.answer2 == 4:
-                pygame.draw.rect(
-                    self.screen,
-                    (0, 0, 255),
-                    (
-                        dButton[0][0],
-                        dButton[0][1],
-                        dButton[1][0] - dButton[0][0],
-                        dButton[1][1] - dButton[0][1],
-                    ),
-                    5,
-                )
-
-            for event in pygame.event.get():
-                # check quit
-                if event.type == KEYDOWN and event.key == K_F12:
-                    main = False
-                elif event.type == QUIT:
-                    main = False
+            # check quit
+            if event.type == KEYDOWN and event.key == K_F12:
+                main = False
+            elif event.type == QUIT:
+                main = False
+            elif event.type == pygame.MOUSEBUTTONUP and event.button == 1:
+                trial = self.curTrial
 
                 # check next previous box clicks
-                (mouseX, mouseY) = pygame.mouse.get_pos()
                 if (
-                    event.type == pygame.MOUSEBUTTONUP
-                    and event.button == 1
-                    and self.curTrial < self.trialOffset + 12
-                    and mouseX >= self.nextButton[0][0]
-                    and mouseX <= self.nextButton[1][0]
-                    and mouseY >= self.nextButton[0][1]
-                    and mouseY <= self.nextButton[1][1]
+                    self.curTrial < self.trialOffset + 12
+                    and self.nextButton.collidepoint(event.pos)
                 ):
                     self.curTrial += 1
                 elif (
-                    event.type == pygame.MOUSEBUTTONUP
-                    and event.button == 1
-                    and self.curTrial > self.trialOffset + 1
-                    and mouseX >= self.prevButton[0][0]
-                    and mouseX <= self.prevButton[1][0]
-                    and mouseY >= self.prevButton[0][1]
-                    and mouseY <= self.prevButton[1][1]
+                    self.curTrial > self.trialOffset + 1
+                    and self.prevButton.collidepoint(event.pos)
                 ):
                     self.curTrial -= 1
-                if self.curTrial == 12 or self.curTrial == 24:
-                    if (
-                        event.type == pygame.MOUSEBUTTONUP
-                        and event.button == 1
-                        and mouseX >= self.finishButton[0][0]
-                        and mouseX <= self.finishButton[1][0]
-                        and mouseY >= self.finishButton[0][1]
-                        and mouseY <= self.finishButton[1][1]
-                    ):
-                        main = False
-
-                # check answer box clicks. Upon click, stores value into allData. If empty, then stores value. If value, then clears/set to 0 if clicked again
-                if (
-                    event.type == pygame.MOUSEBUTTONUP
-                    and event.button == 1
-                    and mouseX >= aButton[0][0]
-                    and mouseX <= aButton[1][0]
-                    and mouseY >= aButton[0][1]
-                    and mouseY <= aButton[1][1]
-                ):
-                    if self.answer1 == 1:
-                        data.set_value(self.curTrial - 1, "user_answer1", 0)
-                    elif self.answer2 == 1:
-                        data.set_value(self.curTrial - 1, "user_answer2", 0)
-                    else:
-                        if self.answer1 == 0:
-                            data.set_value(self.curTrial - 1, "user_answer1", 1)
-                        elif self.answer2 == 0:
-                            data.set_value(self.curTrial - 1, "user_answer2", 1)
+                elif (
+                    self.curTrial == 12 or self.curTrial == 24
+                ) and self.finishButton.collidepoint(event.pos):
+                    main = False
 
-                if (
-                    event.type == pygame.MOUSEBUTTONUP
-                    and event.button == 1
-                    and mouseX >= bButton[0][0]
-                    and mouseX <= bButton[1][0]
-                    and mouseY >= bButton[0][1]
-                    and mouseY <= bButton[1][1]
-                ):
-                    if self.answer1 == 2:
-                        data.set_value(self.curTrial - 1, "user_answer1", 0)
-                    elif self.answer2 == 2:
-                        data.set_value(self.curTrial - 1, "user_answer2", 0)
-                    else:
-                        if self.answer1 == 0:
-                            data.set_value(self.curTrial - 1, "user_answer1", 2)
-                        elif self.answer2 == 0:
-                            data.set_value(self.curTrial - 1, "user_answer2", 2)
+                # check answer box clicks
+                for i, box in enumerate(self.answerBoxes):
+                    if trial == self.curTrial and box.collidepoint(event.pos):
+                        self.toggleAnswer(data, i + 1)
+                        dirty.append(self.drawQuestion(data))
 
-                if (
-                    event.type == pygame.MOUSEBUTTONUP
-                    and event.button == 1
-                    and mouseX >= cButton[0][0]
-                    and mouseX <= cButton[1][0]
-                    and mouseY >= cButton[0][1]
-                    and mouseY <= cButton[1][1]
-                ):
-                    if self.answer1 == 3:
-                        data.set_value(self.curTrial - 1, "user_answer1", 0)
-                    elif self.answer2 == 3:
-                        data.set_value(self.curTrial - 1, "user_answer2", 0)
-                    else:
-                        if self.answer1 == 0:
-                            data.set_value(self.curTrial - 1, "user_answer1", 3)
-                        elif self.answer2 == 0:
-                            data.set_value(self.curTrial - 1, "user_answer2", 3)
+                # Progress circles and finish button depend on trial and answers
+                if trial != self.curTrial:
+                    dirty.append(self.drawQuestion(data))
+                if dirty:
+                    dirty.append(self.drawNavigation(data))
 
-                if (
-                    event.type == pygame.MOUSEBUTTONUP
-                    and event.button == 1
-                    and mouseX >= dButton[0][0]
-                    and mouseX <= dButton[1][0]
-                    and mouseY >= dButton[0][1]
-                    and mouseY <= dButton[1][1]
-                ):
-                    if self.answer1 == 4:
-                        data.set_value(self.curTrial - 1, "user_answer1", 0)
-                    elif self.answer2 == 4:
-                        data.set_value(self.curTrial - 1, "user_answer2", 0)
-                    else:
-                        if self.answer1 == 0:
-                            data.set_value(self.curTrial - 1, "user_answer1", 4)
-                        elif self.answer2 == 0:
-                            data.set_value(self.curTrial - 1, "user_answer2", 4)
-
-            pygame.display.flip()
+            if dirty:
+                pygame.display.update(dirty)
 
     def run(self):
         # instructions
         # page 1
-        instructions = True
-        while instructions:
-            for event in pygame.event.get():
-                if event.type == KEYDOWN and event.key == K_SPACE:
-                    instructions = False
-                elif event.type == KEYDOWN and event.key == K_F12:
-                    pygame.quit()
-                    exit()
-
-            self.screen.blit(self.background, (0, 0))
-
-            self.title = self.xFont.render("Mental Rotation Task", 1, (0, 0, 0))
-            self.titleW = self.title.get_rect().width
-            self.screen.blit(
-                self.title,
-                (self.screen_x / 2 - self.titleW / 2, self.screen_y / 2 - 400),
-            )
-
-            self.line1 = self.xFont.render(
-                "Please look at these five figures:", 1, (0, 0, 0)
-            )
-            self.screen.blit(self.line1, (100, self.screen_y / 2 - 300))
+        # Static pages are drawn once, then held until space is pressed
+        self.screen.blit(self.background, (0, 0))
+
+        display.text(
+            self.screen,
+            self.xFont,
+            "Mental Rotation Task",
+            "center",
+            self.screen_y / 2 - 400,
+        )
+        display.text(
+            self.screen,
+            self.xFont,
+            "Please look at these five figures:",
+            100,
+            self.screen_y / 2 - 300,
+        )
 
-            img0a = pygame.image.load(os.path.join(self.imagePath, "0a.png"))
-            x, y = img0a.get_rect().size
-            self.screen.blit(
-                img0a, ((self.screen_x / 2) - (x / 2), self.screen_y / 2 - 260)
-            )
+        img0a = self.images["0a"]
+        x, y = img0a.get_rect().size
+        self.screen.blit(
+            img0a, ((self.screen_x / 2) - (x / 2), self.screen_y / 2 - 260)
+        )
 
-            line2 = self.xFont.render(
-                "Note that these are all pictures of the same object which is shown from different angles.",
-                1,
-                (0, 0, 0),
-            )
-            self.screen.blit(line2, (100, self.screen_y / 2 - 60))
-            line2a = self.xFont.render(
-                "Try to imagine moving the object (or yourself with respect to the object), as you look from one drawing to the next.",
-                1,
-                (0, 0, 0),
-            )
-            self.screen.blit(line2a, (100, self.screen_y / 2 - 10))
+        display.text(
+            self.screen,
+            self.xFont,
+            "Note that these are all pictures of the same object which is shown from different angles.",
+            100,
+            self.screen_y / 2 - 60,
+        )
+        display.text(
+            self.screen,
+            self.xFont,
+            "Try to imagine moving the object (or yourself with respect to the object), as you look from one drawing to the next.",
+            100,
+            self.screen_y / 2 - 10,
+        )
 
-            img0b = pygame.image.load(os.path.join(self.imagePath, "0b.png"))
-            x, y = img0b.get_rect().size
-            self.screen.blit(
-                img0b, ((self.screen_x / 2) - (x / 2), self.screen_y / 2 + 80)
-            )
+        img0b = self.images["0b"]
+        x, y = img0b.get_rect().size
+        self.screen.blit(img0b, ((self.screen_x / 2) - (x / 2), self.screen_y / 2 + 80))
 
-            line3 = self.xFont.render(
-                "Above are two drawings of a new figure that is different from the one shown in the first 5 drawings.",
-                1,
-                (0, 0, 0),
-            )
-            self.screen.blit(line3, (100, self.screen_y / 2 + 280))
-            line3a = self.xFont.render(
-                "Satisfy yourself that these two drawings show an object that is different, and cannot be rotated to be identical with the object shown in the first five drawings.",
-                1,
-                (0, 0, 0),
-            )
-            self.screen.blit(line3a, (100, self.screen_y / 2 + 330))
+        display.text(
+            self.screen,
+            self.xFont,
+            "Above are two drawings of a new figure that is different from the one shown in the first 5 drawings.",
+            100,
+            self.screen_y / 2 + 280,
+        )
+        display.text(
+            self.screen,
+            self.xFont,
+            "Satisfy yourself that these two drawings show an object that is different, and cannot be rotated to be identical with the object shown in the first five drawings.",
+            100,
+            self.screen_y / 2 + 330,
+        )
 
-            self.pressSpace(100, self.screen_y / 2 + 400)
+        self.pressSpace(100, self.screen_y / 2 + 400)
 
-            pygame.display.flip()
+        pygame.display.flip()
+        display.wait_for_space()
 
         # page 2 - practice questions
         instructions = True
         practiceCompleted = 0
+        pygame.event.clear()
         while instructions:
             self.screen.blit(self.background, (0, 0))
-            line1 = self.xFont.render("Here are 3 practice questions.", 1, (0, 0, 0))
-            self.screen.blit(line1, (100, self.screen_y / 2 - 450))
-            line2 = self.xFont.render(
+            display.text(
+                self.screen,
+                self.xFont,
+                "Here are 3 practice questions.",
+                100,
+                self.screen_y / 2 - 450,
+            )
+            display.text(
+                self.screen,
+                self.xFont,
                 "For each question, 2 of the 4 pictures show the same object. Click on the 2 matching pictures in each question...",
-                1,
-                (0, 0, 0),
+                100,
+                self.screen_y / 2 - 400,
             )
-            self.screen.blit(line2, (100, self.screen_y / 2 - 400))
 
             self.questionX = self.screen_x / 2 - 500  # question box start X position
             self.answerX = self.screen_x / 2 - 200  # answer boxes start X position
@@ -556,7 +466,7 @@ class MRT(object):
             dButton = []
             # draws image boxes, 3 rows. appends location of boxes, for each row, into lists above
             for i in range(3):
-                imgQ = pygame.image.load(os.path.join(self.imagePath, "p{}q.png".format(i + 1)))
+                imgQ = self.images["p{}q".format(i + 1)]
                 qX, qY = imgQ.get_rect().size
                 qButton.append(
                     (
@@ -568,12 +478,12 @@ class MRT(object):
                     )
                 )
                 self.screen.blit(imgQ, (qButton[i][0][0], qButton[i][0][1]))
-                lineQ = self.xFont.render("Q" + str(i + 1), 1, (0, 0, 0))
+                lineQ = self.labels["Q" + str(i + 1)]
                 self.screen.blit(
                     lineQ, (qButton[i][0][0], qButton[i][0][1] - self.letterOffset)
                 )
 
-                imgA = pygame.image.load(os.path.join(self.imagePath, "p{}a.png".format(i + 1)))
+                imgA = self.images["p{}a".format(i + 1)]
                 aX, aY = imgA.get_rect().size
                 aButton.append(
                     (
@@ -582,12 +492,12 @@ class MRT(object):
                     )
                 )
                 self.screen.blit(imgA, (aButton[i][0][0], aButton[i][0][1]))
-                lineA = self.xFont.render("a", 1, (0, 0, 0))
+                lineA = self.labels["a"]
                 self.screen.blit(
                     lineA, (aButton[i][0][0], aButton[i][0][1] - self.letterOffset)
                 )
 
-                imgB = pygame.image.load(os.path.join(self.imagePath, "p{}b.png".format(i + 1)))
+                imgB = self.images["p{}b".format(i + 1)]
                 bX, bY = imgB.get_rect().size
                 bButton.append(
                     (
@@ -602,12 +512,12 @@ class MRT(object):
                     )
                 )
                 self.screen.blit(imgB, (bButton[i][0][0], bButton[i][0][1]))
-                lineB = self.xFont.render("b", 1, (0, 0, 0))
+                lineB = self.labels["b"]
                 self.screen.blit(
                     lineB, (bButton[i][0][0], bButton[i][0][1] - self.letterOffset)
                 )
 
-                imgC = pygame.image.load(os.path.join(self.imagePath, "p{}c.png".format(i + 1)))
+                imgC = self.images["p{}c".format(i + 1)]
                 cX, cY = imgC.get_rect().size
                 cButton.append(
                     (
@@ -622,12 +532,12 @@ class MRT(object):
                     )
                 )
                 self.screen.blit(imgC, (cButton[i][0][0], cButton[i][0][1]))
-                lineC = self.xFont.render("c", 1, (0, 0, 0))
+                lineC = self.labels["c"]
                 self.screen.blit(
                     lineC, (cButton[i][0][0], cButton[i][0][1] - self.letterOffset)
                 )
 
-                imgD = pygame.image.load(os.path.join(self.imagePath, "p{}d.png".format(i + 1)))
+                imgD = self.images["p{}d".format(i + 1)]
                 dX, dY = imgD.get_rect().size
                 dButton.append(
                     (
@@ -642,7 +552,7 @@ class MRT(object):
                     )
                 )
                 self.screen.blit(imgD, (dButton[i][0][0], dButton[i][0][1]))
-                lineD = self.xFont.render("d", 1, (0, 0, 0))
+                lineD = self.labels["d"]
                 self.screen.blit(
                     lineD, (dButton[i][0][0], dButton[i][0][1] - self.letterOffset)
                 )
@@ -698,199 +608,183 @@ class MRT(object):
                         5,
                     )
 
-            # check answer box clicks
-            (mouseX, mouseY) = pygame.mouse.get_pos()
-            for event in pygame.event.get():
-                if event.type == KEYDOWN and event.key == K_SPACE:
-                    # check all practice questions have been completed before showing answers
-                    if (
-                        0 not in self.practiceAnswers[0]
-                        and 0 not in self.practiceAnswers[1]
-                        and 0 not in self.practiceAnswers[2]
-                    ):
-                        instructions = False
-
-                # stores values/choices into self.practiceAnswers[]. List value is checked when drawing
-                for i in range(3):
-                    if (
-                        event.type == pygame.MOUSEBUTTONUP
-                        and event.button == 1
-                        and mouseX >= aButton[i][0][0]
-                        and mouseX <= aButton[i][1][0]
-                        and mouseY >= aButton[i][0][1]
-                        and mouseY <= aButton[i][1][1]
-                    ):
-                        if self.practiceAnswers[i][0] == 1:
-                            self.practiceAnswers[i][0] = 0
-                        elif self.practiceAnswers[i][1] == 1:
-                            self.practiceAnswers[i][1] = 0
-                        else:
-                            if self.practiceAnswers[i][0] == 0:
-                                self.practiceAnswers[i][0] = 1
-                            elif self.practiceAnswers[i][1] == 0:
-                                self.practiceAnswers[i][1] = 1
-
-                    if (
-                        event.type == pygame.MOUSEBUTTONUP
-                        and event.button == 1
-                        and mouseX >= bButton[i][0][0]
-                        and mouseX <= bButton[i][1][0]
-                        and mouseY >= bButton[i][0][1]
-                        and mouseY <= bButton[i][1][1]
-                    ):
-                        if self.practiceAnswers[i][0] == 2:
-                            self.practiceAnswers[i][0] = 0
-                        elif self.practiceAnswers[i][1] == 2:
-                            self.practiceAnswers[i][1] = 0
-                        else:
-                            if self.practiceAnswers[i][0] == 0:
-                                self.practiceAnswers[i][0] = 2
-                            elif self.practiceAnswers[i][1] == 0:
-                                self.practiceAnswers[i][1] = 2
-
-                    if (
-                        event.type == pygame.MOUSEBUTTONUP
-                        and event.button == 1
-                        and mouseX >= cButton[i][0][0]
-                        and mouseX <= cButton[i][1][0]
-                        and mouseY >= cButton[i][0][1]
-                        and mouseY <= cButton[i][1][1]
-                    ):
-                        if self.practiceAnswers[i][0] == 3:
-                            self.practiceAnswers[i][0] = 0
-                        elif self.practiceAnswers[i][1] == 3:
-                            self.practiceAnswers[i][1] = 0
-                        else:
-                            if self.practiceAnswers[i][0] == 0:
-                                self.practiceAnswers[i][0] = 3
-                            elif self.practiceAnswers[i][1] == 0:
-                                self.practiceAnswers[i][1] = 3
-
-                    if (
-                        event.type == pygame.MOUSEBUTTONUP
-                        and event.button == 1
-                        and mouseX >= dButton[i][0][0]
-                        and mouseX <= dButton[i][1][0]
-                        and mouseY >= dButton[i][0][1]
-                        and mouseY <= dButton[i][1][1]
-                    ):
-                        if self.practiceAnswers[i][0] == 4:
-                            self.practiceAnswers[i][0] = 0
-                        elif self.practiceAnswers[i][1] == 4:
-                            self.practiceAnswers[i][1] = 0
-                        else:
-                            if self.practiceAnswers[i][0] == 0:
-                                self.practiceAnswers[i][0] = 4
-                            elif self.practiceAnswers[i][1] == 0:
-                                self.practiceAnswers[i][1] = 4
-
             self.pressSpace(100, (self.screen_y / 2) + 450)
 
             pygame.display.flip()
 
-        # practise answers
-        answers = True
-        while answers:
-            for event in pygame.event.get():
-                if event.type == KEYDOWN and event.key == K_SPACE:
-                    answers = False
-            # draws a tick next to the correct answers for practice questions
-            imgCorrect = pygame.image.load(os.path.join(self.imagePath, "correct.png"))
-            correctX, correctY = imgCorrect.get_rect().size
-            correctAnswers = [
-                [bButton[0][0], bButton[0][1]],
-                [cButton[0][0], cButton[0][1]],
-                [aButton[1][0], aButton[1][1]],
-                [dButton[1][0], dButton[1][1]],
-                [aButton[2][0], aButton[2][1]],
-                [cButton[2][0], cButton[2][1]],
-            ]
-            for i in range(6):
-                self.screen.blit(
-                    imgCorrect, (correctAnswers[i][0], correctAnswers[i][1])
-                )
+            # check answer box clicks. The page only changes on input, so
+            # sleep until the next event
+            event = pygame.event.wait()
+            display.check_quit(event)
+            (mouseX, mouseY) = pygame.mouse.get_pos()
+            if event.type == KEYDOWN and event.key == K_SPACE:
+                # check all practice questions have been completed before showing answers
+                if (
+                    0 not in self.practiceAnswers[0]
+                    and 0 not in self.practiceAnswers[1]
+                    and 0 not in self.practiceAnswers[2]
+                ):
+                    instructions = False
 
-            pygame.display.flip()
+            # stores values/choices into self.practiceAnswers[]. List value is checked when drawing
+            for i in range(3):
+                if (
+                    event.type == pygame.MOUSEBUTTONUP
+                    and event.button == 1
+                    and mouseX >= aButton[i][0][0]
+                    and mouseX <= aButton[i][1][0]
+                    and mouseY >= aButton[i][0][1]
+                    and mouseY <= aButton[i][1][1]
+                ):
+                    if self.practiceAnswers[i][0] == 1:
+                        self.practiceAnswers[i][0] = 0
+                    elif self.practiceAnswers[i][1] == 1:
+                        self.practiceAnswers[i][1] = 0
+                    else:
+                        if self.practiceAnswers[i][0] == 0:
+                            self.practiceAnswers[i][0] = 1
+                        elif self.practiceAnswers[i][1] == 0:
+                            self.practiceAnswers[i][1] = 1
 
-        # page 3
-        instructions = True
-        while instructions:
-            for event in pygame.event.get():
-                if event.type == KEYDOWN and event.key == K_SPACE:
-                    instructions = False
+                if (
+                    event.type == pygame.MOUSEBUTTONUP
+                    and event.button == 1
+                    and mouseX >= bButton[i][0][0]
+                    and mouseX <= bButton[i][1][0]
+                    and mouseY >= bButton[i][0][1]
+                    and mouseY <= bButton[i][1][1]
+                ):
+                    if self.practiceAnswers[i][0] == 2:
+                        self.practiceAnswers[i][0] = 0
+                    elif self.practiceAnswers[i][1] == 2:
+                        self.practiceAnswers[i][1] = 0
+                    else:
+                        if self.practiceAnswers[i][0] == 0:
+                            self.practiceAnswers[i][0] = 2
+                        elif self.practiceAnswers[i][1] == 0:
+                            self.practiceAnswers[i][1] = 2
 
-            self.screen.blit(self.background, (0, 0))
-            line1 = self.xFont.render(
-                "When you do the test, please remember that for each problem set there are 2, and only 2, figures that match the target figure.",
-                1,
-                (0, 0, 0),
-            )
-            self.screen.blit(line1, (100, self.screen_y / 2 - 200))
+                if (
+                    event.type == pygame.MOUSEBUTTONUP
+                    and event.button == 1
+                    and mouseX >= cButton[i][0][0]
+                    and mouseX <= cButton[i][1][0]
+                    and mouseY >= cButton[i][0][1]
+                    and mouseY <= cButton[i][1][1]
+                ):
+                    if self.practiceAnswers[i][0] == 3:
+                        self.practiceAnswers[i][0] = 0
+                    elif self.practiceAnswers[i][1] == 3:
+                        self.practiceAnswers[i][1] = 0
+                    else:
+                        if self.practiceAnswers[i][0] == 0:
+                            self.practiceAnswers[i][0] = 3
+                        elif self.practiceAnswers[i][1] == 0:
+                            self.practiceAnswers[i][1] = 3
 
-            line2 = self.xFont.render(
-                "You will only be given a point if you mark off BOTH correct matching figures, marking off only one of these will result in no marks.",
-                1,
-                (0, 0, 0),
-            )
-            self.screen.blit(line2, (100, self.screen_y / 2 - 100))
-            line2a = self.xFont.render(
-                "Unlike the practice questions, you WON'T be told what the correct answer is.",
-                1,
-                (0, 0, 0),
-            )
-            self.screen.blit(line2a, (100, self.screen_y / 2))
+                if (
+                    event.type == pygame.MOUSEBUTTONUP
+                    and event.button == 1
+                    and mouseX >= dButton[i][0][0]
+                    and mouseX <= dButton[i][1][0]
+                    and mouseY >= dButton[i][0][1]
+                    and mouseY <= dButton[i][1][1]
+                ):
+                    if self.practiceAnswers[i][0] == 4:
+                        self.practiceAnswers[i][0] = 0
+                    elif self.practiceAnswers[i][1] == 4:
+                        self.practiceAnswers[i][1] = 0
+                    else:
+                        if self.practiceAnswers[i][0] == 0:
+                            self.practiceAnswers[i][0] = 4
+                        elif self.practiceAnswers[i][1] == 0:
+                            self.practiceAnswers[i][1] = 4
 
-            line3 = self.xFont.render(
-                "You will have 3 minutes to complete 12 questions. You may complete them in any order you wish.",
-                1,
-                (0, 0, 0),
-            )
-            self.screen.blit(line3, (100, self.screen_y / 2 + 100))
+        # practise answers
+        # draws a tick next to the correct answers for practice questions
+        imgCorrect = self.images["correct"]
+        correctX, correctY = imgCorrect.get_rect().size
+        correctAnswers = [
+            [bButton[0][0], bButton[0][1]],
+            [cButton[0][0], cButton[0][1]],
+            [aButton[1][0], aButton[1][1]],
+            [dButton[1][0], dButton[1][1]],
+            [aButton[2][0], aButton[2][1]],
+            [cButton[2][0], cButton[2][1]],
+        ]
+        for i in range(6):
+            self.screen.blit(imgCorrect, (correctAnswers[i][0], correctAnswers[i][1]))
 
-            self.pressSpace(100, (self.screen_y / 2) + 300)
+        pygame.display.flip()
+        display.wait_for_space()
 
-            pygame.display.flip()
+        # page 3
+        self.screen.blit(self.background, (0, 0))
+        display.text(
+            self.screen,
+            self.xFont,
+            "When you do the test, please remember that for each problem set there are 2, and only 2, figures that match the target figure.",
+            100,
+            self.screen_y / 2 - 200,
+        )
+        display.text(
+            self.screen,
+            self.xFont,
+            "You will only be given a point if you mark off BOTH correct matching figures, marking off only one of these will result in no marks.",
+            100,
+            self.screen_y / 2 - 100,
+        )
+        display.text(
+            self.screen,
+            self.xFont,
+            "Unlike the practice questions, you WON'T be told what the correct answer is.",
+            100,
+            self.screen_y / 2,
+        )
+        display.text(
+            self.screen,
+            self.xFont,
+            "You will have 3 minutes to complete 12 questions. You may complete them in any order you wish.",
+            100,
+            self.screen_y / 2 + 100,
+        )
 
-        # page 4
-        instructions = True
-        while instructions:
-            for event in pygame.event.get():
-                if event.type == KEYDOWN and event.key == K_SPACE:
-                    instructions = False
+        self.pressSpace(100, (self.screen_y / 2) + 300)
 
-            self.screen.blit(self.background, (0, 0))
-            line1 = self.xFont.render("Ready?", 1, (0, 0, 0))
-            self.screen.blit(line1, (100, self.screen_y / 2))
+        pygame.display.flip()
+        display.wait_for_space()
 
-            self.pressSpace(100, (self.screen_y / 2) + 100)
+        # page 4
+        self.screen.blit(self.background, (0, 0))
+        display.text(self.screen, self.xFont, "Ready?", 100, self.screen_y / 2)
 
-            pygame.display.flip()
+        self.pressSpace(100, (self.screen_y / 2) + 100)
+
+        pygame.display.flip()
+        display.wait_for_space()
 
         # main loop
-        self.mainExperiment(1, self.allData)
+        self.mainExperiment(1, self.results)
 
         # break screen
-        breakScreen = True
-        while breakScreen:
-            for event in pygame.event.get():
-                if event.type == KEYDOWN and event.key == K_SPACE:
-                    breakScreen = False
-
-            self.screen.blit(self.background, (0, 0))
-            text = self.xFont.render(
-                "Take a quick break. We will do another block of 12 questions when you're ready.",
-                1,
-                (0, 0, 0),
-            )
-
-            self.screen.blit(text, (100, self.screen_y / 2))
+        self.screen.blit(self.background, (0, 0))
+        display.text(
+            self.screen,
+            self.xFont,
+            "Take a quick break. We will do another block of 12 questions when you're ready.",
+            100,
+            self.screen_y / 2,
+        )
 
-            self.pressSpace(100, (self.screen_y / 2) + 100)
+        self.pressSpace(100, (self.screen_y / 2) + 100)
 
-            pygame.display.flip()
+        pygame.display.flip()
+        display.wait_for_space()
 
         # second half
-        self.mainExperiment(2, self.allData)
+        self.mainExperiment(2, self.results)
+
+        self.allData = self.results.to_frame(self.allData)
 
         # calculate score
         self.accuracy = []
@@ -926,19 +820,13 @@ class MRT(object):
         self.allData = self.allData[self.columns]
 
         # display end screen
-        instructions = True
-        while instructions:
-            for event in pygame.event.get():
-                if event.type == KEYDOWN and event.key == K_SPACE:
-                    instructions = False
+        self.screen.blit(self.background, (0, 0))
+        display.text(self.screen, self.xFont, "End of task.", 100, self.screen_y / 2)
 
-            self.screen.blit(self.background, (0, 0))
-            endText = self.xFont.render("End of task.", 1, (0, 0, 0))
-            self.screen.blit(endText, (100, self.screen_y / 2))
-
-            self.pressSpace(100, (self.screen_y / 2) + 100)
+        self.pressSpace(100, (self.screen_y / 2) + 100)
 
-            pygame.display.flip()
+        pygame.display.flip()
+        display.wait_for_space()
 
         print("- MRT complete")
 
@@ -7,6 +7,7 @@ from pygame.locals import *
 from os import listdir
 from os.path import join, dirname, realpath, splitext
 from sys import exit
+from utils import assets, clock, display, recorder
 
 
 class Ravens(object):
@@ -32,6 +33,26 @@ class Ravens(object):
         self.stimDuration = 60000
         self.ITI = 1000
 
+        # answer given by each key
+        self.answerKeys = {
+            K_1: "1",
+            K_2: "2",
+            K_3: "3",
+            K_4: "4",
+            K_5: "5",
+            K_6: "6",
+            K_7: "7",
+            K_8: "8",
+        }
+
+        # results recorded during each trial, as (column, dtype, default).
+        # trials without an answer keep "NA" and a missing RT
+        self.resultFields = [
+            ("userAnswer", "O", "NA"),
+            ("correct", "int64", 0),
+            ("RT", "float64", np.nan),
+        ]
+
         # get images
         self.directory = dirname(realpath(__file__))
         self.imagePath = join(self.directory, "images", "Ravens")
@@ -48,23 +69,21 @@ class Ravens(object):
         # only load the desired number/set of images
         self.images = []
         for i in range(start - 1, start + numTrials - 1):
-            self.images.append(pygame.image.load(join(self.imagePath, self.dirImages[i])))
+            self.images.append(assets.image(self.imagePath, self.dirImages[i]))
 
         # get image size
         self.stimH = self.images[0].get_rect().height
         self.stimW = self.images[0].get_rect().width
 
         # load practice image
-        self.practiceImage = pygame.image.load(
-            join(self.imagePath, "practice", "practice.png")
-        )
+        self.practiceImage = assets.image(self.imagePath, "practice", "practice.png")
 
         # load instructions page example images
-        self.img_example = pygame.image.load(join(self.imagePath, "practice", "example.png"))
+        self.img_example = assets.image(self.imagePath, "practice", "example.png")
         self.exampleW = self.img_example.get_rect().width
 
-        self.img_example_answers = pygame.image.load(
-            join(self.imagePath, "practice", "example_answers.png")
+        self.img_example_answers = assets.image(
+            self.imagePath, "practice", "example_answers.png"
         )
         self.exampleAnswersW = self.img_example_answers.get_rect().width
 
@@ -125,7 +144,7 @@ class Ravens(object):
         )
         self.screen.blit(self.space, (x, y))
 
-    def displayTrial(self, i, data, type):
+    def displayTrial(self, i, results, type):
         # clear the event queue before checking for responses
         pygame.event.clear()
 
@@ -134,82 +153,21 @@ class Ravens(object):
         elif type == "practice":
             self.curImage = self.practiceImage
 
-        self.baseTime = int(round(time.time() * 1000))
-        while int(round(time.time() * 1000)) - self.baseTime < self.stimDuration:
-            self.endTime = int(round(time.time() * 1000))
-
-            data.set_value(i, "userAnswer", "NA")
-            data.set_value(i, "RT", "NA")
+        self.baseTime = clock.now()
+        while clock.to_ms(clock.elapsed(self.baseTime)) < self.stimDuration:
+            self.endTime = clock.elapsed(self.baseTime)
 
             for event in pygame.event.get():
                 if event.type == KEYDOWN and event.key == K_F12:
                     pygame.quit()
                     exit()
-                elif event.type == KEYDOWN:
-                    if event.key == K_1:
-                        data.set_value(i, "userAnswer", "1")
-                        data.set_value(
-                            i,
-                            "RT",
-                            str((float(self.endTime) - float(self.baseTime)) / 1000),
-                        )
-                        return 0
-                    elif event.key == K_2:
-                        data.set_value(i, "userAnswer", "2")
-                        data.set_value(
-                            i,
-                            "RT",
-                            str((float(self.endTime) - float(self.baseTime)) / 1000),
-                        )
-                        return 0
-                    elif event.key == K_3:
-                        data.set_value(i, "userAnswer", "3")
-                        data.set_value(
-                            i,
-                            "RT",
-                            str((float(self.endTime) - float(self.baseTime)) / 1000),
-                        )
-                        return 0
-                    elif event.key == K_4:
-                        data.set_value(i, "userAnswer", "4")
-                        data.set_value(
-                            i,
-                            "RT",
-                            str((float(self.endTime) - float(self.baseTime)) / 1000),
-                        )
-                        return 0
-                    elif event.key == K_5:
-                        data.set_value(i, "userAnswer", "5")
-                        data.set_value(
-                            i,
-                            "RT",
-                            str((float(self.endTime) - float(self.baseTime)) / 1000),
-                        )
-                        return 0
-                    elif event.key == K_6:
-                        data.set_value(i, "userAnswer", "6")
-                        data.set_value(
-                            i,
-                            "RT",
-                            str((float(self.endTime) - float(self.baseTime)) / 1000),
-                        )
-                        return 0
-                    elif event.key == K_7:
-                        data.set_value(i, "userAnswer", "7")
-                        data.set_value(
-                            i,
-                            "RT",
-                            str((float(self.endTime) - float(self.baseTime)) / 1000),
-                        )
-                        return 0
-                    elif event.key == K_8:
-                        data.set_value(i, "userAnswer", "8")
-                        data.set_value(
-                            i,
-                            "RT",
-                            str((float(self.endTime) - float(self.baseTime)) / 1000),
-                        )
-                        return 0
+                elif event.type == KEYDOWN and event.key in self.answerKeys:
+                    results.record(
+                        i,
+                        userAnswer=self.answerKeys[event.key],
+                        RT=clock.elapsed(self.baseTime),
+                    )
+                    return 0
 
             self.screen.blit(self.background, (0, 0))
             self.screen.blit(
@@ -220,9 +178,7 @@ class Ravens(object):
                 ),
             )
 
-            self.timeLeft = (
-                self.stimDuration / 1000 - (self.endTime - self.baseTime) / 1000
-            )
+            self.timeLeft = (self.stimDuration - clock.to_ms(self.endTime)) / 1000
             # convert seconds to time format
             self.timer = time.strftime("%M:%S", time.gmtime(self.timeLeft))
 
@@ -329,13 +285,15 @@ class Ravens(object):
                 pygame.display.flip()
 
         # Practice trials
-        self.practiceData = pd.DataFrame()
+        self.practiceData = recorder.TrialRecorder(
+            1, self.resultFields, table="Ravens Matrices", part="practice"
+        )
         self.displayTrial(0, self.practiceData, "practice")
 
         # Practice feedback screen
         self.screen.blit(self.background, (0, 0))
 
-        if self.practiceData.at[0, "userAnswer"] == "2":
+        if self.practiceData["userAnswer"][0] == "2":
             self.feedbackLine = self.instructionsFont.render("Correct", 1, (0, 255, 0))
         else:
             self.feedbackLine = self.instructionsFont.render(
@@ -356,9 +314,7 @@ class Ravens(object):
         pygame.display.flip()
 
         # show feedback screen for 2 seconds
-        self.baseTime = int(round(time.time() * 1000))
-        while int(round(time.time() * 1000)) - self.baseTime < 2000:
-            pass
+        display.wait(2000)
 
         # Instructions Practice End
         self.practiceEndScreen = True
@@ -378,20 +334,25 @@ class Ravens(object):
             pygame.display.flip()
 
         # Main task
+        results = recorder.TrialRecorder(
+            self.numTrials, self.resultFields, table="Ravens Matrices"
+        )
+
         for i in range(self.numTrials):
-            self.displayTrial(i, self.allData, "main")
+            self.displayTrial(i, results, "main")
 
-            if self.allData.at[i, "userAnswer"] == str(
-                self.allData.at[i, "correctAnswer"]
-            ):
-                self.allData.set_value(i, "correct", 1)
+            if results["userAnswer"][i] == str(self.allData.at[i, "correctAnswer"]):
+                results.record(i, correct=1)
             else:
-                self.allData.set_value(i, "correct", 0)
+                results.record(i, correct=0)
 
-            self.baseTime = int(round(time.time() * 1000))
-            while int(round(time.time() * 1000)) - self.baseTime < self.ITI:
-                self.screen.blit(self.background, (0, 0))
-                pygame.display.flip()
+            display.blank_screen(self.screen, self.background, self.ITI)
+
+        self.allData = results.to_frame(self.allData)
+
+        # Convert reaction times to seconds for export. Trials without an
+        # answer keep a missing (NaN) RT, so the column stays numeric
+        self.allData["RT"] = clock.to_ms(self.allData["RT"]) / 1000
 
         # rearrange dataframe
         self.columns = [
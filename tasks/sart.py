@@ -1,23 +1,50 @@
 import os
 import sys
-import time
-import random
 import pandas as pd
+import numpy as np
 import pygame
 
 from pygame.locals import *
-from utils import display
+from utils import assets, clock, display, recorder
+
+STIMSIZES_PT = (48, 72, 94, 100, 120)  # in point
+STIMSIZES_MM = (12, 18, 23, 24, 29)  # in mm from original paper
+
+
+def create_schedule(rng):
+    """Generate the trials of a SART session.
+
+    Parameters:
+    rng -- numpy random Generator used for all random draws
+
+    Returns:
+    schedule -- dict with "practice" and "main" dataframes of trials, with
+        the stimulus number and its font size (pt)
+    """
+    # Practice numbers are fixed, and include two no-go trials
+    practice = pd.DataFrame([5, 7, 7, 3, 9, 2, 1, 3, 8, 6], columns=["stimulus"])
+
+    # Create trial sequence
+    main = pd.DataFrame()
+    main["stimulus"] = rng.permutation(np.tile(np.arange(1, 10), 25))  # Numbers 1-9
+    main.insert(0, "trial", np.arange(1, len(main) + 1))
+
+    # Randomly choose font size for each trial
+    for trials in (practice, main):
+        trials["stimSize"] = rng.choice(STIMSIZES_PT, len(trials))
+
+    return {"practice": practice, "main": main}
 
 
 class SART(object):
-    def __init__(self, screen, background):
+    def __init__(self, screen, background, schedule=None, seed=None):
         # Get the pygame display window
         self.screen = screen
         self.background = background
 
         # Set font and font size
         self.font = pygame.font.SysFont("arial", 30)
-        self.stim_fonts = []
+        self.stim_fonts = {}
 
         # Get screen info
         self.screen_x = self.screen.get_width()
@@ -32,37 +59,47 @@ class SART(object):
         self.BLANK_DURATION = 1000
         self.STIM_DURATION = 250
         self.MASK_DURATION = 900
-        self.STIMSIZES_PT = (48, 72, 94, 100, 120)  # in point
-        self.STIMSIZES_MM = (12, 18, 23, 24, 29)  # in mm from original paper
 
         # Generate font renderers of different sizes
-        for size in self.STIMSIZES_PT:
-            self.stim_fonts.append(pygame.font.SysFont("arial", size))
+        for size in STIMSIZES_PT:
+            self.stim_fonts[size] = pygame.font.SysFont("arial", size)
 
         # Get mask image
         self.base_dir = os.path.dirname(os.path.realpath(__file__))
         self.image_path = os.path.join(self.base_dir, "images", "SART")
 
         # Use the 29mm mask image (as described by Robertson 1997)
-        self.img_mask = pygame.image.load(os.path.join(self.image_path, "mask_29.png"))
-
-        # Create trial sequence
-        self.number_set = list(range(1, 10)) * 25  # Numbers 1-9
-        random.shuffle(self.number_set)
-        self.trial_num = list(range(1, len(self.number_set) + 1))
+        self.img_mask = assets.image(self.image_path, "mask_29.png")
+
+        # Trials are generated here, unless a precompiled schedule is given
+        if schedule is None:
+            schedule = create_schedule(np.random.default_rng(seed))
+        self.schedule = schedule
+
+        # Results recorded during each trial, as (column, dtype, default).
+        # Trials without a key press keep the maximum RT
+        self.RESULT_FIELDS = [
+            ("RT", "int64", clock.from_ms(1150)),
+            ("pollInterval", "float64", np.nan),
+            ("key press", "int64", 0),
+            ("accuracy", "int64", 0),
+        ]
 
         # Create output dataframe
-        self.all_data = pd.DataFrame()
-        self.all_data["trial"] = self.trial_num
-        self.all_data["stimulus"] = self.number_set
+        self.all_data = self.schedule["main"].copy()
+
+    def store_response(self, i, results, start_time, poll_time, last_poll_time):
+        # Store reaction time and poll interval (ns) of a key press event
+        results.record(
+            i,
+            RT=poll_time - start_time,
+            pollInterval=clock.poll_interval(poll_time, last_poll_time),
+        )
 
-    def display_trial(self, i, data):
-        # Randomly choose font size for this trial
-        size_index = random.randint(0, len(self.stim_fonts) - 1)
-        trial_font = self.stim_fonts[size_index]
+    def display_trial(self, i, data, results):
+        trial_font = self.stim_fonts[data["stimSize"][i]]
 
         key_press = 0
-        data.set_value(i, "RT", 1150)
 
         # Display number
         self.screen.blit(self.background, (0, 0))
@@ -76,24 +113,27 @@ class SART(object):
         )
         pygame.display.flip()
 
-        # Get start time in ms
-        start_time = int(round(time.time() * 1000))
+        # Get start time in ns
+        start_time = clock.now()
+        last_poll_time = start_time
 
         # Clear the event queue before checking for responses
         pygame.event.clear()
         wait_response = True
         while wait_response:
+            poll_time = clock.now()
             for event in pygame.event.get():
                 if event.type == KEYDOWN and event.key == K_SPACE:
                     key_press = 1
-                    data.set_value(i, "RT", int(round(time.time() * 1000)) - start_time)
+                    self.store_response(
+                        i, results, start_time, poll_time, last_poll_time
+                    )
                 elif event.type == KEYDOWN and event.key == K_F12:
                     sys.exit(0)
-
-            end_time = int(round(time.time() * 1000))
+            last_poll_time = poll_time
 
             # Stop this loop if stim duration has passed
-            if end_time - start_time >= self.STIM_DURATION:
+            if clock.to_ms(clock.elapsed(start_time)) >= self.STIM_DURATION:
                 wait_response = False
 
         # Display mask
@@ -103,20 +143,24 @@ class SART(object):
 
         wait_response = True
         while wait_response:
+            poll_time = clock.now()
             for event in pygame.event.get():
                 if event.type == KEYDOWN and event.key == K_SPACE:
                     if key_press == 0:
                         key_press = 1
-                        data.set_value(
-                            i, "RT", int(round(time.time() * 1000)) - start_time
+                        self.store_response(
+                            i,
+                            results,
+                            start_time,
+                            poll_time,
+                            last_poll_time,
                         )
                 elif event.type == KEYDOWN and event.key == K_F12:
                     sys.exit(0)
-
-            end_time = int(round(time.time() * 1000))
+            last_poll_time = poll_time
 
             # Stop this loop if mask duration has passed
-            if end_time - start_time >= self.MASK_DURATION:
+            if clock.to_ms(clock.elapsed(start_time)) >= self.MASK_DURATION:
                 wait_response = False
 
         # Check if response is correct
@@ -131,10 +175,9 @@ class SART(object):
             else:
                 accuracy = 1
 
-        # Store key press data in dataframe
-        data.set_value(i, "key press", key_press)
-        data.set_value(i, "accuracy", accuracy)
-        data.set_value(i, "stimSize", self.STIMSIZES_PT[size_index])
+        # Store key press data. The "key press" column name is not a valid
+        # keyword, so it is passed in a dict
+        results.record(i, accuracy=accuracy, **{"key press": key_press})
 
     def run(self):
         # Instructions
@@ -215,12 +258,14 @@ class SART(object):
         display.blank_screen(self.screen, self.background, self.BLANK_DURATION)
 
         # Show practice trials
-        practice_trials = pd.DataFrame(
-            [5, 7, 7, 3, 9, 2, 1, 3, 8, 6], columns=["stimulus"]
+        practice_trials = self.schedule["practice"]
+
+        practice_results = recorder.TrialRecorder(
+            practice_trials.shape[0], self.RESULT_FIELDS, table="SART", part="practice"
         )
 
         for i in range(practice_trials.shape[0]):
-            self.display_trial(i, practice_trials)
+            self.display_trial(i, practice_trials, practice_results)
 
         # Practice end screen
         self.screen.blit(self.background, (0, 0))
@@ -254,13 +299,31 @@ class SART(object):
         display.blank_screen(self.screen, self.background, self.BLANK_DURATION)
 
         # Show main trials
+        results = recorder.TrialRecorder(
+            self.all_data.shape[0], self.RESULT_FIELDS, table="SART"
+        )
+
         for i in range(self.all_data.shape[0]):
-            self.display_trial(i, self.all_data)
+            self.display_trial(i, self.all_data, results)
+
+        self.all_data = results.to_frame(self.all_data)
 
         # Rearrange dataframe
-        columns = ["trial", "stimulus", "stimSize", "RT", "key press", "accuracy"]
+        columns = [
+            "trial",
+            "stimulus",
+            "stimSize",
+            "RT",
+            "pollInterval",
+            "key press",
+            "accuracy",
+        ]
         self.all_data = self.all_data[columns]
 
+        # Convert reaction times to ms for export
+        self.all_data["RT"] = clock.to_ms(self.all_data["RT"])
+        self.all_data["pollInterval"] = clock.to_ms(self.all_data["pollInterval"])
+
         # End screen
         self.screen.blit(self.background, (0, 0))
         display.text(
@@ -0,0 +1,214 @@
+import numpy as np
+import pandas as pd
+
+from tasks import ant, digitspan_backwards, flanker, sart, sternberg
+from utils import schedule
+
+# Every task in the battery, by task list name
+TASKS = [
+    "Attention Network Test (ANT)",
+    "Digit Span (backwards)",
+    "Eriksen Flanker Task",
+    "Mental Rotation Task",
+    "Raven's Progressive Matrices",
+    "Sternberg Task",
+    "Sustained Attention to Response Task (SART)",
+]
+
+# Schedule name of each task with randomized trials, by task list name.
+# Schedule names also select each task's random stream, so never change them
+SCHEDULED_TASKS = {
+    "Attention Network Test (ANT)": "ANT",
+    "Digit Span (backwards)": "Digit span (backwards)",
+    "Eriksen Flanker Task": "Eriksen Flanker",
+    "Sternberg Task": "Sternberg",
+    "Sustained Attention to Response Task (SART)": "SART",
+}
+
+
+def compile_session(
+    seed,
+    sub_num,
+    ant_blocks=3,
+    flanker_sets_practice=3,
+    flanker_sets_main=25,
+    flanker_blocks=1,
+    sternberg_blocks=2,
+):
+    """Generate the trials of every task for a subject.
+
+    Each task's trials are drawn from its own random stream for the subject,
+    so the session is reproduced exactly from the project seed and subject
+    number.
+
+    Parameters:
+    seed -- project seed (integer)
+    sub_num -- subject number
+    ant_blocks -- number of ANT main blocks
+    flanker_sets_practice -- number of Flanker sets per practice block
+    flanker_sets_main -- number of Flanker sets per main block
+    flanker_blocks -- total number of Flanker main blocks
+    sternberg_blocks -- number of Sternberg main blocks
+
+    Returns:
+    schedules -- dict of task schedules, by the schedule names in
+        SCHEDULED_TASKS
+    """
+    return {
+        "ANT": ant.create_schedule(schedule.stream(seed, sub_num, "ANT"), ant_blocks),
+        "Digit span (backwards)": digitspan_backwards.create_schedule(
+            schedule.stream(seed, sub_num, "Digit span (backwards)")
+        ),
+        "Eriksen Flanker": flanker.create_schedule(
+            schedule.stream(seed, sub_num, "Eriksen Flanker"),
+            flanker_sets_practice,
+            flanker_sets_main,
+            flanker_blocks,
+        ),
+        "Sternberg": sternberg.create_schedule(
+            schedule.stream(seed, sub_num, "Sternberg"), sternberg_blocks
+        ),
+        "SART": sart.create_schedule(schedule.stream(seed, sub_num, "SART")),
+    }
+
+
+def check_balance(name, trials, factors, levels, repeats):
+    """Check that every block has each combination of factor levels equally.
+
+    Parameters:
+    name -- name of the trials, used in messages
+    trials -- dataframe of trials, with a "block" column
+    factors -- list of factor column names
+    levels -- list of the levels of each factor
+    repeats -- number of times each combination should appear per block
+
+    Returns:
+    problems -- list of messages, empty if the trials are balanced
+    """
+    counts = trials.groupby(["block"] + factors).size()
+    cells = pd.MultiIndex.from_product(
+        [trials["block"].unique()] + [list(x) for x in levels],
+        names=["block"] + factors,
+    )
+    counts = counts.reindex(cells, fill_value=0)
+
+    unbalanced = counts[counts != repeats]
+    return [
+        "%s: block %s, %s appears %d times, not %d"
+        % (name, cell[0], "/".join(str(x) for x in cell[1:]), count, repeats)
+        for cell, count in unbalanced.items()
+    ]
+
+
+def check_session(
+    schedules,
+    ant_blocks=3,
+    flanker_sets_practice=3,
+    flanker_sets_main=25,
+    flanker_blocks=1,
+    sternberg_blocks=2,
+):
+    """Check that a subject's schedules match the task designs.
+
+    Parameters:
+    schedules -- dict of task schedules, as returned by compile_session()
+    ant_blocks, ... -- task options the schedules were compiled with, as
+        passed to compile_session()
+
+    Returns:
+    problems -- list of messages, empty if all schedules are valid
+    """
+    problems = []
+
+    # ANT: every congruency x cue x location x direction cell twice per block.
+    # Practice is a single block of half the cells
+    ant_levels = [
+        ant.CONGRUENCY_LEVELS,
+        ant.CUE_LEVELS,
+        ant.LOCATION_LEVELS,
+        ant.DIRECTION_LEVELS,
+    ]
+    ant_factors = ["congruency", "cue", "location", "direction"]
+    problems += check_balance(
+        "ANT", schedules["ANT"]["main"], ant_factors, ant_levels, 2
+    )
+
+    practice = schedules["ANT"]["practice"]
+    if practice.duplicated(ant_factors).any():
+        problems.append("ANT: practice has repeated trials")
+    if len(practice) != len(ant.COMBINATIONS) // 2:
+        problems.append("ANT: practice has %d trials" % len(practice))
+
+    if schedules["ANT"]["main"]["block"].nunique() != ant_blocks:
+        problems.append("ANT: not %d blocks" % ant_blocks)
+
+    # Flanker: every congruency x direction cell once per set
+    flanker_levels = [flanker.CONGRUENCY_LEVELS, flanker.DIRECTION_LEVELS]
+    flanker_factors = ["congruency", "direction"]
+    problems += check_balance(
+        "Flanker practice",
+        schedules["Eriksen Flanker"]["practice"],
+        flanker_factors,
+        flanker_levels,
+        flanker_sets_practice,
+    )
+    problems += check_balance(
+        "Flanker",
+        schedules["Eriksen Flanker"]["main"],
+        flanker_factors,
+        flanker_levels,
+        flanker_sets_main,
+    )
+
+    if schedules["Eriksen Flanker"]["main"]["block"].nunique() != flanker_blocks:
+        problems.append("Flanker: not %d blocks" % flanker_blocks)
+
+    # Sternberg: every set size x probe type cell 6 (practice) or 12 times,
+    # with sets of distinct digits that contain present probes only
+    sternberg_levels = [sternberg.SET_SIZE, sternberg.PROBE_TYPE]
+    sternberg_factors = ["setSize", "probeType"]
+    problems += check_balance(
+        "Sternberg practice",
+        schedules["Sternberg"]["practice"],
+        sternberg_factors,
+        sternberg_levels,
+        6,
+    )
+    problems += check_balance(
+        "Sternberg",
+        schedules["Sternberg"]["main"],
+        sternberg_factors,
+        sternberg_levels,
+        12,
+    )
+
+    for part, trials in schedules["Sternberg"].items():
+        sets = trials["set"].astype(str)
+        probes = trials["probe"].astype(str)
+
+        if (sets.str.len() != trials["setSize"]).any():
+            problems.append("Sternberg %s: set lengths do not match" % part)
+        if (sets.map(lambda x: len(set(x))) != sets.str.len()).any():
+            problems.append("Sternberg %s: sets with repeated digits" % part)
+
+        present = [p in s for s, p in zip(sets, probes)]
+        if (np.array(present) != (trials["probeType"] == "present")).any():
+            problems.append("Sternberg %s: probes do not match probe type" % part)
+
+    if schedules["Sternberg"]["main"]["block"].nunique() != sternberg_blocks:
+        problems.append("Sternberg: not %d blocks" % sternberg_blocks)
+
+    # SART: every digit 25 times
+    counts = schedules["SART"]["main"]["stimulus"].value_counts()
+    if len(counts) != 9 or (counts != 25).any():
+        problems.append("SART: digits do not each appear 25 times")
+
+    # Digit span: each length twice, with distinct digits
+    sequences = schedules["Digit span (backwards)"]["main"]["sequence"].astype(str)
+    lengths = schedules["Digit span (backwards)"]["main"]["length"]
+    if (sequences.str.len() != lengths).any():
+        problems.append("Digit span: sequence lengths do not match")
+    if (sequences.map(lambda x: len(set(x))) != lengths).any():
+        problems.append("Digit span: sequences with repeated digits")
+
+    return problems
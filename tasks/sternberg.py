@@ -1,17 +1,99 @@
 import os
 import sys
-import random
-import time
 import pandas as pd
+import numpy as np
 import pygame
 
 from pygame.locals import *
 from itertools import product
-from utils import display
+from utils import assets, clock, display, recorder
+
+STIM_SET = list(range(10))
+SET_SIZE = (2, 6)
+PROBE_TYPE = ("present", "absent")
+
+# Create condition combinations
+COMBINATIONS = list(product(SET_SIZE, PROBE_TYPE))
+
+
+def create_trials(rng, repeats, num_blocks=1):
+    """Generate the trials of one or more blocks.
+
+    Parameters:
+    rng -- numpy random Generator used for all random draws
+    repeats -- number of times each condition combination is repeated
+        within a block
+    num_blocks -- number of blocks to generate
+
+    Returns:
+    trials -- dataframe with one row per trial, with the block number,
+        set size, probe type, memory set and probe. Trials are in a random
+        order within each block
+    """
+    num_digits = len(STIM_SET)
+    block_size = len(COMBINATIONS) * repeats
+    num_trials = block_size * num_blocks
+
+    # Condition of every trial, shuffled within each block
+    conditions = np.tile(np.arange(len(COMBINATIONS)), (num_blocks, repeats))
+    conditions = rng.permuted(conditions, axis=1).ravel()
+
+    set_size = np.array([x[0] for x in COMBINATIONS])[conditions]
+    probe_type = np.array([x[1] for x in COMBINATIONS])[conditions]
+
+    # Each trial gets a random ordering of all digits. The memory set is
+    # its first setSize digits, and the remaining digits are unused
+    digits = rng.permuted(
+        np.tile(np.array(STIM_SET, dtype=np.uint8), (num_trials, 1)), axis=1
+    )
+
+    # Probe will be from/in the set 50% of the time (probe present)
+    probe_index = np.where(
+        probe_type == "present",
+        rng.integers(0, set_size),
+        rng.integers(set_size, num_digits),
+    )
+    probe = digits[np.arange(num_trials), probe_index]
+
+    # Digits as strings, with each trial's full ordering in one string
+    orderings = (digits + ord("0")).view("S%d" % num_digits).ravel().astype(str)
+    block = np.repeat(np.arange(1, num_blocks + 1), block_size)
+
+    return pd.DataFrame(
+        {
+            "block": block.astype(str),
+            "setSize": set_size,
+            "probeType": probe_type,
+            "set": [x[:n] for x, n in zip(orderings, set_size)],
+            "probe": probe.astype(str),
+        }
+    )
+
+
+def create_schedule(rng, blocks=2):
+    """Generate the trials of a Sternberg session.
+
+    Parameters:
+    rng -- numpy random Generator used for all random draws
+    blocks -- number of main blocks
+
+    Returns:
+    schedule -- dict with "practice" and "main" dataframes of trials
+    """
+    # Create practice trials
+    # This gives 24 practice trials
+    practice = create_trials(rng, 6)
+    practice["block"] = ""
+
+    # Create main trial blocks
+    # This creates 48 trials per block
+    main = create_trials(rng, 12, blocks)
+
+    return {"practice": practice, "main": main}
 
 
 class Sternberg(object):
-    def __init__(self, screen, background, blocks=2):
+    def __init__(self, screen, background, blocks=2, schedule=None, seed=None):
         # Get the pygame display window
         self.screen = screen
         self.background = background
@@ -33,18 +115,12 @@ class Sternberg(object):
         self.base_dir = os.path.dirname(os.path.realpath(__file__))
         self.image_path = os.path.join(self.base_dir, "images", "Sternberg")
 
-        self.img_left = pygame.image.load(
-            os.path.join(self.image_path, "left_arrow.png")
-        )
-
-        self.img_right = pygame.image.load(
-            os.path.join(self.image_path, "right_arrow.png")
-        )
+        self.img_left = assets.image(self.image_path, "left_arrow.png")
+        self.img_right = assets.image(self.image_path, "right_arrow.png")
 
         # Experiment options
         # Timings are taken from Sternberg (1966)
         # Block sizes are taken from Martins (2012)
-        self.NUM_BLOCKS = blocks
         self.STIM_DURATION = 1200
         self.BETWEEN_STIM_DURATION = 250
         self.PROBE_WARN_DURATION = 2000
@@ -52,72 +128,28 @@ class Sternberg(object):
         self.FEEDBACK_DURATION = 1000
         self.ITI = 1500
 
-        self.STIM_SET = list(range(10))
-        self.SET_SIZE = (2, 6)
-        self.PROBE_TYPE = ("present", "absent")
-
-        # Create condition combinations
-        self.combinations = list(product(self.SET_SIZE, self.PROBE_TYPE))
-
-        # Create practice trials
-        # This gives 24 practice trials
-        self.practice_combinations = self.combinations * 6
-        random.shuffle(self.practice_combinations)
-        self.practice_trials = self.create_trials(self.practice_combinations)
-
-        # Create main trial blocks
-        self.blocks = []  # List will contain a dataframe for each block
-
-        for i in range(self.NUM_BLOCKS):
-            # This creates 48 trials per block
-            block_combinations = self.combinations * 12
-            random.shuffle(block_combinations)
-
-            block = self.create_trials(block_combinations)
-            block["block"] = str(i + 1)  # Store the block number
-            self.blocks.append(block)
-
-    def create_trials(self, combinations):
-        df = pd.DataFrame(combinations, columns=("setSize", "probeType"))
-
-        for i, r in df.iterrows():
-            # Store the current used set
-            used_set = random.sample(self.STIM_SET, r["setSize"])
-            unused_set = list(set(self.STIM_SET) - set(used_set))
-
-            df.set_value(i, "set", "".join(str(x) for x in used_set))
-
-            # Store the target probe number
-            # Probe will be from/in the set 50% of the time (probe present)
-            if r["probeType"] == "present":
-                df.set_value(i, "probe", str(random.choice(used_set)))
-            else:
-                df.set_value(i, "probe", str(random.choice(unused_set)))
-
-            # Store blank columns to be used later
-            df["trialNum"] = ""
-            df["block"] = ""
-            df["response"] = ""
-            df["RT"] = ""
-            df["correct"] = ""
-
-            # Rearrange the dataframe
-            columns = [
-                "trialNum",
-                "block",
-                "setSize",
-                "probeType",
-                "set",
-                "probe",
-                "response",
-                "RT",
-                "correct",
-            ]
-            df = df[columns]
-
-        return df
-
-    def display_trial(self, df, i, r, trial_type):
+        # Results recorded during each trial, as (column, dtype, default)
+        self.RESULT_FIELDS = [
+            ("response", "O", ""),
+            ("RT", "int64", 0),
+            ("pollInterval", "float64", np.nan),
+            ("correct", "int64", 0),
+        ]
+
+        # Trials are generated here, unless a precompiled schedule is given.
+        # The same seed always gives the same trials
+        if schedule is None:
+            schedule = create_schedule(np.random.default_rng(seed), blocks)
+        self.schedule = schedule
+
+        self.practice_trials = self.schedule["practice"]
+        self.blocks = [
+            block.reset_index(drop=True)
+            for _, block in self.schedule["main"].groupby("block", sort=False)
+        ]
+        self.NUM_BLOCKS = len(self.blocks)
+
+    def display_trial(self, df, results, i, r, trial_type):
         # Clear screen
         self.screen.blit(self.background, (0, 0))
         pygame.display.flip()
@@ -150,7 +182,7 @@ class Sternberg(object):
                 self.screen_y / 2 + 150,
             )
 
-            yes_text = self.font.render("(yes)", 1, (0, 0, 0))
+            yes_text = display.text_cache.render(self.font, "(yes)")
             display.text(
                 self.screen,
                 self.font,
@@ -166,7 +198,7 @@ class Sternberg(object):
                 self.screen_y / 2 + 150,
             )
 
-            no_text = self.font.render("(no)", 1, (0, 0, 0))
+            no_text = display.text_cache.render(self.font, "(no)")
             display.text(
                 self.screen,
                 self.font,
@@ -177,31 +209,36 @@ class Sternberg(object):
 
         pygame.display.flip()
 
-        start_time = int(round(time.time() * 1000))
+        start_time = clock.now()
+        last_poll_time = start_time
+        response = ""
+        poll_interval = np.nan
 
         # Clear the event queue before checking for responses
         pygame.event.clear()
         wait_response = True
         while wait_response:
+            poll_time = clock.now()
             for event in pygame.event.get():
-                if event.type == KEYDOWN and event.key == K_LEFT:
-                    df.set_value(i, "response", "present")
-                    wait_response = False
-                elif event.type == KEYDOWN and event.key == K_RIGHT:
-                    df.set_value(i, "response", "absent")
+                if event.type == KEYDOWN and event.key in (K_LEFT, K_RIGHT):
+                    response = "present" if event.key == K_LEFT else "absent"
+                    response_time = poll_time
+                    poll_interval = clock.poll_interval(poll_time, last_poll_time)
+                    rt = response_time - start_time
                     wait_response = False
+                    break
                 elif event.type == KEYDOWN and event.key == K_F12:
                     sys.exit(0)
-
-            end_time = int(round(time.time() * 1000))
+            last_poll_time = poll_time
 
             # If time limit has been reached, consider it a missed trial
-            if end_time - start_time >= self.PROBE_DURATION:
-                wait_response = False
+            if wait_response:
+                rt = clock.elapsed(start_time)
+                if clock.to_ms(rt) >= self.PROBE_DURATION:
+                    wait_response = False
 
-        # Store RT
-        rt = int(round(time.time() * 1000)) - start_time
-        df.set_value(i, "RT", rt)
+        # Store response, RT and poll interval (ns)
+        results.record(i, response=response, RT=rt, pollInterval=poll_interval)
 
         # Display blank screen
         display.blank_screen(self.screen, self.background, self.BETWEEN_STIM_DURATION)
@@ -209,19 +246,19 @@ class Sternberg(object):
         # Display feedback
         self.screen.blit(self.background, (0, 0))
 
-        if rt >= self.PROBE_DURATION:
-            df.set_value(i, "correct", 0)
+        if clock.to_ms(rt) >= self.PROBE_DURATION:
+            results.record(i, correct=0)
             display.text(
                 self.screen, self.font, "too slow", "center", "center", (255, 165, 0)
             )
         else:
-            if df["probeType"][i] == df["response"][i]:
-                df.set_value(i, "correct", 1)
+            if df["probeType"][i] == response:
+                results.record(i, correct=1)
                 display.text(
                     self.screen, self.font, "correct", "center", "center", (0, 255, 0)
                 )
             else:
-                df.set_value(i, "correct", 0)
+                results.record(i, correct=0)
                 display.text(
                     self.screen, self.font, "incorrect", "center", "center", (255, 0, 0)
                 )
@@ -321,8 +358,15 @@ class Sternberg(object):
         display.wait_for_space()
 
         # Practice trials
+        practice_results = recorder.TrialRecorder(
+            self.practice_trials.shape[0],
+            self.RESULT_FIELDS,
+            table="Sternberg",
+            part="practice",
+        )
+
         for i, r in self.practice_trials.iterrows():
-            self.display_trial(self.practice_trials, i, r, "practice")
+            self.display_trial(self.practice_trials, practice_results, i, r, "practice")
 
         # Main trials ready screen
         self.screen.blit(self.background, (0, 0))
@@ -358,8 +402,17 @@ class Sternberg(object):
 
         # Main trials
         for i, block in enumerate(self.blocks):
+            results = recorder.TrialRecorder(
+                block.shape[0],
+                self.RESULT_FIELDS,
+                table="Sternberg",
+                part="block %d" % (i + 1),
+            )
+
             for j, r in block.iterrows():
-                self.display_trial(block, j, r, "main")
+                self.display_trial(block, results, j, r, "main")
+
+            self.blocks[i] = results.to_frame(block)
 
             # If this is not the final block, show instructions for next block
             if i != len(self.blocks) - 1:
@@ -387,8 +440,12 @@ class Sternberg(object):
         display.wait_for_space()
 
         # Concatenate blocks and add trial numbers
-        all_data = pd.concat(self.blocks)
-        all_data["trialNum"] = list(range(1, len(all_data) + 1))
+        all_data = pd.concat(self.blocks, ignore_index=True)
+        all_data.insert(0, "trialNum", list(range(1, len(all_data) + 1)))
+
+        # Convert reaction times to ms for export
+        all_data["RT"] = clock.to_ms(all_data["RT"])
+        all_data["pollInterval"] = clock.to_ms(all_data["pollInterval"])
 
         print("- Sternberg Task complete")
 
@@ -0,0 +1,171 @@
+import os
+import sys
+import numpy as np
+import pandas as pd
+import pytest
+
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..")
+sys.path.append(ROOT)
+sys.path.append(os.path.join(ROOT, "analysis"))
+
+import analysis
+import engine
+
+SUBJECTS = ["1", "2", "3", "4"]
+
+# Flanker compatibility levels each subject did. Subjects 2 and 3 only did
+# one of them
+FLANKER_LEVELS = {
+    "1": ["compatible", "incompatible"],
+    "2": ["compatible"],
+    "3": ["incompatible"],
+    "4": ["compatible", "incompatible"],
+}
+
+
+def trials(rng, n, accuracy="correct", **factors):
+    # Trials with random levels of each factor, RTs and accuracy
+    df = pd.DataFrame({name: rng.choice(levels, n) for name, levels in factors.items()})
+    df["RT"] = rng.integers(250, 1200, n).astype(float)
+    df[accuracy] = (rng.random(n) < 0.8).astype(int)
+    return df
+
+
+def cohort():
+    # Task data of a small cohort, by task and subject number
+    rng = np.random.default_rng(0)
+    data = {"ANT": {}, "Sternberg": {}, "Eriksen Flanker": {}, "SART": {}}
+
+    for sub_num in SUBJECTS:
+        data["ANT"][sub_num] = trials(
+            rng,
+            96,
+            congruency=engine.ANT_CONGRUENCY_LEVELS,
+            cue=engine.ANT_CUE_LEVELS,
+        )
+        data["Sternberg"][sub_num] = trials(rng, 48, setSize=engine.STERNBERG_SET_SIZES)
+        data["Eriksen Flanker"][sub_num] = pd.concat(
+            [
+                trials(
+                    rng,
+                    40,
+                    compatibility=[x],
+                    congruency=engine.FLANKER_CONGRUENCY_LEVELS,
+                )
+                for x in FLANKER_LEVELS[sub_num]
+            ],
+            ignore_index=True,
+        )
+
+        sart = trials(rng, 60, accuracy="accuracy", stimulus=list(range(1, 10)))
+        sart["key press"] = (rng.random(60) < 0.5).astype(int)
+        # No RT when there was no key press
+        sart.loc[sart["key press"] == 0, "RT"] = np.nan
+        data["SART"][sub_num] = sart
+
+    return data
+
+
+COHORT = cohort()
+
+
+def flanker_row(df, sub_num, response_type):
+    # analysis.aggregate_flanker() only has the columns of the levels the
+    # subject did. The engine has missing values for the others
+    row = analysis.aggregate_flanker(df, sub_num, response_type)
+    if FLANKER_LEVELS[sub_num] == ["compatible"]:
+        row += [np.nan] * 13
+    elif FLANKER_LEVELS[sub_num] == ["incompatible"]:
+        row = row[:1] + [np.nan] * 13 + row[1:]
+    return row
+
+
+def check_rows(expected, results):
+    assert results["sub_num"].astype(str).tolist() == SUBJECTS
+
+    expected = pd.DataFrame(expected).iloc[:, 1:].to_numpy(float)
+    np.testing.assert_allclose(
+        results.iloc[:, 1:].to_numpy(float), expected, rtol=1e-9, equal_nan=True
+    )
+
+
+@pytest.mark.parametrize("response_type", engine.RESPONSE_TYPES)
+@pytest.mark.parametrize(
+    "task, aggregate",
+    [
+        ("ANT", analysis.aggregate_ant),
+        ("Sternberg", analysis.aggregate_sternberg),
+        ("Eriksen Flanker", flanker_row),
+    ],
+)
+def test_matches_per_subject_analysis(task, aggregate, response_type):
+    subjects = COHORT[task]
+    results = engine.AGGREGATORS[task](engine.combine(subjects), response_type)
+
+    check_rows(
+        [aggregate(df, sub_num, response_type) for sub_num, df in subjects.items()],
+        results,
+    )
+
+
+def test_all_response_types_at_once():
+    data = engine.combine(COHORT["ANT"])
+    results = engine.aggregate_ant(data, engine.RESPONSE_TYPES)
+
+    # One row per subject and response type, in the order they were given
+    assert results["response_type"].tolist() == engine.RESPONSE_TYPES * len(SUBJECTS)
+
+    for response_type in engine.RESPONSE_TYPES:
+        single = engine.aggregate_ant(data, response_type)
+        rows = results[results["response_type"] == response_type]
+        pd.testing.assert_frame_equal(
+            rows[single.columns].reset_index(drop=True), single
+        )
+
+
+def test_sart_matches_per_subject_analysis():
+    subjects = COHORT["SART"]
+    results = engine.aggregate_sart(engine.combine(subjects))
+
+    check_rows(
+        [analysis.aggregate_sart(df, sub_num) for sub_num, df in subjects.items()],
+        results,
+    )
+
+
+def test_describe_matches_pandas():
+    df = COHORT["ANT"]["1"]
+    table = engine.describe(df, [], "cue")
+    grouped = df.groupby("cue")
+
+    np.testing.assert_allclose(table["mean"], grouped["RT"].mean()[table.index])
+    np.testing.assert_allclose(table["sd"], grouped["RT"].std()[table.index])
+    assert table["correct"].tolist() == grouped["correct"].sum()[table.index].tolist()
+
+
+def ols(df, factor, reference, level):
+    # Parameters and standard errors of RT ~ C(factor, Treatment(reference))
+    df = df[df[factor].isin([reference, level])]
+    x = np.column_stack([np.ones(len(df)), df[factor] == level])
+    y = df["RT"].to_numpy()
+
+    params, residual_ss = np.linalg.lstsq(x, y, rcond=None)[:2]
+    covariance = residual_ss[0] / (len(y) - 2) * np.linalg.inv(x.T @ x)
+
+    return params, np.sqrt(np.diag(covariance))
+
+
+def test_contrast_matches_ols():
+    data = engine.combine(COHORT["ANT"])
+    fits = engine.contrast(engine.describe(data, ["sub_num"], "cue"), "double", "nocue")
+
+    for sub_num, df in COHORT["ANT"].items():
+        params, se = ols(df, "cue", "double", "nocue")
+        fit = fits.loc[sub_num]
+
+        np.testing.assert_allclose([fit["intercept"], fit["slope"]], params)
+        np.testing.assert_allclose([fit["intercept_se"], fit["slope_se"]], se)
+
+        # A table without keys gives the same fit
+        single = engine.contrast(engine.describe(df, [], "cue"), "double", "nocue")
+        np.testing.assert_allclose(single[fit.index], fit)
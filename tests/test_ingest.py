@@ -0,0 +1,78 @@
+import multiprocessing
+import os
+import sys
+import pandas as pd
+import pytest
+
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..")
+sys.path.append(ROOT)
+sys.path.append(os.path.join(ROOT, "analysis"))
+
+import ingest
+from utils import output
+
+EXAMPLE = os.path.join(ROOT, "data", "data_example.xls")
+
+
+def test_read_sessions_matches_read_excel():
+    pytest.importorskip("xlrd")
+
+    results = list(ingest.read_sessions([EXAMPLE], workers=2))
+    assert len(results) == 1
+
+    path, data, seconds, error = results[0]
+    assert path == EXAMPLE
+    assert error is None
+
+    expected = pd.read_excel(EXAMPLE, None, converters={"sub_num": str})
+    assert sorted(data) == sorted(expected)
+    for name, df in expected.items():
+        pd.testing.assert_frame_equal(data[name], df)
+
+
+def fake_read_session(path, tables=None):
+    # Kills the worker process reading a "crash" path
+    if path == "crash":
+        os._exit(1)
+    return {"path": path}
+
+
+@pytest.mark.skipif(
+    multiprocessing.get_start_method() != "fork",
+    reason="Workers only see the fake reader when they are forked",
+)
+def test_read_sessions_survives_dead_worker(monkeypatch):
+    monkeypatch.setattr(output, "read_session", fake_read_session)
+
+    paths = ["a", "crash", "b", "c"]
+    results = {
+        path: (data, error)
+        for path, data, seconds, error in ingest.read_sessions(
+            paths, workers=1, max_pending=1
+        )
+    }
+
+    assert sorted(results) == sorted(paths)
+    assert results["crash"][0] is None
+    assert "BrokenProcessPool" in results["crash"][1]
+    for path in ["a", "b", "c"]:
+        assert results[path] == ({"path": path}, None)
+
+
+def test_read_sessions_writes_excel_views(tmp_path):
+    pytest.importorskip("pyarrow")
+    pytest.importorskip("openpyxl")
+
+    info = pd.DataFrame({"sub_num": ["1"], "condition": [1]})
+    path = output.session_path(str(tmp_path), "1_1", "parquet")
+    output.write_session(path, {"info": info}, "parquet")
+
+    results = list(ingest.read_sessions([path], workers=1, excel=True))
+    assert results[0][3] is None
+    assert os.path.isfile(path + ".xlsx")
+
+    # The Excel view is not a session of its own
+    assert ingest.session_paths(str(tmp_path)) == [path]
+    pd.testing.assert_frame_equal(
+        output.read_session(path + ".xlsx")["info"], info, check_dtype=False
+    )
@@ -0,0 +1,125 @@
+import datetime
+import os
+import sys
+import numpy as np
+import pandas as pd
+import pytest
+
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+from utils import journal, output
+
+
+def test_trial_values_round_trip(tmp_path):
+    path = str(tmp_path / "1_1.journal")
+    session_journal = journal.Journal(path)
+    session_journal.trial(
+        "Sternberg",
+        "block 1",
+        0,
+        {
+            "RT": np.int64(512000000),
+            "correct": np.bool_(True),
+            "response": "present",
+            "pollInterval": np.nan,
+            "stimulus": (1, 2),
+            "date": datetime.date(2026, 1, 2),
+        },
+    )
+    assert session_journal.close() is None
+    session_journal.release()
+
+    records = journal.read(path)
+    assert len(records) == 1
+
+    values = records[0]["values"]
+    assert values["RT"] == 512000000
+    assert values["correct"] is True
+    assert values["response"] == "present"
+    assert np.isnan(values["pollInterval"])
+    assert values["stimulus"] == [1, 2]
+
+    # Values JSON can't hold are kept as text, instead of stopping the journal
+    assert values["date"] == "2026-01-02"
+
+
+def test_release_unregisters_exit_handler(tmp_path, monkeypatch):
+    handlers = []
+    monkeypatch.setattr(journal.atexit, "register", handlers.append)
+    monkeypatch.setattr(journal.atexit, "unregister", handlers.remove)
+
+    session_journal = journal.Journal(str(tmp_path / "1_1.journal"))
+    assert handlers == [session_journal.release]
+
+    session_journal.release()
+    assert handlers == []
+
+
+def crashed_session(path):
+    # Journal of a session that crashed during Ravens, after the info table
+    session_journal = journal.Journal(path)
+    session_journal.table("info", pd.DataFrame({"sub_num": ["7"], "age": [20]}))
+    session_journal.trial("Ravens Matrices", "main", 0, {"userAnswer": "3"})
+    session_journal.trial("Ravens Matrices", "main", 0, {"RT": 1500000000})
+    session_journal.trial("Ravens Matrices", "main", 1, {"userAnswer": "NA"})
+    session_journal.trial("ANT", "main block 1", 0, {"RT": 512000000})
+    session_journal.close()
+
+    # A crash can leave the last line partly written
+    with open(path, "a") as f:
+        f.write('{"type": "trial", "table": "AN')
+
+    return session_journal
+
+
+def test_partial_tables_are_recovered(tmp_path):
+    session_journal = crashed_session(str(tmp_path / "7_1.journal"))
+    session_journal.release()
+
+    tables = journal.tables(journal.read(session_journal.path))
+    assert sorted(tables) == ["ANT partial", "Ravens Matrices partial", "info"]
+    assert tables["info"].to_dict("list") == {"sub_num": ["7"], "age": [20]}
+
+    # Trials recorded in several parts are merged, and times are in the
+    # units of the task's data
+    ravens = tables["Ravens Matrices partial"]
+    assert ravens[["part", "trial", "userAnswer"]].values.tolist() == [
+        ["main", 1, "3"],
+        ["main", 2, "NA"],
+    ]
+    assert ravens.loc[0, "RT"] == 1.5
+    assert np.isnan(ravens.loc[1, "RT"])
+    assert tables["ANT partial"].loc[0, "RT"] == 512
+
+
+def test_locked_journals_are_skipped(tmp_path):
+    path = str(tmp_path / "7_1.journal")
+    session_journal = journal.Journal(path)
+
+    # Another station can't open or recover the journal while it is in use
+    assert not journal.Lock(path).acquire()
+    with pytest.raises(OSError):
+        journal.Journal(path)
+
+    # Once released, it can be recovered
+    session_journal.release()
+    lock = journal.Lock(path)
+    assert lock.acquire()
+    lock.release()
+    assert not os.path.exists(path + ".lock")
+
+
+def test_compact_saves_the_session(tmp_path):
+    formats = output.available_formats()
+    if not formats:
+        pytest.skip("No output format is installed")
+
+    path = str(tmp_path / "7_1.journal")
+    crashed_session(path).release()
+
+    output_path = output.session_path(str(tmp_path), "7_1", formats[0])
+    journal.compact(path, output_path, formats[0])
+
+    data = output.read_session(output_path)
+    assert sorted(data) == ["ANT partial", "Ravens Matrices partial", "info"]
+    assert data["Ravens Matrices partial"]["RT"].tolist()[0] == 1.5
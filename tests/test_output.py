@@ -0,0 +1,104 @@
+import os
+import sys
+import numpy as np
+import pandas as pd
+import pytest
+
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..")
+sys.path.append(ROOT)
+sys.path.append(os.path.join(ROOT, "analysis"))
+
+import engine
+from utils import output
+
+
+def ravens_frame(rts, correct):
+    # Ravens sheet as read back from a workbook: unanswered trials have "NA"
+    # in the RT column, so the column holds text and numbers
+    n = len(rts)
+    return pd.DataFrame(
+        {
+            "trial": list(range(1, n + 1)),
+            "image": ["%d.png" % x for x in range(n)],
+            "correctAnswer": [3] * n,
+            "userAnswer": ["3" if x else "NA" for x in correct],
+            "correct": correct,
+            "RT": rts,
+        },
+        dtype=object,
+    )
+
+
+def test_typed_keeps_missing_numbers_numeric():
+    df = output.typed(ravens_frame(["NA", 1.5, 2.0], [0, 1, 1]))
+
+    assert pd.api.types.is_float_dtype(df["RT"])
+    assert np.isnan(df.loc[0, "RT"])
+    assert df.loc[1:, "RT"].tolist() == [1.5, 2.0]
+
+
+def test_typed_keeps_digit_text():
+    df = output.typed(pd.DataFrame({"sequence": ["0531", "12", "NA"]}, dtype=object))
+
+    assert not pd.api.types.is_numeric_dtype(df["sequence"])
+    assert df.loc[0, "sequence"] == "0531"
+
+
+def test_ravens_round_trip():
+    subjects = {
+        "1": output.typed(ravens_frame(["NA", 1.5, 2.0], [0, 1, 1])),
+        "2": output.typed(ravens_frame([4.0, "NA", "NA"], [1, 0, 0])),
+    }
+
+    results = engine.aggregate_ravens(engine.combine(subjects)).set_index("sub_num")
+
+    assert results.loc["1", "ravens_rt"] == 1.75
+    assert results.loc["2", "ravens_rt"] == 4.0
+    assert results.loc["1", "ravens_count"] == 2
+    assert results.loc["2", "ravens_prop"] == 1 / 3
+
+
+def installed(packages, monkeypatch):
+    # Pretend only these packages are installed
+    def find_spec(name):
+        return object() if name in packages else None
+
+    monkeypatch.setattr(output.importlib.util, "find_spec", find_spec)
+
+
+def test_default_format_is_available(monkeypatch):
+    installed(["pyarrow", "openpyxl"], monkeypatch)
+    assert output.default_format() == "parquet"
+
+    installed(["openpyxl"], monkeypatch)
+    assert output.available_formats() == ["xlsx"]
+    assert output.default_format() == "xlsx"
+
+
+def test_write_session_needs_package(monkeypatch, tmp_path):
+    installed([], monkeypatch)
+
+    with pytest.raises(ImportError, match="openpyxl"):
+        output.write_session(
+            str(tmp_path / "1_1.xlsx"), {"info": pd.DataFrame()}, "xlsx"
+        )
+    with pytest.raises(ValueError):
+        output.write_session(str(tmp_path / "1_1.xls"), {"info": pd.DataFrame()}, "xls")
+
+
+@pytest.mark.parametrize("output_format", output.FORMATS)
+def test_session_round_trip(output_format, tmp_path):
+    if output_format not in output.available_formats():
+        pytest.skip("%s is not installed" % output.FORMAT_PACKAGES[output_format])
+
+    tables = {
+        "info": pd.DataFrame({"sub_num": ["007"], "condition": [1]}),
+        "Ravens Matrices": ravens_frame([np.nan, 1.5, 2.0], [0, 1, 1]),
+    }
+    path = output.session_path(str(tmp_path), "007_1", output_format)
+    output.write_session(path, tables, output_format)
+
+    data = output.read_session(path)
+    assert sorted(data) == sorted(tables)
+    assert data["info"].loc[0, "sub_num"] == "007"
+    assert data["Ravens Matrices"]["RT"].tolist()[1:] == [1.5, 2.0]
@@ -0,0 +1,81 @@
+import json
+import os
+import sys
+import pytest
+
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+from utils import projects
+
+# Names whose case insensitive order differs between ASCII and Unicode case
+# folding, and names that only differ in case
+NAMES = ["Zoë", "émile", "Émilie", "alice", "Alice", "bob", "Ölaf"]
+
+
+def test_store_sorts_by_sort_key(tmp_path):
+    store = projects.ProjectStore(str(tmp_path))
+    for i, name in enumerate(NAMES):
+        store.add(name, "%s project" % name, str(tmp_path / str(i)))
+    store.add("bob", "Beta", str(tmp_path / "beta"))
+    store.add("bob", "alpha", str(tmp_path / "alpha"))
+    store.add("bob", "ALPHA", str(tmp_path / "ALPHA"))
+
+    assert store.researchers() == sorted(NAMES, key=projects.sort_key)
+    assert [name for researcher, name in store.projects("bob")] == [
+        "ALPHA",
+        "alpha",
+        "Beta",
+        "bob project",
+    ]
+
+
+def test_model_inserts_where_the_store_lists(tmp_path):
+    pytest.importorskip("PyQt5")
+    from interface import project_model
+
+    store = projects.ProjectStore(str(tmp_path))
+    store.add("alice", "first", str(tmp_path / "first"))
+    model = project_model.ProjectModel(store)
+
+    for name in NAMES:
+        store.add(name, "%s project" % name, str(tmp_path / name))
+        model.add_project(name, "%s project" % name)
+
+    shown = [model.root.children[i].name for i in range(model.rowCount())]
+    assert shown == store.researchers()
+
+
+def test_add_get_and_delete(tmp_path):
+    store = projects.ProjectStore(str(tmp_path))
+
+    assert store.add("alice", "Stroop", str(tmp_path / "stroop"))
+    # Project names are unique across researchers
+    assert not store.add("bob", "Stroop", str(tmp_path / "other"))
+
+    # Projects are shared with other stations through the database
+    project = projects.ProjectStore(str(tmp_path)).get("Stroop")
+    assert project["researcher"] == "alice"
+    assert project["path"] == str(tmp_path / "stroop")
+    assert "Stroop" in store and "stroop" not in store
+
+    store.delete("Stroop")
+    assert store.get("Stroop") is None
+    assert store.researchers() == []
+
+
+def test_project_list_is_imported_once(tmp_path):
+    project_list = {
+        "alice": {"Stroop": {"created": 1.0, "path": "/data/stroop"}},
+        "bob": {"Flanker": {"created": 2.0, "path": "/data/flanker"}},
+    }
+    with open(str(tmp_path / "projects.txt"), "w") as f:
+        json.dump(project_list, f)
+
+    store = projects.ProjectStore(str(tmp_path))
+    assert store.projects() == [("alice", "Stroop"), ("bob", "Flanker")]
+    assert store.get("Flanker")["created"] == 2.0
+    assert store.projects(text="flank") == [("bob", "Flanker")]
+
+    # Deleted projects don't come back when the store is opened again
+    store.delete("Stroop")
+    assert projects.ProjectStore(str(tmp_path)).projects() == [("bob", "Flanker")]
@@ -0,0 +1,66 @@
+import os
+import sys
+import numpy as np
+import pandas as pd
+
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+from utils import journal, recorder
+
+FIELDS = [
+    ("response", "O", "NA"),
+    ("correct", "int64", 0),
+    ("RT", "int64", 0),
+    ("pollInterval", "float64", np.nan),
+]
+
+
+def test_results_round_trip():
+    results = recorder.TrialRecorder(3, FIELDS)
+    results.record(0, response="left", correct=1, RT=512000000)
+    results.record(2, response="right", RT=700000000)
+    results.record(2, pollInterval=1000000.0)
+
+    design = pd.DataFrame({"trial": [1, 2, 3], "correct": ["x", "y", "z"]})
+    data = results.to_frame(design)
+
+    # Recorded columns are added, replacing design columns of the same name
+    assert data.columns.tolist() == [
+        "trial",
+        "correct",
+        "response",
+        "RT",
+        "pollInterval",
+    ]
+    assert data["response"].tolist() == ["left", "NA", "right"]
+    assert data["correct"].tolist() == [1, 0, 0]
+    assert data["RT"].tolist() == [512000000, 0, 700000000]
+    assert data["pollInterval"].isna().tolist() == [True, True, False]
+
+    # The design itself is not changed
+    assert design["correct"].tolist() == ["x", "y", "z"]
+
+
+def test_results_are_journaled(tmp_path):
+    path = str(tmp_path / "1_1.journal")
+    session_journal = journal.start(path)
+    try:
+        results = recorder.TrialRecorder(2, FIELDS, table="ANT", part="main block 1")
+        results.record(1, response="left", RT=512000000)
+
+        # Recorders without a table are not journaled
+        recorder.TrialRecorder(1, FIELDS).record(0, response="right")
+    finally:
+        journal.stop()
+        session_journal.release()
+
+    records = journal.read(path)
+    assert records == [
+        {
+            "type": "trial",
+            "table": "ANT",
+            "part": "main block 1",
+            "trial": 1,
+            "values": {"response": "left", "RT": 512000000},
+        }
+    ]
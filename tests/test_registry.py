@@ -0,0 +1,54 @@
+import os
+import sys
+
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+from utils import registry
+
+
+def test_register_and_complete(tmp_path):
+    data_dir = tmp_path / "data"
+    data_dir.mkdir()
+    subjects = registry.SubjectRegistry(str(tmp_path), str(data_dir))
+
+    assert len(subjects) == 0
+    assert subjects.register(7, 1, str(data_dir / "7_1.xlsx"), ["ANT", "SART"])
+    # The same subject number can't be registered twice
+    assert not subjects.register("7", 2, str(data_dir / "7_2.xlsx"), ["ANT"])
+
+    subjects.set_completed(7, ["ANT"])
+
+    # Entries are shared with other stations through the database
+    reopened = registry.SubjectRegistry(str(tmp_path), str(data_dir))
+    assert len(reopened) == 1
+    assert "7" in reopened and 7 in reopened and "8" not in reopened
+    assert reopened.get(8) is None
+
+    entry = reopened.get(7)
+    assert entry["condition"] == "1"
+    assert entry["file"] == str(data_dir / "7_1.xlsx")
+    assert entry["tasks"] == "ANT, SART"
+    assert entry["completed"] == "ANT"
+
+
+def test_new_registry_imports_existing_data(tmp_path):
+    data_dir = tmp_path / "data"
+    (data_dir / "2_1").mkdir(parents=True)
+    (data_dir / "1_2.xlsx").write_bytes(b"")
+    # Journals of unfinished sessions and other files aren't sessions
+    (data_dir / "4_1.journal").write_bytes(b"")
+    (data_dir / "4_1.journal.lock").write_bytes(b"")
+    (data_dir / "5_1.txt").write_bytes(b"")
+    (data_dir / "notes.xlsx").write_bytes(b"")
+
+    subjects = registry.SubjectRegistry(str(tmp_path), str(data_dir))
+
+    assert len(subjects) == 2
+    assert subjects.get(1)["condition"] == "2"
+    assert subjects.get(1)["file"] == str(data_dir / "1_2.xlsx")
+    assert subjects.get(2)["file"] == str(data_dir / "2_1")
+    assert subjects.get(2)["tasks"] is None
+
+    # Existing registries don't import again
+    (data_dir / "3_1.xlsx").write_bytes(b"")
+    assert 3 not in registry.SubjectRegistry(str(tmp_path), str(data_dir))
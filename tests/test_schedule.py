@@ -0,0 +1,94 @@
+import io
+import itertools
+import os
+import sys
+import pandas as pd
+import pytest
+
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+from utils import schedule
+
+SEED = 123456789012345678901234567890
+
+SCHEDULES = {
+    "ANT": {
+        "practice": pd.DataFrame({"block": [0, 0], "cue": ["nocue", "double"]}),
+        "main": pd.DataFrame({"block": [1, 1, 2], "cue": ["center", "spatial", "x"]}),
+    },
+    "Sternberg": {"main": pd.DataFrame({"setSize": [2, 6], "probe": [0.5, 1.5]})},
+}
+
+
+def check_schedules(loaded):
+    assert sorted(loaded) == sorted(SCHEDULES)
+    for task, parts in SCHEDULES.items():
+        assert sorted(loaded[task]) == sorted(parts)
+        for part, trials in parts.items():
+            pd.testing.assert_frame_equal(loaded[task][part], trials, check_dtype=False)
+
+
+def test_streams_are_reproducible():
+    first = schedule.stream(SEED, "7", "ANT").random(5)
+
+    assert (schedule.stream(SEED, "7", "ANT").random(5) == first).all()
+    assert (schedule.stream(SEED, "7", "SART").random(5) != first).all()
+    assert (schedule.stream(SEED, "007", "ANT").random(5) != first).all()
+    assert (schedule.stream(SEED + 1, "7", "ANT").random(5) != first).all()
+
+    tasks = ["ANT", "MRT", "SART", "Sternberg"]
+    order = schedule.task_order(SEED, "7", tasks)
+    assert order == schedule.task_order(SEED, "7", tasks)
+    assert sorted(order) == sorted(tasks)
+
+
+@pytest.mark.parametrize("num_tasks", [2, 3, 4, 7])
+def test_counterbalanced_orders_are_balanced(num_tasks):
+    tasks = ["task %d" % x for x in range(num_tasks)]
+    orders = schedule.counterbalanced_orders(tasks)
+
+    # Every task in every position equally often
+    for position in range(num_tasks):
+        counts = pd.Series([order[position] for order in orders]).value_counts()
+        assert sorted(counts.index) == tasks
+        assert counts.nunique() == 1
+
+    # Every task immediately follows every other task equally often
+    pairs = pd.Series(
+        [pair for order in orders for pair in zip(order, order[1:])]
+    ).value_counts()
+    assert len(pairs) == num_tasks * (num_tasks - 1)
+    assert pairs.nunique() == 1
+
+
+def test_schedule_file_round_trip():
+    options = {"ant_blocks": 2, "sternberg_blocks": 1}
+    f = io.BytesIO()
+    schedule.save(f, SCHEDULES, options)
+
+    f.seek(0)
+    check_schedules(schedule.load(f))
+    f.seek(0)
+    assert schedule.load_options(f) == options
+
+
+def test_archive_round_trip(tmp_path):
+    options = {"ant_blocks": 2}
+    tasks = ["ANT", "Sternberg"]
+    sessions = []
+    for sub_num, order in zip(["1", "2"], itertools.permutations(tasks)):
+        f = io.BytesIO()
+        schedule.save(f, SCHEDULES, options)
+        sessions.append((sub_num, order, f.getvalue()))
+
+    path = str(tmp_path / "schedule_archive.bin")
+    schedule.write_archive(path, SEED, sessions, tasks, options)
+
+    with schedule.ScheduleArchive(path) as archive:
+        assert archive.seed == SEED
+        assert archive.tasks == tasks
+        assert archive.options == options
+        assert len(archive) == 2
+        assert "2" in archive and 2 in archive and "3" not in archive
+        assert archive.task_order("2") == ["Sternberg", "ANT"]
+        check_schedules(archive.load("1"))
@@ -0,0 +1,42 @@
+import os
+import sys
+import numpy as np
+import pandas as pd
+import pygame
+import pytest
+
+os.environ["SDL_VIDEODRIVER"] = "dummy"
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+from utils import recorder, scheduler
+
+
+@pytest.fixture
+def screen():
+    pygame.display.init()
+    yield pygame.display.set_mode((64, 64))
+    pygame.display.quit()
+
+
+def test_onsets_are_recorded_with_the_trials(screen):
+    fields = scheduler.onset_fields(["cue", "target"])
+    results = recorder.TrialRecorder(2, fields)
+    timeline = scheduler.Scheduler()
+
+    for trial in range(2):
+        timeline.flip(trial * 20, "cue", results, trial, block=1)
+        timeline.flip(trial * 20 + 10, "target", results, trial, block=1)
+
+    data = results.to_frame(pd.DataFrame({"trial": [1, 2]}))
+    assert data["cueOnset"].tolist() == [0, 20]
+    assert data["targetOnset"].tolist() == [10, 30]
+
+    # Frames are never shown early, and the error is what the frame was late by
+    assert (data["targetOnsetActual"] >= data["targetOnset"]).all()
+    np.testing.assert_allclose(
+        data["targetOnsetError"], data["targetOnsetActual"] - data["targetOnset"]
+    )
+
+    report = timeline.report()
+    assert report["phase"].tolist() == ["cue", "target"] * 2
+    assert report["trial"].tolist() == [0, 0, 1, 1]
@@ -0,0 +1,97 @@
+import os
+import pygame
+
+from pygame.locals import *
+from utils import clock
+
+
+class AssetManager(object):
+    """Cache of images loaded during a session.
+
+    Each image is loaded from disk once and converted to the pixel format of
+    the display, so blitting it later needs no per-pixel conversion. Tasks
+    that ask for the same file get the same surface back.
+    """
+
+    def __init__(self):
+        self.images = {}
+        self.stats = {}
+
+    def image(self, path):
+        """Get an image surface, loading it on first use.
+
+        The display mode must be set before calling this, as the image is
+        converted to the display pixel format.
+
+        Parameters:
+        path -- path to the image file
+
+        Returns:
+        img -- pygame surface containing the image
+        """
+        path = os.path.realpath(path)
+
+        try:
+            return self.images[path]
+        except KeyError:
+            pass
+
+        start_time = clock.now()
+        img = pygame.image.load(path)
+
+        # Keep per-pixel transparency for images that have it
+        if img.get_flags() & SRCALPHA:
+            img = img.convert_alpha()
+        else:
+            img = img.convert()
+
+        self.images[path] = img
+        self.stats[path] = {
+            "load_ms": clock.to_ms(clock.elapsed(start_time)),
+            "bytes": img.get_pitch() * img.get_height(),
+        }
+
+        return img
+
+    def report(self):
+        """Get load time and memory use of each loaded image.
+
+        Returns:
+        report -- list of dicts with the path, load time (ms) and surface
+            size (bytes) of each image, slowest to load first
+        """
+        report = [dict(path=path, **stats) for path, stats in self.stats.items()]
+        return sorted(report, key=lambda x: x["load_ms"], reverse=True)
+
+    def summary(self):
+        """Get a one line summary of the images loaded so far."""
+        total_ms = sum(x["load_ms"] for x in self.stats.values())
+        total_bytes = sum(x["bytes"] for x in self.stats.values())
+
+        return "%d images, %.1f MB, loaded in %.1f ms" % (
+            len(self.images),
+            total_bytes / 1024 / 1024,
+            total_ms,
+        )
+
+    def clear(self):
+        """Remove all cached images.
+
+        Must be called before pygame.quit(), as the cached surfaces are no
+        longer valid once the display is closed.
+        """
+        self.images.clear()
+        self.stats.clear()
+
+
+# Single manager shared by all tasks in the process
+manager = AssetManager()
+
+
+def image(*path):
+    """Get an image surface from the shared asset manager.
+
+    Parameters:
+    path -- path to the image file. Multiple parts are joined with os.path.join
+    """
+    return manager.image(os.path.join(*path))
@@ -0,0 +1,71 @@
+import time
+
+NS_PER_MS = 1000000
+
+
+def now():
+    """Get the current time.
+
+    Uses a monotonic, high resolution clock so times are unaffected by
+    system clock adjustments (e.g. NTP).
+
+    Returns:
+    time_ns -- current time in integer nanoseconds
+    """
+    return time.perf_counter_ns()
+
+
+def elapsed(start):
+    """Get the time elapsed since a previous clock reading.
+
+    Parameters:
+    start -- earlier reading from now(), in nanoseconds
+
+    Returns:
+    elapsed_ns -- elapsed time in integer nanoseconds
+    """
+    return now() - start
+
+
+def to_ms(ns):
+    """Convert nanoseconds to (fractional) milliseconds.
+
+    Only used when data is exported, so stored times keep full precision.
+
+    Parameters:
+    ns -- time in nanoseconds. Can be a number or a pandas/numpy array
+
+    Returns:
+    ms -- time in milliseconds
+    """
+    return ns / NS_PER_MS
+
+
+def from_ms(ms):
+    """Convert milliseconds to integer nanoseconds.
+
+    Parameters:
+    ms -- time in milliseconds
+
+    Returns:
+    ns -- time in integer nanoseconds
+    """
+    return int(round(ms * NS_PER_MS))
+
+
+def poll_interval(poll_time, last_poll_time):
+    """Get the interval between two reads of the event queue.
+
+    pygame 2 key events carry no timestamp, so an event is placed at the time
+    the event queue was read. It occurred at some point since the previous
+    read, so the poll interval is the upper bound of how late the event's
+    time is. It is not a measured input latency.
+
+    Parameters:
+    poll_time -- time (ns) the event queue was read
+    last_poll_time -- time (ns) the event queue was previously read
+
+    Returns:
+    interval_ns -- interval between the two reads in nanoseconds
+    """
+    return poll_time - last_poll_time
@@ -1,8 +1,103 @@
 import sys
-import time
+import collections
 import pygame
 
 from pygame.locals import *
+from utils import clock
+
+# Time (ms) before a deadline at which waits stop sleeping and start polling
+SPIN_THRESHOLD = 2
+
+# Default memory limit (bytes) of the rendered text cache
+TEXT_CACHE_LIMIT = 16 * 1024 * 1024
+
+# Refresh rate (Hz) assumed when the display cannot report its own
+DEFAULT_REFRESH_RATE = 60
+
+
+class TextCache(object):
+    """Least recently used cache of rendered text surfaces.
+
+    Surfaces are keyed by (font, text, colour, antialias). Font objects are
+    created for a specific typeface and size, so the font covers both. Once
+    the total size of the cached surfaces exceeds the memory limit, the least
+    recently used surfaces are dropped.
+    """
+
+    def __init__(self, limit=TEXT_CACHE_LIMIT):
+        self.limit = limit
+        self.surfaces = collections.OrderedDict()
+        self.size = 0
+        self.hits = 0
+        self.misses = 0
+
+    def render(self, font, text_string, colour=(0, 0, 0), antialias=1):
+        """Get a rendered text surface, rendering it only if not cached.
+
+        Parameters:
+        font -- pygame font object (pygame.font.SysFont(...))
+        text_string -- text string to be rendered
+        colour -- tuple containing (Red, Green, Blue) colour values (0-255)
+        antialias -- whether the text should be antialiased
+
+        Returns:
+        surface -- pygame surface containing the rendered text
+        """
+        key = (font, text_string, tuple(colour), antialias)
+
+        try:
+            surface = self.surfaces[key]
+        except KeyError:
+            pass
+        else:
+            self.hits += 1
+            self.surfaces.move_to_end(key)
+            return surface
+
+        self.misses += 1
+        surface = font.render(text_string, antialias, colour)
+
+        # Match the display pixel format so blitting is cheap
+        if pygame.display.get_surface() is not None:
+            surface = surface.convert_alpha()
+
+        surface_size = surface.get_pitch() * surface.get_height()
+        if surface_size <= self.limit:
+            self.surfaces[key] = surface
+            self.size += surface_size
+            self.trim()
+
+        return surface
+
+    def set_limit(self, limit):
+        """Set the memory limit of the cache.
+
+        Parameters:
+        limit -- maximum total size of cached surfaces in bytes
+        """
+        self.limit = limit
+        self.trim()
+
+    def trim(self):
+        # Drop least recently used surfaces until under the memory limit
+        while self.size > self.limit:
+            _, surface = self.surfaces.popitem(last=False)
+            self.size -= surface.get_pitch() * surface.get_height()
+
+    def clear(self):
+        """Remove all cached surfaces and reset the hit/miss counters.
+
+        Must be called before pygame.quit(), as cached surfaces and fonts are
+        no longer valid once pygame is closed.
+        """
+        self.surfaces.clear()
+        self.size = 0
+        self.hits = 0
+        self.misses = 0
+
+
+# Text cache shared by all tasks
+text_cache = TextCache()
 
 
 def blank_screen(screen, background, duration):
@@ -57,11 +152,11 @@ def text(screen, font, text_string, x, y, colour=(0, 0, 0)):
         text. Defaults to black (0,0,0)
     """
 
-    # Duck typing to check whether we received a string or pygame text surface
-    try:
-        text_object = font.render(text_string, 1, colour)  # Assume string
-    except TypeError:
-        text_object = text_string  # Already a pygame surface
+    # Check whether we received a string or pygame text surface
+    if isinstance(text_string, pygame.Surface):
+        text_object = text_string
+    else:
+        text_object = text_cache.render(font, text_string, colour)
 
     mid_x = screen.get_width() / 2
     mix_y = screen.get_height() / 2
@@ -90,20 +185,58 @@ def text_space(screen, font, x, y, colour=(0, 0, 0)):
     text(screen, font, "(press space to continue)", x, y, colour=colour)
 
 
+def refresh_rate():
+    """Get the refresh rate of the display in Hz.
+
+    Falls back to DEFAULT_REFRESH_RATE if the rate cannot be queried (e.g.
+    pygame versions without get_desktop_refresh_rates).
+    """
+    try:
+        rates = pygame.display.get_desktop_refresh_rates()
+    except (AttributeError, pygame.error):
+        return DEFAULT_REFRESH_RATE
+
+    if rates and rates[0] > 0:
+        return rates[0]
+    return DEFAULT_REFRESH_RATE
+
+
 def wait(duration):
     """Wait for a certain amount of time before proceeding.
 
+    The wait sleeps until the last few milliseconds before the deadline and
+    only spins for the remainder, so the CPU is mostly idle while waiting.
+
     Parameters:
     duration -- duration of the wait in milliseconds
     """
     pygame.event.clear()  # Clear any events in the queue
 
-    start_time = int(round(time.time() * 1000))
-    while (int(round(time.time() * 1000)) - start_time) < duration:
-        for event in pygame.event.get():
-            # Battery will quit if F12 is pressed while waiting
-            if event.type == KEYDOWN and event.key == K_F12:
-                sys.exit(0)
+    wait_until(clock.now() + clock.from_ms(duration))
+
+
+def wait_until(deadline):
+    """Wait until an absolute deadline has been reached.
+
+    Events are waited on (rather than polled) until SPIN_THRESHOLD
+    milliseconds before the deadline, after which the event queue is polled
+    continuously so the deadline is not overshot by the OS scheduler.
+
+    Parameters:
+    deadline -- deadline in nanoseconds, on the utils.clock clock
+    """
+    while True:
+        remaining = clock.to_ms(deadline - clock.now())
+        if remaining <= 0:
+            break
+
+        if remaining > SPIN_THRESHOLD + 1:
+            # Sleep until woken by an event or until close to the deadline
+            event = pygame.event.wait(int(remaining - SPIN_THRESHOLD))
+            check_quit(event)
+        else:
+            for event in pygame.event.get():
+                check_quit(event)
 
 
 def wait_for_space():
@@ -116,8 +249,19 @@ def wait_for_space():
 
     waiting = True
     while waiting:
-        for event in pygame.event.get():
-            if event.type == KEYDOWN and event.key == K_SPACE:
-                waiting = False
-            elif event.type == KEYDOWN and event.key == K_F12:
-                sys.exit(0)
+        # Block until the next event arrives
+        event = pygame.event.wait()
+        if event.type == KEYDOWN and event.key == K_SPACE:
+            waiting = False
+        else:
+            check_quit(event)
+
+
+def check_quit(event):
+    """Exit the battery if the `Quit` key (F12) was pressed.
+
+    Parameters:
+    event -- pygame event object to check
+    """
+    if event.type == KEYDOWN and event.key == K_F12:
+        sys.exit(0)
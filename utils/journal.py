@@ -0,0 +1,373 @@
+import atexit
+import json
+import os
+import queue
+import threading
+import numpy as np
+import pandas as pd
+
+from utils import clock, output
+
+try:
+    import fcntl
+except ImportError:
+    # Windows
+    fcntl = None
+    import msvcrt
+
+# Journal the trial recorders write to, if a session is being journaled
+active = None
+
+# Trial results recorded in nanoseconds. Partial tables are converted to the
+# units of the tasks' exported data: milliseconds, or seconds for the tables
+# in SECONDS_TABLES
+TIME_COLUMNS = ["RT", "pollInterval"]
+SECONDS_TABLES = ["Ravens Matrices"]
+
+
+def to_json(value):
+    # numpy scalars are not JSON serializable, but convert to python values.
+    # Anything else is stored as text, so an odd value can never stop the
+    # writer thread
+    if isinstance(value, np.generic):
+        return value.item()
+
+    return str(value)
+
+
+class Lock(object):
+    """Exclusive lock on a journal, held by the station writing it.
+
+    The lock is an OS lock on a "<journal>.lock" file, so it is released if
+    the station's battery crashes, and is seen by other stations sharing the
+    data directory. A journal whose lock can be taken was left behind by a
+    session that did not finish, and can be recovered.
+    """
+
+    def __init__(self, journal_path):
+        self.path = journal_path + ".lock"
+        self.file = None
+
+    def acquire(self):
+        """Take the lock, without waiting.
+
+        Returns:
+        acquired -- False if another process holds the lock
+        """
+        self.file = open(self.path, "a")
+        try:
+            if fcntl is not None:
+                fcntl.flock(self.file.fileno(), fcntl.LOCK_EX | fcntl.LOCK_NB)
+            else:
+                self.file.seek(0)
+                msvcrt.locking(self.file.fileno(), msvcrt.LK_NBLCK, 1)
+        except OSError:
+            self.file.close()
+            self.file = None
+            return False
+
+        return True
+
+    def release(self):
+        """Release the lock, and remove the lock file if it is not in use."""
+        if self.file is None:
+            return
+
+        if fcntl is None:
+            self.file.seek(0)
+            msvcrt.locking(self.file.fileno(), msvcrt.LK_UNLCK, 1)
+        self.file.close()
+        self.file = None
+
+        try:
+            os.remove(self.path)
+        except OSError:
+            pass
+
+
+class Journal(object):
+    """Append-only record of a session's data, written as the session runs.
+
+    Each record is one line of JSON. Trial results are appended as they are
+    recorded, and each task's full data once the task is done. Lines are
+    written through to the OS immediately, so they survive a crash of the
+    battery, and synced to disk every few records, so at most the last few
+    trials are lost if the computer itself fails.
+
+    Records are written by a background thread, so a slow disk (e.g. a
+    network drive) never holds up a task. Records are written in the order
+    they were appended. If writing fails, the error is kept in `error` and
+    no further records are written, so the journal never has gaps.
+
+    The journal is locked (see Lock) from when it is opened until release()
+    is called, so other stations don't recover it while the session runs or
+    while its data is being saved.
+
+    After the session, compact() turns the journal into the session's data.
+    """
+
+    # Queued in place of a record to ask the writer thread to sync or stop
+    SYNC = "sync"
+    STOP = "stop"
+
+    def __init__(self, path, sync_every=20, max_pending=1000):
+        """Open a journal for appending. Existing records are kept.
+
+        Parameters:
+        path -- path of the journal file
+        sync_every -- number of records written between syncs to disk
+        max_pending -- number of records that can wait to be written before
+            appending blocks
+        """
+        self.lock = Lock(path)
+        if not self.lock.acquire():
+            raise OSError("Journal is in use by another station: %s" % path)
+
+        self.path = path
+        self.sync_every = sync_every
+        self.unsynced = 0
+        self.error = None
+        self.closed = False
+        self.file = open(path, "a", encoding="utf-8")
+
+        self.pending = queue.Queue(max_pending)
+        self.writer = threading.Thread(target=self.write_records, name="journal")
+        self.writer.daemon = True
+        self.writer.start()
+
+        # Write out pending records if the battery exits during a task
+        atexit.register(self.release)
+
+    def write_records(self):
+        # Runs on the writer thread until the journal is closed
+        while True:
+            record = self.pending.get()
+
+            try:
+                if record is self.STOP:
+                    self.file.flush()
+                    os.fsync(self.file.fileno())
+                elif self.error is not None:
+                    pass
+                elif record is self.SYNC:
+                    self.write_sync()
+                else:
+                    self.file.write(json.dumps(record, default=to_json) + "\n")
+                    self.file.flush()
+
+                    self.unsynced += 1
+                    if self.unsynced >= self.sync_every:
+                        self.write_sync()
+            except Exception as e:
+                if self.error is None:
+                    self.error = e
+            finally:
+                self.pending.task_done()
+
+            if record is self.STOP:
+                break
+
+    def write_sync(self):
+        # Runs on the writer thread
+        self.file.flush()
+        os.fsync(self.file.fileno())
+        self.unsynced = 0
+
+    def append(self, record):
+        """Queue a record to be appended to the journal.
+
+        Parameters:
+        record -- dict of JSON serializable values (or numpy scalars)
+        """
+        if self.closed:
+            raise ValueError("Journal is closed: %s" % self.path)
+
+        self.pending.put(record)
+
+    def trial(self, table, part, trial, values):
+        """Append the results of a trial.
+
+        Parameters:
+        table -- name of the table the task's data is written to
+        part -- name of the set of trials within the task (e.g. "block 1")
+        trial -- index of the trial in the set (0 based)
+        values -- dict of result values, by column name
+        """
+        self.append(
+            {
+                "type": "trial",
+                "table": table,
+                "part": part,
+                "trial": trial,
+                "values": dict(values),
+            }
+        )
+
+    def table(self, name, df):
+        """Append a full table of data (e.g. a task's data when it is done).
+
+        Parameters:
+        name -- name of the table, used as the sheet name in the workbook
+        df -- dataframe
+        """
+        df = df.astype(object).where(df.notna(), None)
+        self.append(
+            {
+                "type": "table",
+                "table": name,
+                "columns": [str(x) for x in df.columns],
+                "data": df.values.tolist(),
+            }
+        )
+        self.sync()
+
+    def sync(self):
+        """Ask for all appended records to be stored on disk. Does not wait."""
+        self.append(self.SYNC)
+
+    def wait(self):
+        """Wait until all appended records have been written.
+
+        Returns:
+        error -- exception writing stopped on, or None
+        """
+        self.pending.join()
+        return self.error
+
+    def close(self):
+        """Write all appended records and close the journal.
+
+        The journal stays locked until release() is called.
+
+        Returns:
+        error -- exception writing stopped on, or None
+        """
+        if not self.closed:
+            self.closed = True
+            self.pending.put(self.STOP)
+            self.writer.join()
+            self.file.close()
+
+        return self.error
+
+    def release(self):
+        """Close the journal if it is open, and release its lock."""
+        self.close()
+        self.lock.release()
+
+        # Released journals don't need to be kept until the battery exits
+        atexit.unregister(self.release)
+
+
+def start(path, sync_every=20):
+    """Start journaling a session. Trial recorders append to the journal.
+
+    Parameters:
+    path -- path of the journal file
+    sync_every -- number of records written between syncs to disk
+
+    Returns:
+    journal -- the active Journal
+    """
+    global active
+    active = Journal(path, sync_every)
+    return active
+
+
+def stop():
+    """Stop journaling the session, and close the journal.
+
+    The journal stays locked until its release() is called, once the
+    session's data has been saved.
+
+    Returns:
+    error -- exception the journal's writing stopped on, or None
+    """
+    global active
+    error = None
+    if active is not None:
+        error = active.close()
+        active = None
+
+    return error
+
+
+def read(path):
+    """Read the records of a journal.
+
+    A crash can leave the last line partly written. That line, and anything
+    after the first line that can't be read, is skipped.
+
+    Parameters:
+    path -- path of the journal file
+
+    Returns:
+    records -- list of records, in the order they were appended
+    """
+    records = []
+    with open(path, encoding="utf-8", errors="replace") as f:
+        for line in f:
+            if not line.endswith("\n"):
+                break
+            try:
+                records.append(json.loads(line))
+            except ValueError:
+                break
+
+    return records
+
+
+def tables(records):
+    """Get the tables of a journal.
+
+    Tables appended with Journal.table() are returned as they were written.
+    Trials of a table that was never appended (e.g. of the task that was
+    running when the battery crashed) are returned as a "<table> partial"
+    table, with a part and trial column and the results that were recorded.
+    Times in partial tables are in the same units as in the task's table.
+
+    Parameters:
+    records -- list of records, as returned by read()
+
+    Returns:
+    tables -- dict of dataframes by table name
+    """
+    complete = {}
+    trials = {}
+
+    for record in records:
+        if record["type"] == "table":
+            complete[record["table"]] = pd.DataFrame(
+                record["data"], columns=record["columns"]
+            )
+        elif record["type"] == "trial":
+            # A trial can be recorded in several parts, so merge its values
+            rows = trials.setdefault(record["table"], {})
+            key = (record["part"], record["trial"] + 1)
+            rows.setdefault(key, {}).update(record["values"])
+
+    for table, rows in trials.items():
+        if table not in complete:
+            df = pd.DataFrame.from_dict(rows, orient="index")
+            df.index = df.index.set_names(["part", "trial"])
+
+            for name in TIME_COLUMNS:
+                if name in df:
+                    df[name] = clock.to_ms(pd.to_numeric(df[name], errors="coerce"))
+                    if table in SECONDS_TABLES:
+                        df[name] = df[name] / 1000
+            complete["%s partial" % table] = df.reset_index()
+
+    return complete
+
+
+def compact(path, output_path, output_format):
+    """Save the tables of a journal as the session's data.
+
+    Parameters:
+    path -- path of the journal file
+    output_path -- path of the session's data, as returned by
+        output.session_path()
+    output_format -- one of output.FORMATS
+    """
+    output.write_session(output_path, tables(read(path)), output_format)
@@ -0,0 +1,213 @@
+import importlib.util
+import numbers
+import os
+import pandas as pd
+
+# Output formats of session data, and the package each one needs
+FORMATS = ["xlsx", "parquet", "feather"]
+COLUMNAR_FORMATS = ["parquet", "feather"]
+FORMAT_PACKAGES = {"xlsx": "openpyxl", "parquet": "pyarrow", "feather": "pyarrow"}
+
+# Formats new projects save to, most preferred first
+DEFAULT_FORMATS = ["parquet", "xlsx", "feather"]
+
+# Extensions of saved session workbooks. .xls workbooks were written by
+# older versions of the battery, and can still be read with xlrd
+EXCEL_EXTENSIONS = [".xlsx", ".xls"]
+
+# Text columns with at most this fraction of unique values become categorical
+CATEGORY_MAX_UNIQUE = 0.5
+
+# Text values that mark a missing value in an otherwise numeric column
+MISSING_VALUES = ["NA", ""]
+
+
+def available_formats():
+    """Get the output formats that can be written with the installed packages.
+
+    Returns:
+    formats -- list of format names, in the order of FORMATS
+    """
+    return [
+        x for x in FORMATS if importlib.util.find_spec(FORMAT_PACKAGES[x]) is not None
+    ]
+
+
+def default_format():
+    """Get the output format to save to when none is set, or the one set
+    can't be written.
+
+    Returns:
+    output_format -- first of DEFAULT_FORMATS that is available. If none is,
+        "xlsx", which fails to save until openpyxl is installed (the data
+        stays in the session's journal until then)
+    """
+    available = available_formats()
+    for output_format in DEFAULT_FORMATS:
+        if output_format in available:
+            return output_format
+
+    return "xlsx"
+
+
+def typed(df):
+    """Convert a data table to compact, typed columns.
+
+    Columns of numbers mixed with missing values (e.g. "NA") become numeric,
+    with the missing values as NaN. Other text columns with repeated values
+    (e.g. condition labels) become categorical, and the rest plain strings.
+    Numeric columns are kept as they are.
+
+    Parameters:
+    df -- dataframe
+
+    Returns:
+    df -- converted copy of the dataframe
+    """
+    df = df.copy()
+    for name, column in df.items():
+        if pd.api.types.is_numeric_dtype(column):
+            continue
+
+        numbers = numeric(column)
+        if numbers is not None:
+            df[name] = numbers
+            continue
+
+        values = column.astype("string")
+        if values.nunique() <= CATEGORY_MAX_UNIQUE * len(values):
+            df[name] = values.astype("category")
+        else:
+            df[name] = values
+
+    return df
+
+
+def numeric(column):
+    # Column as numbers, if every value is a number or missing. Else None.
+    # Text of digits (e.g. a typed digit sequence) is kept as text
+    missing = column.isna() | column.isin(MISSING_VALUES)
+    present = column[~missing]
+    if present.empty:
+        return None
+
+    is_number = present.map(
+        lambda x: isinstance(x, numbers.Number) and not isinstance(x, bool)
+    )
+    if not is_number.all():
+        return None
+
+    return pd.to_numeric(column.where(~missing))
+
+
+def session_path(data_dir, name, output_format):
+    """Get the path the data of a session is saved to.
+
+    Excel data is saved to a single workbook. Columnar data is saved to a
+    directory with one file per table.
+
+    Parameters:
+    data_dir -- project data directory
+    name -- name of the session (e.g. "<subject>_<condition>")
+    output_format -- one of FORMATS
+
+    Returns:
+    path -- path of the workbook or directory
+    """
+    if output_format == "xlsx":
+        return os.path.join(data_dir, "%s.xlsx" % name)
+
+    return os.path.join(data_dir, name)
+
+
+def write_session(path, tables, output_format):
+    """Save the data tables of a session.
+
+    Parameters:
+    path -- path of the session's data, as returned by session_path()
+    tables -- dict of dataframes by table name (e.g. "info", "ANT")
+    output_format -- one of FORMATS
+    """
+    if output_format not in FORMATS:
+        raise ValueError("Unknown output format: %s" % output_format)
+    if output_format not in available_formats():
+        raise ImportError(
+            "Saving %s files requires %s"
+            % (output_format, FORMAT_PACKAGES.get(output_format, output_format))
+        )
+
+    if output_format == "xlsx":
+        with pd.ExcelWriter(path, engine="openpyxl") as writer:
+            for name, df in tables.items():
+                # Excel limits sheet names to 31 characters
+                df.to_excel(writer, sheet_name=name[:31], index=False)
+        return
+
+    if not os.path.isdir(path):
+        os.makedirs(path)
+
+    for name, df in tables.items():
+        df = typed(df).reset_index(drop=True)
+        table_file = os.path.join(path, "%s.%s" % (name, output_format))
+
+        if output_format == "parquet":
+            df.to_parquet(table_file, index=False)
+        else:
+            df.to_feather(table_file)
+
+
+def read_session(path, tables=None):
+    """Read the data tables of a session, in any of the output formats.
+
+    Parameters:
+    path -- path of a session workbook or directory
+    tables -- names of the tables to read, or None to read every table.
+        Tables the session doesn't have are skipped
+
+    Returns:
+    tables -- dict of dataframes by table name
+    """
+    if not os.path.isdir(path):
+        if tables is None:
+            return pd.read_excel(path, None, converters={"sub_num": str})
+
+        # Only parse the sheets that are needed
+        with pd.ExcelFile(path) as workbook:
+            names = [x for x in workbook.sheet_names if x in tables]
+            return pd.read_excel(workbook, names, converters={"sub_num": str})
+
+    data = {}
+    for file_name in sorted(os.listdir(path)):
+        name, ext = os.path.splitext(file_name)
+        table_file = os.path.join(path, file_name)
+
+        if tables is not None and name not in tables:
+            continue
+
+        if ext == ".parquet":
+            data[name] = pd.read_parquet(table_file)
+        elif ext == ".feather":
+            data[name] = pd.read_feather(table_file)
+
+    return data
+
+
+def export_excel(path):
+    """Get an Excel view of a session saved in a columnar format.
+
+    The workbook is only written if it does not exist yet or is older than
+    the session's data, so it can be requested whenever it is needed.
+
+    Parameters:
+    path -- path of a session directory
+
+    Returns:
+    output_file -- path of the workbook, next to the session directory
+    """
+    output_file = path.rstrip(os.sep) + ".xlsx"
+
+    data_time = max(os.path.getmtime(os.path.join(path, x)) for x in os.listdir(path))
+    if not os.path.isfile(output_file) or os.path.getmtime(output_file) < data_time:
+        write_session(output_file, read_session(path), "xlsx")
+
+    return output_file
@@ -0,0 +1,228 @@
+import json
+import os
+import sqlite3
+import time
+from contextlib import closing
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS projects (
+    name TEXT PRIMARY KEY,
+    researcher TEXT NOT NULL,
+    created REAL,
+    path TEXT
+);
+CREATE INDEX IF NOT EXISTS projects_researcher ON projects (researcher);
+CREATE TABLE IF NOT EXISTS imports (
+    file TEXT PRIMARY KEY,
+    imported REAL
+);
+"""
+
+# Condition for a project or researcher name containing a text
+MATCH = "(name LIKE ? ESCAPE '\\' OR researcher LIKE ? ESCAPE '\\')"
+
+
+# SQLite collation that sorts names by sort_key()
+COLLATION = "project_name"
+
+
+def sort_key(name):
+    """Get the key researcher and project names are sorted by.
+
+    Names are sorted case insensitively, then case sensitively. The project
+    store sorts with the same key (through the COLLATION collation), so
+    names can be inserted into a sorted list in the order the store lists
+    them.
+
+    Parameters:
+    name -- researcher or project name
+
+    Returns:
+    key -- tuple of the lower case name and the name
+    """
+    return (name.lower(), name)
+
+
+def compare_names(a, b):
+    # COLLATION: compare names by their sort_key()
+    a, b = sort_key(a), sort_key(b)
+    return (a > b) - (a < b)
+
+
+def match_params(text):
+    # Parameters of MATCH. LIKE wildcards in the text are matched literally
+    for char in "\\%_":
+        text = text.replace(char, "\\" + char)
+
+    pattern = "%" + text + "%"
+    return (pattern, pattern)
+
+
+class ProjectStore(object):
+    """List of the battery's projects, by researcher.
+
+    Projects are stored in a SQLite database in the application directory.
+    Each change is its own transaction, so stations sharing an application
+    directory can create and delete projects at the same time without
+    overwriting each other's changes.
+
+    Project names are unique across all researchers.
+    """
+
+    def __init__(self, base_dir):
+        """Open the project store, creating it if needed.
+
+        Projects in an existing projects.txt file (the old project list) are
+        imported the first time the store is opened.
+
+        Parameters:
+        base_dir -- application directory
+        """
+        self.path = os.path.join(base_dir, "projects.db")
+
+        with closing(self.connect()) as db, db:
+            db.executescript(SCHEMA)
+
+        self.import_file(os.path.join(base_dir, "projects.txt"))
+
+    def connect(self):
+        # Wait for other stations' transactions rather than failing
+        db = sqlite3.connect(self.path, timeout=30)
+        db.create_collation(COLLATION, compare_names)
+        return db
+
+    def import_file(self, path):
+        """Import the projects of a projects.txt file, if not imported yet.
+
+        Projects with the name of an existing project are skipped.
+
+        Parameters:
+        path -- path of the projects.txt file
+        """
+        if not os.path.isfile(path):
+            return
+
+        with open(path, "r") as f:
+            project_list = json.load(f)
+
+        with closing(self.connect()) as db, db:
+            try:
+                db.execute(
+                    "INSERT INTO imports (file, imported) VALUES (?, ?)",
+                    (os.path.abspath(path), time.time()),
+                )
+            except sqlite3.IntegrityError:
+                # Already imported
+                return
+
+            db.executemany(
+                "INSERT OR IGNORE INTO projects (name, researcher, created, path)"
+                " VALUES (?, ?, ?, ?)",
+                [
+                    (name, researcher, info["created"], info["path"])
+                    for researcher, projects in project_list.items()
+                    for name, info in projects.items()
+                ],
+            )
+
+    def add(self, researcher, name, path):
+        """Add a new project.
+
+        Parameters:
+        researcher -- name of the researcher
+        name -- project name
+        path -- project directory
+
+        Returns:
+        added -- False if a project with the name already exists
+        """
+        try:
+            with closing(self.connect()) as db, db:
+                db.execute(
+                    "INSERT INTO projects (name, researcher, created, path)"
+                    " VALUES (?, ?, ?, ?)",
+                    (name, researcher, time.time(), path),
+                )
+        except sqlite3.IntegrityError:
+            return False
+
+        return True
+
+    def delete(self, name):
+        """Delete a project. The project directory is not changed."""
+        with closing(self.connect()) as db, db:
+            db.execute("DELETE FROM projects WHERE name = ?", (name,))
+
+    def get(self, name):
+        """Get a project.
+
+        Returns:
+        project -- dict with the project's name, researcher, created (unix
+            time) and path, or None if there is no such project
+        """
+        with closing(self.connect()) as db:
+            db.row_factory = sqlite3.Row
+            row = db.execute(
+                "SELECT * FROM projects WHERE name = ?", (name,)
+            ).fetchone()
+
+        if row is None:
+            return None
+
+        return dict(row)
+
+    def __contains__(self, name):
+        return self.get(name) is not None
+
+    def researchers(self, text=None):
+        """Get the names of all researchers with projects, sorted.
+
+        Parameters:
+        text -- only get researchers whose name, or the name of one of whose
+            projects, contains this text (case insensitive). If None, get
+            every researcher
+        """
+        query = "SELECT DISTINCT researcher FROM projects"
+        params = ()
+        if text:
+            query += " WHERE " + MATCH
+            params = match_params(text)
+        query += " ORDER BY researcher COLLATE %s" % COLLATION
+
+        with closing(self.connect()) as db:
+            rows = db.execute(query, params).fetchall()
+
+        return [x[0] for x in rows]
+
+    def projects(self, researcher=None, text=None):
+        """Get project names, sorted.
+
+        Parameters:
+        researcher -- only get the projects of this researcher. If None, get
+            every project
+        text -- only get projects whose name, or researcher's name, contains
+            this text (case insensitive). If None, get every project
+
+        Returns:
+        projects -- list of (researcher, project name) tuples, sorted by
+            researcher and then project name
+        """
+        conditions = []
+        params = ()
+        if researcher is not None:
+            conditions.append("researcher = ?")
+            params += (researcher,)
+        if text:
+            conditions.append(MATCH)
+            params += match_params(text)
+
+        query = "SELECT researcher, name FROM projects"
+        if conditions:
+            query += " WHERE " + " AND ".join(conditions)
+        query += " ORDER BY researcher COLLATE %s, name COLLATE %s" % (
+            COLLATION,
+            COLLATION,
+        )
+
+        with closing(self.connect()) as db:
+            return db.execute(query, params).fetchall()
@@ -0,0 +1,74 @@
+import numpy as np
+
+from utils import journal
+
+
+class TrialRecorder(object):
+    """Results of a set of trials, recorded as the trials are run.
+
+    Results are stored in a numpy structured array preallocated for every
+    trial, so recording a result during a trial is a plain array write. The
+    results are only turned into dataframe columns once, after the last trial.
+
+    If a session journal is active, every recorded result is also appended to
+    it, so the results survive a crash during the task.
+    """
+
+    def __init__(self, num_trials, fields, table=None, part="main"):
+        """Create a recorder.
+
+        Parameters:
+        num_trials -- number of trials to record
+        fields -- list of (name, dtype, default) tuples, one per result column.
+            Trials that are never recorded keep the default values
+        table -- name of the table the task's data is saved to. Results are
+            only journaled if a table is given
+        part -- name of the set of trials within the task (e.g. "block 1")
+        """
+        self.table = table
+        self.part = part
+        self.fields = [name for name, dtype, default in fields]
+        self.data = np.empty(
+            num_trials, dtype=[(name, dtype) for name, dtype, default in fields]
+        )
+
+        for name, dtype, default in fields:
+            self.data[name] = default
+
+    def __len__(self):
+        return len(self.data)
+
+    def __getitem__(self, field):
+        """Get the values of a result column, as a numpy array."""
+        return self.data[field]
+
+    def record(self, trial, **values):
+        """Record results of a trial.
+
+        Parameters:
+        trial -- index of the trial (0 based)
+        values -- result values, by column name
+        """
+        row = self.data[trial]
+        for name, value in values.items():
+            row[name] = value
+
+        if journal.active is not None and self.table is not None:
+            journal.active.trial(self.table, self.part, trial, values)
+
+    def to_frame(self, design):
+        """Add the recorded results to a dataframe.
+
+        Parameters:
+        design -- dataframe with one row per trial, in trial order (e.g. the
+            trial schedule)
+
+        Returns:
+        data -- copy of design with a column for each result. Existing
+            columns with the same name are replaced
+        """
+        data = design.copy()
+        for name in self.fields:
+            data[name] = self.data[name]
+
+        return data
@@ -0,0 +1,161 @@
+import os
+import sqlite3
+import time
+from contextlib import closing
+
+from utils import output
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS subjects (
+    sub_num TEXT PRIMARY KEY,
+    condition TEXT,
+    file TEXT,
+    started REAL,
+    tasks TEXT,
+    completed TEXT
+)
+"""
+
+# Extensions of session files. Columnar sessions are saved as directories
+SESSION_EXTENSIONS = output.EXCEL_EXTENSIONS + [
+    "." + x for x in output.COLUMNAR_FORMATS
+]
+
+
+class SubjectRegistry(object):
+    """Index of the subjects that have run a session in a project.
+
+    Subjects are stored in a SQLite database in the project directory, keyed
+    by subject number, so checking for a duplicate subject is an index
+    lookup instead of a scan of the data directory. Each subject is
+    registered in a single transaction when their session starts, so two
+    stations sharing a project can't both start the same subject.
+
+    A new registry imports the subjects of the data files that already exist.
+    """
+
+    def __init__(self, project_dir, data_dir):
+        """Open the registry of a project, creating it if needed.
+
+        Parameters:
+        project_dir -- project directory, where the registry is stored
+        data_dir -- data directory of the project
+        """
+        self.path = os.path.join(project_dir, "subjects.db")
+        new = not os.path.isfile(self.path)
+
+        with closing(self.connect()) as db, db:
+            db.execute(SCHEMA)
+
+        if new:
+            self.import_data(data_dir)
+
+    def connect(self):
+        # Wait for other stations' transactions rather than failing
+        return sqlite3.connect(self.path, timeout=30)
+
+    def import_data(self, data_dir):
+        """Register the subjects of existing session data.
+
+        Sessions are saved as files or directories named
+        "<subject>_<condition>", with an extension for files. Other files,
+        such as journals and their locks, are ignored.
+
+        Parameters:
+        data_dir -- data directory of the project
+        """
+        rows = []
+        for file_name in os.listdir(data_dir):
+            path = os.path.join(data_dir, file_name)
+            if os.path.isdir(path):
+                name = file_name
+            else:
+                name, ext = os.path.splitext(file_name)
+                if ext not in SESSION_EXTENSIONS:
+                    continue
+
+            if "_" not in name:
+                continue
+
+            sub_num, condition = name.split("_", 1)
+            rows.append((sub_num, condition, path, os.path.getmtime(path)))
+
+        with closing(self.connect()) as db, db:
+            db.executemany(
+                "INSERT OR IGNORE INTO subjects (sub_num, condition, file, started)"
+                " VALUES (?, ?, ?, ?)",
+                rows,
+            )
+
+    def register(self, sub_num, condition, path, tasks):
+        """Register a subject at the start of their session.
+
+        Parameters:
+        sub_num -- subject number
+        condition -- condition number
+        path -- path of the subject's data
+        tasks -- list of the tasks in the session, in order
+
+        Returns:
+        registered -- False if the subject number is already registered
+        """
+        try:
+            with closing(self.connect()) as db, db:
+                db.execute(
+                    "INSERT INTO subjects (sub_num, condition, file, started, tasks)"
+                    " VALUES (?, ?, ?, ?, ?)",
+                    (
+                        str(sub_num),
+                        str(condition),
+                        path,
+                        time.time(),
+                        ", ".join(tasks),
+                    ),
+                )
+        except sqlite3.IntegrityError:
+            return False
+
+        return True
+
+    def set_completed(self, sub_num, tasks):
+        """Record the tasks a subject completed.
+
+        Parameters:
+        sub_num -- subject number
+        tasks -- list of completed tasks, in order
+        """
+        with closing(self.connect()) as db, db:
+            db.execute(
+                "UPDATE subjects SET completed = ? WHERE sub_num = ?",
+                (", ".join(tasks), str(sub_num)),
+            )
+
+    def get(self, sub_num):
+        """Get the registry entry of a subject.
+
+        Returns:
+        entry -- dict with the subject's condition, file, started (unix
+            time), tasks and completed tasks, or None if not registered
+        """
+        with closing(self.connect()) as db:
+            db.row_factory = sqlite3.Row
+            row = db.execute(
+                "SELECT * FROM subjects WHERE sub_num = ?", (str(sub_num),)
+            ).fetchone()
+
+        if row is None:
+            return None
+
+        return dict(row)
+
+    def __contains__(self, sub_num):
+        with closing(self.connect()) as db:
+            row = db.execute(
+                "SELECT 1 FROM subjects WHERE sub_num = ?", (str(sub_num),)
+            ).fetchone()
+
+        return row is not None
+
+    def __len__(self):
+        with closing(self.connect()) as db:
+            return db.execute("SELECT COUNT(*) FROM subjects").fetchone()[0]
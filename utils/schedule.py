@@ -0,0 +1,278 @@
+import io
+import json
+import mmap
+import struct
+import zlib
+import numpy as np
+import pandas as pd
+
+# First bytes of a schedule archive file
+ARCHIVE_MAGIC = b"CBSCHED1"
+
+# Name of the array holding the compile options in a schedule file
+OPTIONS_KEY = "options"
+
+
+def new_seed():
+    """Get a new random project seed.
+
+    Returns:
+    seed -- 128 bit integer drawn from OS entropy
+    """
+    return np.random.SeedSequence().entropy
+
+
+def stream(seed, sub_num, name):
+    """Get the random number generator of one stream of a subject's session.
+
+    Every subject gets an independent stream for each task (and one for the
+    task order), derived from the project seed, the subject number and the
+    stream name. Streams do not depend on which other tasks or subjects
+    exist, so any one of them can be regenerated exactly on its own.
+
+    Parameters:
+    seed -- project seed (integer)
+    sub_num -- subject number. Compared as a string, so "007" and "7" are
+        different subjects
+    name -- stream name, usually the task name
+
+    Returns:
+    rng -- numpy random Generator
+    """
+    sub_key = int.from_bytes(str(sub_num).encode("utf-8"), "little")
+    name_key = zlib.crc32(name.encode("utf-8"))
+
+    return np.random.default_rng(np.random.SeedSequence([int(seed), sub_key, name_key]))
+
+
+def task_order(seed, sub_num, tasks):
+    """Get a random task order for a subject.
+
+    Parameters:
+    seed -- project seed (integer)
+    sub_num -- subject number
+    tasks -- list of task names
+
+    Returns:
+    tasks -- shuffled copy of the task list
+    """
+    rng = stream(seed, sub_num, "task order")
+    return [tasks[i] for i in rng.permutation(len(tasks))]
+
+
+def counterbalanced_orders(tasks):
+    """Get a set of task orders that counterbalances position and sequence.
+
+    Uses a Williams design: across the set, every task appears in every
+    position equally often, and immediately follows every other task equally
+    often. Assigning orders to subjects in turn keeps a cohort balanced.
+
+    Parameters:
+    tasks -- list of task names
+
+    Returns:
+    orders -- list of task orders. There are len(tasks) orders, or twice as
+        many if the number of tasks is odd
+    """
+    n = len(tasks)
+
+    # First order is 0, 1, n-1, 2, n-2, ... Later orders shift it by one
+    first = [0]
+    for i in range(1, n):
+        first.append((i + 1) // 2 if i % 2 else n - i // 2)
+
+    orders = [[tasks[(x + shift) % n] for x in first] for shift in range(n)]
+
+    # With an odd number of tasks, sequences only balance with the reverses
+    if n % 2:
+        orders += [order[::-1] for order in orders]
+
+    return orders
+
+
+def to_array(df):
+    """Convert a trial table to a numpy record array.
+
+    Text columns are stored as fixed width unicode, so the array can be saved
+    without pickling.
+
+    Parameters:
+    df -- dataframe
+
+    Returns:
+    array -- numpy record array with one field per column
+    """
+    columns = []
+    for name, column in df.items():
+        if pd.api.types.is_numeric_dtype(column):
+            columns.append(column.to_numpy())
+        else:
+            columns.append(column.to_numpy().astype(str))
+
+    return np.rec.fromarrays(columns, names=[str(x) for x in df.columns])
+
+
+def save(path, schedules, options=None):
+    """Write a session's trial tables to a binary schedule file.
+
+    Parameters:
+    path -- path (or file object) of the .npz file
+    schedules -- dict of schedules by task name. Each schedule is a dict of
+        dataframes by part name (e.g. "practice", "main")
+    options -- dict of the task options the schedules were compiled with
+        (e.g. {"ant_blocks": 3}), stored so they can be checked against the
+        project's settings before the schedules are used
+    """
+    arrays = {}
+    for task, schedule in schedules.items():
+        for part, trials in schedule.items():
+            arrays["%s/%s" % (task, part)] = to_array(trials)
+
+    if options is not None:
+        arrays[OPTIONS_KEY] = np.array(json.dumps(options, sort_keys=True))
+
+    np.savez_compressed(path, **arrays)
+
+
+def load(path):
+    """Read a session's trial tables from a binary schedule file.
+
+    Parameters:
+    path -- path (or file object) of a .npz file written by save()
+
+    Returns:
+    schedules -- dict of schedules by task name, as passed to save()
+    """
+    schedules = {}
+    with np.load(path, allow_pickle=False) as f:
+        for key in f.files:
+            if key == OPTIONS_KEY:
+                continue
+
+            task, part = key.split("/", 1)
+            schedules.setdefault(task, {})[part] = pd.DataFrame(f[key])
+
+    return schedules
+
+
+def load_options(path):
+    """Read the task options a schedule file was compiled with.
+
+    Parameters:
+    path -- path (or file object) of a .npz file written by save()
+
+    Returns:
+    options -- dict of task options, or None if the file has none
+    """
+    with np.load(path, allow_pickle=False) as f:
+        if OPTIONS_KEY not in f.files:
+            return None
+
+        return json.loads(str(f[OPTIONS_KEY]))
+
+
+def write_archive(path, seed, sessions, tasks, options):
+    """Write the schedules of many subjects to a single indexed archive.
+
+    The archive starts with ARCHIVE_MAGIC, the size of the index as an 8 byte
+    little endian integer, and the index as JSON. The index holds the seed,
+    the tasks the task orders are counterbalanced over, the task options
+    and, for each subject, the task order and the location of the subject's
+    schedule file within the data that follows.
+
+    Parameters:
+    path -- path of the archive file
+    seed -- project seed the schedules were compiled from
+    sessions -- iterable of (subject number, task order, schedule file bytes)
+        tuples, where the bytes are written by save()
+    tasks -- list of the tasks in the task orders
+    options -- dict of the task options the schedules were compiled with
+    """
+    subjects = {}
+    payloads = []
+    offset = 0
+
+    for sub_num, order, payload in sessions:
+        subjects[str(sub_num)] = {
+            "order": list(order),
+            "offset": offset,
+            "size": len(payload),
+        }
+        payloads.append(payload)
+        offset += len(payload)
+
+    index = json.dumps(
+        {
+            "seed": str(seed),
+            "tasks": list(tasks),
+            "options": options,
+            "subjects": subjects,
+        }
+    ).encode("utf-8")
+
+    with open(path, "wb") as f:
+        f.write(ARCHIVE_MAGIC)
+        f.write(struct.pack("<Q", len(index)))
+        f.write(index)
+        for payload in payloads:
+            f.write(payload)
+
+
+class ScheduleArchive(object):
+    """Read access to an archive written by write_archive().
+
+    The file is memory-mapped, so opening it only reads the index, and loading
+    a subject only reads that subject's schedules. The map is held until
+    close() is called, or the `with` block the archive is used in ends.
+    """
+
+    def __init__(self, path):
+        self.file = open(path, "rb")
+        try:
+            self.data = mmap.mmap(self.file.fileno(), 0, access=mmap.ACCESS_READ)
+        except ValueError:
+            # Empty file
+            self.file.close()
+            raise ValueError("Not a schedule archive: %s" % path)
+
+        header_size = len(ARCHIVE_MAGIC) + 8
+        if self.data[: len(ARCHIVE_MAGIC)] != ARCHIVE_MAGIC:
+            self.close()
+            raise ValueError("Not a schedule archive: %s" % path)
+
+        (index_size,) = struct.unpack("<Q", self.data[len(ARCHIVE_MAGIC) : header_size])
+        index = json.loads(self.data[header_size : header_size + index_size])
+
+        self.seed = int(index["seed"])
+        self.tasks = index["tasks"]
+        self.options = index["options"]
+        self.subjects = index["subjects"]
+        self.start = header_size + index_size
+
+    def __contains__(self, sub_num):
+        return str(sub_num) in self.subjects
+
+    def __len__(self):
+        return len(self.subjects)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def close(self):
+        """Unmap and close the archive file."""
+        self.data.close()
+        self.file.close()
+
+    def task_order(self, sub_num):
+        """Get the counterbalanced task order of a subject."""
+        return list(self.subjects[str(sub_num)]["order"])
+
+    def load(self, sub_num):
+        """Get the schedules of a subject, as returned by load()."""
+        entry = self.subjects[str(sub_num)]
+        start = self.start + entry["offset"]
+
+        return load(io.BytesIO(self.data[start : start + entry["size"]]))
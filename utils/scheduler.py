@@ -0,0 +1,133 @@
+import numpy as np
+import pygame
+import pandas as pd
+
+from utils import clock, display
+
+
+def onset_fields(phases):
+    """Get the TrialRecorder fields that hold the onsets of trial phases.
+
+    Each phase gets its intended onset ("<phase>Onset"), its actual onset
+    ("<phase>OnsetActual") and the error ("<phase>OnsetError"), in
+    milliseconds from the start of the timeline.
+
+    Parameters:
+    phases -- list of phase names
+
+    Returns:
+    fields -- list of (name, dtype, default) tuples
+    """
+    fields = []
+    for phase in phases:
+        for suffix in ["", "Actual", "Error"]:
+            fields.append(("%sOnset%s" % (phase, suffix), "float64", np.nan))
+
+    return fields
+
+
+class Scheduler(object):
+    """Presents frames at fixed onsets measured from a single start time.
+
+    Waiting for a relative duration after each frame adds every render and
+    flip overrun to the timeline, so a block slowly drifts from its design.
+    Here each onset is an absolute deadline from the start, so an overrun
+    only delays the frame it happened on and never the frames after it.
+
+    The intended and actual onset of every frame is logged, so the timing
+    error of each phase can be checked after the task. Frames can also be
+    recorded in a TrialRecorder (see onset_fields()), so the onsets are saved
+    with the trial data.
+    """
+
+    def __init__(self):
+        self.start = clock.now()
+        self.log = []
+
+    def reset(self):
+        """Start a new timeline from the current time. The log is kept."""
+        self.start = clock.now()
+
+    def deadline(self, onset):
+        """Get the absolute time of an onset.
+
+        Parameters:
+        onset -- onset in milliseconds from the start
+
+        Returns:
+        deadline -- time in nanoseconds, on the utils.clock clock
+        """
+        return self.start + clock.from_ms(onset)
+
+    def onset(self, time):
+        """Get the onset of an absolute time, the inverse of deadline()."""
+        return clock.to_ms(time - self.start)
+
+    def wait_until(self, onset):
+        """Wait until an onset has been reached, without changing the screen.
+
+        Parameters:
+        onset -- onset in milliseconds from the start
+        """
+        display.wait_until(self.deadline(onset))
+
+    def flip(self, onset, phase, results=None, trial=None, **info):
+        """Show the drawn frame at its onset and log when it was shown.
+
+        Parameters:
+        onset -- onset in milliseconds from the start. Onsets in the past
+            are shown immediately
+        phase -- name of the phase the frame belongs to
+        results -- TrialRecorder to record the phase's onsets in, with the
+            fields from onset_fields(). None to only log them
+        trial -- index of the trial the frame belongs to
+        info -- extra values stored with the log entry (e.g. the block)
+
+        Returns:
+        time -- time (ns) the frame was shown
+        """
+        self.wait_until(onset)
+        pygame.display.flip()
+        time = clock.now()
+
+        actual = self.onset(time)
+        if trial is not None:
+            info["trial"] = trial
+        self.log.append(
+            dict(
+                phase=phase, intended=onset, actual=actual, error=actual - onset, **info
+            )
+        )
+
+        if results is not None:
+            results.record(
+                trial,
+                **{
+                    "%sOnset" % phase: onset,
+                    "%sOnsetActual" % phase: actual,
+                    "%sOnsetError" % phase: actual - onset,
+                }
+            )
+
+        return time
+
+    def report(self):
+        """Get the logged onsets as a dataframe.
+
+        Returns:
+        report -- dataframe with the phase, intended and actual onset (ms)
+            and the error (ms) of every logged frame
+        """
+        return pd.DataFrame(self.log)
+
+    def summary(self):
+        """Get a one line summary of the onset error of each phase."""
+        if not self.log:
+            return "no frames shown"
+
+        errors = self.report().groupby("phase", sort=False)["error"]
+
+        return ", ".join(
+            "%s %.1f ms mean / %.1f ms max" % (phase, error.mean(), error.max())
+            for phase, error in errors
+        )